@@ -0,0 +1 @@
+"""Micro-benchmarks. Run from the repo root, e.g. `python -m benchmarks.serialization`."""
@@ -0,0 +1,70 @@
+"""
+Bulk import throughput (services.import_service), in row and document storage modes.
+
+Seeds a throwaway SQLite database with a survey of a text, a choice and a rating question,
+writes a CSV of generated responses and times run_import on it.
+
+    python -m benchmarks.imports [--rows 100000] [--batch-size 10000] [--mode rows|document|both]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+
+def _write_source(path: str, rows: int) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["respondent_id", "submitted_at", "Name", "Color", "Rate"])
+        for n in range(rows):
+            writer.writerow([f"r{n}", f"2024-01-{n % 28 + 1:02d}T12:00:00Z", f"name {n}", ("Red", "Blue")[n % 2], n % 5 + 1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--mode", choices=("rows", "document", "both"), default="both")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-imports-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ.setdefault("IMPORT_DIR", os.path.join(workdir, "imports"))
+
+    from database import SessionLocal, engine
+    from migrations import migrate
+    from schemas.question import QuestionCreate
+    from schemas.survey import SurveyCreate
+    from services import import_service, response_service, survey_service
+
+    migrate(engine)
+    source = os.path.join(workdir, "source.csv")
+    _write_source(source, args.rows)
+    batch_size = args.batch_size or import_service.IMPORT_BATCH_SIZE
+
+    modes = ("rows", "document") if args.mode == "both" else (args.mode,)
+    print(f"{args.rows} rows x 3 answers, batches of {batch_size}")
+    for mode in modes:
+        response_service.RESPONSE_STORAGE_MODE = mode
+        db = SessionLocal()
+        try:
+            survey = survey_service.create_survey(db, SurveyCreate(title=f"Import {mode}"))
+            survey_service.add_question(db, survey.id, QuestionCreate(title="Name", type="text"))
+            survey_service.add_question(
+                db, survey.id, QuestionCreate(title="Color", options=[{"label": "Red"}, {"label": "Blue"}])
+            )
+            survey_service.add_question(db, survey.id, QuestionCreate(title="Rate", type="star_rating"))
+            import_id = import_service.create_import(survey.id, source, "csv")["import_id"]
+            started = time.perf_counter()
+            result = import_service.run_import(db, import_id, batch_size)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        assert result["imported"] == args.rows, result
+        print(f"{mode:<9} {elapsed:7.2f} s   {args.rows / elapsed:9,.0f} responses/s")
+
+
+if __name__ == "__main__":
+    main()
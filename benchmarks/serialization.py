@@ -0,0 +1,134 @@
+"""
+Pydantic response_model path vs the fast JSON path (services.serialization).
+
+Seeds a throwaway SQLite database, then times both serializers on the survey payload
+(GET /api/surveys/{id}, /s/{token}) and the responses payload
+(GET /api/surveys/{id}/responses), checking that they produce the same JSON.
+
+    python -m benchmarks.serialization [--questions 25] [--options 5] [--responses 2000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def _seed(db, questions: int, options: int, responses: int) -> str:
+    from schemas.question import QuestionCreate
+    from schemas.response import SurveySubmitRequest
+    from schemas.survey import SurveyCreate
+    from services import response_service, survey_service
+
+    survey = survey_service.create_survey(db, SurveyCreate(title="Benchmark", metadata={"theme": "default"}))
+    created = [
+        survey_service.add_question(
+            db,
+            survey.id,
+            QuestionCreate(
+                title=f"Question {i}",
+                options=[{"label": f"Option {j}"} for j in range(options)],
+            ),
+        )
+        for i in range(questions)
+    ]
+    for n in range(responses):
+        answers = [
+            {"question_id": q.id, "selected_option_id": q.options[n % options].id, "answer_text": None}
+            for q in created
+        ]
+        response_service.submit_response(db, survey.id, SurveySubmitRequest(respondent_id=f"r{n}", answers=answers))
+    return survey.id
+
+
+def _normalized(body: bytes):
+    # Answer order within a response is not defined by either path
+    payload = json.loads(body)
+    for response in payload.get("responses", []):
+        response["answers"].sort(key=lambda answer: answer["id"])
+    return payload
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=25)
+    parser.add_argument("--options", type=int, default=5)
+    parser.add_argument("--responses", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    from database import SessionLocal, engine
+    from migrations import migrate
+    from schemas.response import ResponseListResponse
+    from schemas.survey import SurveyResponse
+    from services import response_service, serialization, survey_service
+
+    migrate(engine)
+    db = SessionLocal()
+    survey_id = _seed(db, args.questions, args.options, args.responses)
+    db.close()
+
+    def pydantic_json(model: type, value) -> bytes:
+        # What FastAPI does for response_model: validate, dump by alias in JSON mode, encode
+        dumped = model.model_validate(value).model_dump(mode="json", by_alias=True)
+        return json.dumps(dumped, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def survey_pydantic():
+        session = SessionLocal()
+        try:
+            return pydantic_json(SurveyResponse, survey_service.get_survey(session, survey_id))
+        finally:
+            session.close()
+
+    def survey_fast():
+        session = SessionLocal()
+        try:
+            return serialization.dumps(serialization.survey_dict(survey_service.get_survey(session, survey_id)))
+        finally:
+            session.close()
+
+    def responses_pydantic():
+        session = SessionLocal()
+        try:
+            rows = response_service.get_responses(session, survey_id)
+            value = {"survey_id": survey_id, "total": len(rows), "responses": rows}
+            return pydantic_json(ResponseListResponse, value)
+        finally:
+            session.close()
+
+    def responses_fast():
+        session = SessionLocal()
+        try:
+            records = response_service.get_response_records(session, survey_id)
+            return serialization.dumps(serialization.response_list_dict(survey_id, records))
+        finally:
+            session.close()
+
+    print(f"encoder: {'orjson' if serialization.orjson else 'json'}; "
+          f"{args.questions} questions x {args.options} options, {args.responses} responses")
+    for name, slow, fast in [
+        ("survey", survey_pydantic, survey_fast),
+        ("responses", responses_pydantic, responses_fast),
+    ]:
+        assert _normalized(slow()) == _normalized(fast()), f"{name}: payloads differ"
+        slow_ms = _time(slow, args.repeat)
+        fast_ms = _time(fast, args.repeat)
+        print(f"{name:<10} pydantic {slow_ms:9.2f} ms   fast {fast_ms:9.2f} ms   x{slow_ms / fast_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,34 +2,164 @@
 Database configuration via SQLAlchemy.
 
 Uses PostgreSQL when DATABASE_URL is set (production), otherwise SQLite (local dev).
+
+Set READ_DATABASE_URL to send dashboard reads to a replica (or a second SQLite file
+in tests).  Routers pick get_read_db or get_write_db; a client that just wrote keeps
+reading from the primary for READ_YOUR_WRITES_SECONDS so it always sees its own writes.
+
+Set SHARD_DATABASE_URLS (comma-separated) to spread survey response data (responses,
+answers, archived response keys, survey_sketches, drafts) over several databases; each survey lives on the shard
+picked by a stable hash of its id.  Surveys, questions and options stay on the primary.
+Survey-scoped endpoints use get_survey_read_db / get_survey_write_db, whose sessions
+route the sharded tables to the survey's shard; cross-survey jobs iterate
+iter_shard_sessions().  Without shards everything stays on the primary.
 """
 
 import os
+import time
+import zlib
+from typing import Iterator
 
+from fastapi import Request, Response
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Changing the number (or order) of shards remaps surveys; only set this on an empty deployment
+# or after moving the data.
+SHARD_DATABASE_URLS = [u.strip() for u in os.getenv("SHARD_DATABASE_URLS", "").split(",") if u.strip()]
+
+# Tables holding per-survey response data, which live on the survey's shard.
+SHARDED_TABLES = (
+    "responses", "answers", "archived_response_keys", "survey_sketches", "survey_sketch_deltas", "drafts",
+    "draft_events",
+)
+
+# Cookie holding the unix time until which this client's reads go to the primary.
+PRIMARY_PIN_COOKIE = "db_primary_until"
+
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})  # Required for SQLite
+    return create_engine(url)
+
 
 if DATABASE_URL:
     # Production: PostgreSQL (Railway, etc.)
-    engine = create_engine(DATABASE_URL)
+    engine = _create_engine(DATABASE_URL)
 else:
     # Local dev: SQLite
-    engine = create_engine(
-        "sqlite:///./surveys.db",
-        connect_args={"check_same_thread": False},  # Required for SQLite
-    )
+    engine = _create_engine("sqlite:///./surveys.db")
+
+read_engine = _create_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
+shard_engines: list[Engine] = [_create_engine(url) for url in SHARD_DATABASE_URLS]
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency that provides a SQLAlchemy session and ensures cleanup."""
-    db = SessionLocal()
+# ---------------------------------------------------------------------------
+# Sharding
+# ---------------------------------------------------------------------------
+
+def shard_index(survey_id: str) -> int:
+    """Shard holding a survey's response data (crc32 of the id, so it is stable across processes); 0 without shards."""
+    return zlib.crc32(survey_id.encode()) % max(len(shard_engines), 1)
+
+
+def _bind_shard(db: Session, shard: Engine) -> Session:
+    import models  # noqa: F401 — registers every table on Base.metadata
+    for name in SHARDED_TABLES:
+        db.bind_table(Base.metadata.tables[name], shard)
+    return db
+
+
+def bind_survey_shard(db: Session, survey_id: str) -> Session:
+    """
+    Route db's sharded tables to the survey's shard (a no-op without shards).
+    Call before the session touches response data; other tables keep the session's engine.
+    """
+    if shard_engines:
+        _bind_shard(db, shard_engines[shard_index(survey_id)])
+    return db
+
+
+def iter_shard_sessions(read: bool = False) -> Iterator[Session]:
+    """One session per shard, for cross-survey work; a single plain session without shards."""
+    factory = ReadSessionLocal if read else SessionLocal
+    for shard in shard_engines or [None]:
+        db = factory()
+        try:
+            yield _bind_shard(db, shard) if shard is not None else db
+        finally:
+            db.close()
+
+
+# ---------------------------------------------------------------------------
+# Session dependencies
+# ---------------------------------------------------------------------------
+
+def _session_scope(factory: sessionmaker, survey_id: str | None = None):
+    db = factory()
     try:
-        yield db
+        yield bind_survey_shard(db, survey_id) if survey_id else db
     finally:
         db.close()
+
+
+def _pin_reads_to_primary(response: Response) -> None:
+    if read_engine is not engine and READ_YOUR_WRITES_SECONDS > 0:
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(int(time.time() + READ_YOUR_WRITES_SECONDS) + 1),
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            # The dashboard calls the API cross-site (e.g. Vercel -> Railway) with credentials;
+            # a Lax cookie would never come back on those fetches.
+            samesite="none",
+            secure=True,
+        )
+
+
+def _read_factory(request: Request) -> sessionmaker:
+    try:
+        pinned_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    return SessionLocal if pinned_until > time.time() else ReadSessionLocal
+
+
+def get_db():
+    """Dependency that provides a SQLAlchemy session and ensures cleanup."""
+    yield from _session_scope(SessionLocal)
+
+
+def get_write_db(response: Response):
+    """Primary session for endpoints that write. Pins the client's reads to the primary for a while."""
+    _pin_reads_to_primary(response)
+    yield from _session_scope(SessionLocal)
+
+
+def get_read_db(request: Request):
+    """Replica session for read-only endpoints, or the primary while the client's write pin is live."""
+    yield from _session_scope(_read_factory(request))
+
+
+def get_survey_write_db(survey_id: str, response: Response):
+    """get_write_db for /surveys/{survey_id}/... endpoints, with response data routed to the survey's shard."""
+    _pin_reads_to_primary(response)
+    yield from _session_scope(SessionLocal, survey_id)
+
+
+def get_survey_read_db(survey_id: str, request: Request):
+    """
+    get_read_db for /surveys/{survey_id}/... endpoints.  Response data is read from the
+    survey's shard itself (shards have no replicas); surveys/questions still use the replica.
+    """
+    yield from _session_scope(_read_factory(request), survey_id)
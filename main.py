@@ -1,35 +1,50 @@
+"""
+FastAPI application factory.
+
+Importing this module is cheap and has no side effects: routers, models and Answer
+genius are imported when the app is first built, and the schema is managed by
+`python migrations.py` rather than created at import time.
+
+    uvicorn main:app                      # `app` is built lazily on first access
+    uvicorn main:create_app --factory
+    python main.py --measure-startup      # print a startup time breakdown
+"""
+
+import logging
 import os
+import time
+from contextlib import asynccontextmanager, contextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from services.predict_answer_type import predict_answer_type
-from database import engine, Base
-from routers import surveys, public, hosted, responses
-
-# Create all tables on startup
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 # CORS: allow comma-separated origins. Production: set CORS_ORIGINS=https://yourapp.vercel.app,http://localhost:3000
 _cors_str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
 CORS_ORIGINS = [o.strip() for o in _cors_str.split(",") if o.strip()]
 
-app = FastAPI(title="SurveyMonkey Clone API")
+# Apply pending migrations from the lifespan hook. On by default only for local SQLite dev;
+# deployments should run `python migrations.py` once instead of racing on DDL from every worker.
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0" if os.getenv("DATABASE_URL") else "1") == "1"
+
+# Log how long each startup phase takes.
+STARTUP_TIMING = os.getenv("STARTUP_TIMING") == "1"
+
+_startup_timings: list[tuple[str, float]] = []
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Register routers
-app.include_router(surveys.router)
-app.include_router(public.router)
-app.include_router(hosted.router)
-app.include_router(responses.router)
+@contextmanager
+def _timed(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _startup_timings.append((phase, elapsed_ms))
+        if STARTUP_TIMING:
+            logger.info("startup: %s took %.1f ms", phase, elapsed_ms)
 
 
 # ---------------------------------------------------------------------------
@@ -44,13 +59,113 @@ class PredictResponse(BaseModel):
     answer_type: str | None
 
 
-@app.get("/health")
 def health():
     return {"status": "ok"}
 
 
-@app.post("/api/predict-answer-type", response_model=PredictResponse)
 def api_predict_answer_type(body: PredictRequest):
     """Predict a suitable answer type (e.g. Single text box, Multiple choice, Checkboxes) from the question text."""
+    from services.predict_answer_type import predict_answer_type
+
     predicted = predict_answer_type(body.question_text)
     return PredictResponse(answer_type=predicted)
+
+
+# ---------------------------------------------------------------------------
+# App factory
+# ---------------------------------------------------------------------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from database import engine, shard_engines
+    from services import job_service
+
+    if AUTO_MIGRATE:
+        from migrations import migrate_all
+
+        with _timed("migrations"):
+            migrate_all()
+    else:
+        from migrations import check_schema
+
+        with _timed("schema check"):
+            check_schema()  # fail here, not with "no such table" on the first request
+    with _timed("job recovery"):
+        job_service.start()  # requeue jobs left pending by a previous process
+    yield
+    job_service.shutdown()
+    engine.dispose()
+    for shard in shard_engines:
+        shard.dispose()
+
+
+def create_app() -> FastAPI:
+    with _timed("create_app"):
+        with _timed("import routers"):
+            from routers import surveys, public, hosted, responses, jobs
+
+        app = FastAPI(title="SurveyMonkey Clone API", lifespan=lifespan)
+
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=CORS_ORIGINS,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+        # Register routers
+        app.include_router(surveys.router)
+        app.include_router(public.router)
+        app.include_router(hosted.router)
+        app.include_router(responses.router)
+        app.include_router(jobs.router)
+
+        app.add_api_route("/health", health, methods=["GET"])
+        app.add_api_route(
+            "/api/predict-answer-type",
+            api_predict_answer_type,
+            methods=["POST"],
+            response_model=PredictResponse,
+        )
+    return app
+
+
+_app: FastAPI | None = None
+
+
+def __getattr__(name: str):
+    # `uvicorn main:app` looks the attribute up; build the app on first access only.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _measure_startup() -> None:
+    import asyncio
+
+    async def run_lifespan(app: FastAPI):
+        with _timed("lifespan startup"):
+            context = app.router.lifespan_context(app)
+            await context.__aenter__()
+        await context.__aexit__(None, None, None)
+
+    with _timed("total"):
+        asyncio.run(run_lifespan(create_app()))
+    for phase, elapsed_ms in _startup_timings:
+        print(f"{phase:<20} {elapsed_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SurveyMonkey Clone API utilities.")
+    parser.add_argument("--measure-startup", action="store_true", help="Build the app, run its lifespan and print timings")
+    args = parser.parse_args()
+    if args.measure_startup:
+        _measure_startup()
+    else:
+        parser.print_help()
@@ -0,0 +1,459 @@
+"""
+Versioned schema migrations.
+
+Run once per deploy, before starting workers:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # print current / latest version
+
+Applied versions are recorded in the schema_version table, so each migration runs
+at most once per database.  Every step is also safe against databases created by
+the old import-time create_all(), which may already contain some of the changes.
+
+Response shards (SHARD_DATABASE_URLS) hold only the sharded tables and follow their own
+SHARD_MIGRATIONS list, applied to every shard by the same command.
+"""
+
+import argparse
+import logging
+from typing import Callable
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from database import engine, shard_engines
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+schema_version = Table("schema_version", _version_metadata, Column("version", Integer, nullable=False))
+
+# Arbitrary constant used to serialize concurrent migrators on PostgreSQL.
+_PG_ADVISORY_LOCK_ID = 7_310_026
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _add_column(conn: Connection, table_name: str, column: Column) -> None:
+    """ALTER TABLE ... ADD COLUMN for a column defined by the step, if it is missing."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{column.name}" {column_type}'))
+
+
+def _create_index(
+    conn: Connection, table_name: str, index_name: str, columns: tuple[str, ...], unique: bool = False,
+    where: str | None = None,
+) -> None:
+    """CREATE INDEX on the given columns (partial with `where`), if an index of that name is missing."""
+    existing = {i["name"] for i in inspect(conn).get_indexes(table_name)}
+    if index_name in existing:
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    predicate = f" WHERE {where}" if where else ""
+    conn.execute(text(f"CREATE {kind} {index_name} ON {table_name} ({', '.join(columns)}){predicate}"))
+
+
+def _step_metadata() -> MetaData:
+    """
+    MetaData for the tables one step creates, with a stub of the surveys table their
+    foreign keys point at.  Steps define their tables in full here, never from the models.
+    """
+    metadata = MetaData()
+    Table("surveys", metadata, Column("id", String(36), primary_key=True))
+    return metadata
+
+
+# ---------------------------------------------------------------------------
+# Migrations — append only; never edit a released step
+# ---------------------------------------------------------------------------
+
+# The schema as it was before migrations existed, frozen here: later model changes must
+# arrive through their own steps, never by editing this.
+_baseline_metadata = MetaData()
+
+Table(
+    "surveys", _baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("share_token", String(64), nullable=True, unique=True, index=True),
+    Column("collector_type", String(50), nullable=True),
+    Column("metadata", JSON, nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+Table(
+    "questions", _baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("type", String(50), nullable=False),
+    Column("title", Text, nullable=False),
+    Column("description", Text, nullable=True),
+    Column("required", Boolean, nullable=False),
+    Column("order_index", Integer, nullable=False),
+)
+Table(
+    "options", _baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("question_id", String(36), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("label", String(500), nullable=False),
+    Column("value", String(500), nullable=True),
+    Column("order_index", Integer, nullable=False),
+)
+Table(
+    "responses", _baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("submitted_at", DateTime(timezone=True), nullable=False),
+    Column("respondent_id", String(255), nullable=True, index=True),
+    Column("metadata", JSON, nullable=True),
+)
+Table(
+    "answers", _baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("response_id", String(36), ForeignKey("responses.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("question_id", String(36), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("answer_text", Text, nullable=True),
+    Column("selected_option_id", String(36), ForeignKey("options.id"), nullable=True, index=True),
+    Column("value_json", JSON, nullable=True),
+)
+
+
+def _m001_baseline(conn: Connection) -> None:
+    """Create the original tables if missing (a no-op on databases that predate migrations)."""
+    _baseline_metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _m002_response_idempotency_key(conn: Connection) -> None:
+    _add_column(conn, "responses", Column("idempotency_key", String(255), nullable=True))
+    _create_index(
+        conn, "responses", "uq_responses_survey_idempotency_key", ("survey_id", "idempotency_key"), unique=True
+    )
+
+
+def _m003_response_answers_doc(conn: Connection) -> None:
+    _add_column(
+        conn,
+        "responses",
+        Column("answers_doc", JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")),
+    )
+
+
+def _m004_response_delta_index(conn: Connection) -> None:
+    _create_index(conn, "responses", "ix_responses_survey_submitted_id", ("survey_id", "submitted_at", "id"))
+
+
+_m005_metadata = _step_metadata()
+_m005_survey_sketches_table = Table(
+    "survey_sketches", _m005_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False),
+    Column("question_id", String(36), nullable=False),
+    Column("kind", String(20), nullable=False),
+    Column("bucket", String(10), nullable=False),
+    Column("data", LargeBinary, nullable=False),
+    Index("uq_survey_sketches_key", "survey_id", "question_id", "kind", "bucket", unique=True),
+)
+
+
+def _m005_survey_sketches(conn: Connection) -> None:
+    _m005_survey_sketches_table.create(conn, checkfirst=True)
+
+
+def _m006_survey_deleted_at(conn: Connection) -> None:
+    _add_column(conn, "surveys", Column("deleted_at", DateTime(timezone=True), nullable=True))
+
+
+def _m007_order_indexes(conn: Connection) -> None:
+    _create_index(conn, "questions", "ix_questions_survey_order", ("survey_id", "order_index"))
+    _create_index(conn, "options", "ix_options_question_order", ("question_id", "order_index"))
+
+
+_m008_metadata = _step_metadata()
+_m008_jobs_table = Table(
+    "jobs", _m008_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("type", String(50), nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("params", JSON, nullable=False),
+    Column("progress", JSON, nullable=True),
+    Column("result", JSON, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("cancel_requested", Boolean, nullable=False),
+    Column("dedupe_key", String(255), nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("started_at", DateTime(timezone=True), nullable=True),
+    Column("finished_at", DateTime(timezone=True), nullable=True),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    Index("ix_jobs_status_created", "status", "created_at"),
+    Index("ix_jobs_dedupe_key", "dedupe_key"),
+)
+
+
+def _m008_jobs(conn: Connection) -> None:
+    _m008_jobs_table.create(conn, checkfirst=True)
+
+
+_m009_metadata = _step_metadata()
+_m009_drafts_table = Table(
+    "drafts", _m009_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False),
+    Column("resume_token", String(64), nullable=False, unique=True),
+    Column("respondent_id", String(255), nullable=True),
+    Column("metadata", JSON, nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("finalized_at", DateTime(timezone=True), nullable=True),
+    Column("response_id", String(36), nullable=True),
+    Index("ix_drafts_survey_created", "survey_id", "created_at"),
+)
+_m009_draft_events_table = Table(
+    "draft_events", _m009_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("draft_id", String(36), ForeignKey("drafts.id", ondelete="CASCADE"), nullable=False),
+    Column("seq", Integer, nullable=False),
+    Column("question_id", String(36), nullable=False),
+    Column("answers", JSON, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Index("ix_draft_events_draft_seq", "draft_id", "seq", "id"),
+)
+
+
+def _m009_drafts(conn: Connection) -> None:
+    _m009_drafts_table.create(conn, checkfirst=True)
+    _m009_draft_events_table.create(conn, checkfirst=True)
+
+
+def _m010_survey_archive(conn: Connection) -> None:
+    _add_column(conn, "surveys", Column("archived_before", DateTime(timezone=True), nullable=True))
+    _add_column(conn, "surveys", Column("archived_responses", Integer, nullable=True))
+
+
+_m011_metadata = _step_metadata()
+_m011_survey_sketch_deltas_table = Table(
+    "survey_sketch_deltas", _m011_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False),
+    Column("bucket", String(10), nullable=False),
+    Column("respondent_id", String(255), nullable=True),
+    Column("ratings", JSON, nullable=False),
+    Index("ix_survey_sketch_deltas_survey_bucket", "survey_id", "bucket"),
+)
+
+
+def _m011_sketch_deltas(conn: Connection) -> None:
+    _m011_survey_sketch_deltas_table.create(conn, checkfirst=True)
+
+
+def _m012_option_soft_delete(conn: Connection) -> None:
+    _add_column(conn, "options", Column("deleted_at", DateTime(timezone=True), nullable=True))
+
+
+def _m013_unique_active_job_dedupe(conn: Connection) -> None:
+    # Duplicates a racing submit may have left: keep the oldest active job of each key
+    conn.execute(text(
+        "UPDATE jobs SET status = 'cancelled', cancel_requested = :requested"
+        " WHERE status IN ('pending', 'running') AND dedupe_key IS NOT NULL AND EXISTS ("
+        "  SELECT 1 FROM jobs AS older WHERE older.dedupe_key = jobs.dedupe_key"
+        "  AND older.status IN ('pending', 'running')"
+        "  AND (older.created_at < jobs.created_at OR (older.created_at = jobs.created_at AND older.id < jobs.id)))"
+    ), {"requested": True})
+    _create_index(
+        conn, "jobs", "ux_jobs_active_dedupe_key", ("dedupe_key",), unique=True,
+        where="status IN ('pending', 'running')",
+    )
+
+
+_m014_metadata = _step_metadata()
+_m014_archived_response_keys_table = Table(
+    "archived_response_keys", _m014_metadata,
+    Column("survey_id", String(36), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True),
+    Column("idempotency_key", String(255), primary_key=True),
+    Column("response_id", String(36), nullable=False),
+)
+
+
+def _m014_archived_response_keys(conn: Connection) -> None:
+    _m014_archived_response_keys_table.create(conn, checkfirst=True)
+
+
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: list[Migration] = [
+    (1, "baseline", _m001_baseline),
+    (2, "response idempotency key", _m002_response_idempotency_key),
+    (3, "response answers document", _m003_response_answers_doc),
+    (4, "response delta sync index", _m004_response_delta_index),
+    (5, "survey sketches", _m005_survey_sketches),
+    (6, "survey soft delete", _m006_survey_deleted_at),
+    (7, "question/option order indexes", _m007_order_indexes),
+    (8, "background jobs", _m008_jobs),
+    (9, "response drafts", _m009_drafts),
+    (10, "survey response archive", _m010_survey_archive),
+    (11, "sketch deltas", _m011_sketch_deltas),
+    (12, "option soft delete", _m012_option_soft_delete),
+    (13, "unique active job dedupe key", _m013_unique_active_job_dedupe),
+    (14, "archived response keys", _m014_archived_response_keys),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------------------------------------------------------------------------
+# Shard migrations — append only; steps that change a sharded table go here too
+# ---------------------------------------------------------------------------
+
+# The sharded tables as they were when sharding was introduced.  Shards get no foreign keys:
+# surveys, questions and options live on the primary.
+_shard_baseline_metadata = MetaData()
+
+Table(
+    "responses", _shard_baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("survey_id", String(36), nullable=False, index=True),
+    Column("submitted_at", DateTime(timezone=True), nullable=False),
+    Column("respondent_id", String(255), nullable=True, index=True),
+    Column("metadata", JSON, nullable=True),
+    Column("idempotency_key", String(255), nullable=True),
+    Column("answers_doc", JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")),
+    Index("uq_responses_survey_idempotency_key", "survey_id", "idempotency_key", unique=True),
+    Index("ix_responses_survey_submitted_id", "survey_id", "submitted_at", "id"),
+)
+Table(
+    "answers", _shard_baseline_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("response_id", String(36), nullable=False, index=True),
+    Column("question_id", String(36), nullable=False, index=True),
+    Column("answer_text", Text, nullable=True),
+    Column("selected_option_id", String(36), nullable=True, index=True),
+    Column("value_json", JSON, nullable=True),
+)
+
+
+def _create_shard_tables(conn: Connection, tables) -> None:
+    """Create frozen table definitions on a shard, dropping their foreign keys."""
+    existing = set(inspect(conn).get_table_names())
+    for table in tables:
+        if table.name in existing:
+            continue
+        conn.execute(CreateTable(table, include_foreign_key_constraints=[]))
+        for index in table.indexes:
+            index.create(conn)
+
+
+def _s001_shard_baseline(conn: Connection) -> None:
+    _create_shard_tables(conn, (*_shard_baseline_metadata.sorted_tables, _m005_survey_sketches_table))
+
+
+def _s002_drafts(conn: Connection) -> None:
+    _create_shard_tables(conn, (_m009_drafts_table, _m009_draft_events_table))
+
+
+def _s003_sketch_deltas(conn: Connection) -> None:
+    _create_shard_tables(conn, (_m011_survey_sketch_deltas_table,))
+
+
+def _s004_archived_response_keys(conn: Connection) -> None:
+    _create_shard_tables(conn, (_m014_archived_response_keys_table,))
+
+
+SHARD_MIGRATIONS: list[Migration] = [
+    (1, "shard baseline", _s001_shard_baseline),
+    (2, "response drafts", _s002_drafts),
+    (3, "sketch deltas", _s003_sketch_deltas),
+    (4, "archived response keys", _s004_archived_response_keys),
+]
+
+LATEST_SHARD_VERSION = SHARD_MIGRATIONS[-1][0]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version)).scalar() or 0
+
+
+def migrate(bind: Engine = engine, steps: list[Migration] = MIGRATIONS) -> list[int]:
+    """Apply pending migrations in order. Returns the versions that were applied."""
+    applied: list[int] = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _PG_ADVISORY_LOCK_ID})
+        _version_metadata.create_all(bind=conn)
+        version = current_version(conn)
+        for number, description, step in steps:
+            if number <= version:
+                continue
+            logger.info("Applying migration %03d: %s", number, description)
+            step(conn)
+            applied.append(number)
+        if applied:
+            conn.execute(schema_version.delete())
+            conn.execute(schema_version.insert().values(version=applied[-1]))
+    return applied
+
+
+def check_schema() -> None:
+    """Raise a RuntimeError naming the fix if the primary or a shard is behind this code's migrations."""
+    targets = [("database", engine, LATEST_VERSION)]
+    targets += [(f"shard {i}", shard, LATEST_SHARD_VERSION) for i, shard in enumerate(shard_engines)]
+    for name, bind, latest in targets:
+        with bind.connect() as conn:
+            version = current_version(conn)
+        if version < latest:
+            raise RuntimeError(
+                f"The {name} schema is at version {version}, this code needs {latest}. "
+                "Run `python migrations.py` (or set AUTO_MIGRATE=1) before starting the app."
+            )
+
+
+def migrate_all() -> list[int]:
+    """Migrate the primary, then every response shard. Returns the versions applied to the primary."""
+    applied = migrate(engine)
+    for shard in shard_engines:
+        migrate(shard, SHARD_MIGRATIONS)
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="Print the current and latest version and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.status:
+        with engine.connect() as connection:
+            print(f"current={current_version(connection)} latest={LATEST_VERSION}")
+        for i, shard in enumerate(shard_engines):
+            with shard.connect() as connection:
+                print(f"shard {i}: current={current_version(connection)} latest={LATEST_SHARD_VERSION}")
+    else:
+        done = migrate_all()
+        print(f"Applied {len(done)} migration(s); schema at version {LATEST_VERSION}.")
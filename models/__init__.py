@@ -1,7 +1,10 @@
 from .survey import Survey
 from .question import Question
 from .option import Option
-from .response import Response
+from .response import ArchivedResponseKey, Response
 from .answer import Answer
+from .sketch import SurveySketch, SurveySketchDelta
+from .job import Job
+from .draft import Draft, DraftEvent
 
-__all__ = ["Survey", "Question", "Option", "Response", "Answer"]
+__all__ = ["Survey", "Question", "Option", "Response", "ArchivedResponseKey", "Answer", "SurveySketch", "SurveySketchDelta", "Job", "Draft", "DraftEvent"]
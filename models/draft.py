@@ -0,0 +1,62 @@
+"""Draft ORM models — partial responses saved while a respondent fills in a survey."""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String
+
+from database import Base
+
+
+def _generate_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Draft(Base):
+    __tablename__ = "drafts"
+
+    id = Column(String(36), primary_key=True, default=_generate_uuid)
+    survey_id = Column(String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    # Secret handed to the respondent; resumes the draft from any device
+    resume_token = Column(String(64), nullable=False, unique=True)
+    respondent_id = Column(String(255), nullable=True)
+    metadata_ = Column("metadata", JSON, nullable=True, default=dict)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+    # Set once the draft became a Response; its events are deleted then
+    finalized_at = Column(DateTime(timezone=True), nullable=True)
+    response_id = Column(String(36), nullable=True)
+
+    __table_args__ = (
+        Index("ix_drafts_survey_created", "survey_id", "created_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<Draft id={self.id} survey_id={self.survey_id}>"
+
+
+class DraftEvent(Base):
+    """
+    Append-only autosave log: each row is the full answer set of one question at one
+    point in time ([] clears it).  The latest row per question wins.
+    """
+
+    __tablename__ = "draft_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    draft_id = Column(String(36), ForeignKey("drafts.id", ondelete="CASCADE"), nullable=False)
+    # Optional client sequence number; orders retried or out-of-order patches
+    seq = Column(Integer, nullable=False, default=0)
+    question_id = Column(String(36), nullable=False)
+    answers = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_draft_events_draft_seq", "draft_id", "seq", "id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<DraftEvent draft_id={self.draft_id} question_id={self.question_id}>"
@@ -0,0 +1,53 @@
+"""Job ORM model — persisted state of background jobs run by services.job_service."""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, Column, DateTime, Index, JSON, String, Text, text
+
+from database import Base
+
+
+def _generate_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+JOB_STATUSES = ("pending", "running", "completed", "failed", "cancelled")
+
+# At most one pending/running job per dedupe_key (see job_service.submit)
+_ACTIVE = text("status IN ('pending', 'running')")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True, default=_generate_uuid)
+    type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    params = Column(JSON, nullable=False, default=dict)
+    # Handler-reported counters, e.g. {"processed": 2000}
+    progress = Column(JSON, nullable=True)
+    # Handler return value: summary counts and where the output lives (paths, ids)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # Set for jobs that must not run twice at once, e.g. "survey_purge:<survey_id>"
+    dedupe_key = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the heartbeat and every progress report; stale running jobs are requeued
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+        Index("ix_jobs_dedupe_key", "dedupe_key"),
+        Index("ux_jobs_active_dedupe_key", "dedupe_key", unique=True, sqlite_where=_ACTIVE, postgresql_where=_ACTIVE),
+    )
+
+    def __repr__(self) -> str:
+        return f"<Job id={self.id} type={self.type!r} status={self.status!r}>"
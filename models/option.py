@@ -2,7 +2,7 @@
 
 import uuid
 
-from sqlalchemy import Column, String, Integer, ForeignKey, Index
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -20,10 +20,16 @@ class Option(Base):
     label = Column(String(500), nullable=False, default="")
     value = Column(String(500), nullable=True, default="")
     order_index = Column(Integer, nullable=False, default=0)
+    # Set when an edit removes the option: hidden from the question, kept for past answers
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     question = relationship("Question", back_populates="options")
     selected_answers = relationship("Answer", back_populates="selected_option", lazy="noload")
 
+    __table_args__ = (
+        Index("ix_options_question_order", "question_id", "order_index"),
+    )
+
     def __repr__(self) -> str:
         return f"<Option id={self.id} label={self.label!r}>"
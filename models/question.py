@@ -25,14 +25,21 @@ class Question(Base):
 
     # Relationships
     survey = relationship("Survey", back_populates="questions")
+    # Live options only; removed ones stay in the table for the answers that picked them
     options = relationship(
         "Option",
         back_populates="question",
+        primaryjoin="and_(Question.id == Option.question_id, Option.deleted_at.is_(None))",
         cascade="all, delete-orphan",
-        order_by="Option.order_index",
+        order_by="[Option.order_index, Option.id]",
         lazy="selectin",
     )
     answers = relationship("Answer", back_populates="question", lazy="noload")
 
+    __table_args__ = (
+        # Sparse sort keys (see survey_service.ORDER_GAP); the id breaks ties
+        Index("ix_questions_survey_order", "survey_id", "order_index"),
+    )
+
     def __repr__(self) -> str:
         return f"<Question id={self.id} type={self.type!r}>"
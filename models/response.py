@@ -3,7 +3,8 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -17,6 +18,10 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Keys of a stored answer; document-mode entries omit the ones that are null.
+ANSWER_FIELDS = ("id", "question_id", "answer_text", "selected_option_id", "value_json")
+
+
 class Response(Base):
     __tablename__ = "responses"
 
@@ -25,6 +30,10 @@ class Response(Base):
     submitted_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
     respondent_id = Column(String(255), nullable=True, index=True)
     metadata_ = Column("metadata", JSON, nullable=True, default=dict)
+    # Client-supplied (or respondent-derived) key; retries with the same key return the original response
+    idempotency_key = Column(String(255), nullable=True)
+    # Document storage mode: all answers as one compact JSON array instead of `answers` rows
+    answers_doc = Column(JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"), nullable=True)
 
     # Relationships
     survey = relationship("Survey", back_populates="responses")
@@ -35,5 +44,32 @@ class Response(Base):
         lazy="selectin",
     )
 
+    __table_args__ = (
+        Index("uq_responses_survey_idempotency_key", "survey_id", "idempotency_key", unique=True),
+        # Keyset scans for delta sync: responses of a survey after a (submitted_at, id) cursor
+        Index("ix_responses_survey_submitted_id", "survey_id", "submitted_at", "id"),
+    )
+
+    def answer_records(self) -> list[dict]:
+        """Answers as plain dicts, whichever storage mode this response was written in."""
+        if self.answers_doc is not None:
+            return [{field: entry.get(field) for field in ANSWER_FIELDS} for entry in self.answers_doc]
+        return [{field: getattr(answer, field) for field in ANSWER_FIELDS} for answer in self.answers]
+
+    def __repr__(self) -> str:
+        return f"<Response id={self.id} survey_id={self.survey_id}>"
+
+class ArchivedResponseKey(Base):
+    """
+    Idempotency key of a response moved into the survey's archive (services.archive_service),
+    so a retry still replays that response instead of inserting a duplicate.
+    """
+
+    __tablename__ = "archived_response_keys"
+
+    survey_id = Column(String(36), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True)
+    idempotency_key = Column(String(255), primary_key=True)
+    response_id = Column(String(36), nullable=False)
+
     def __repr__(self) -> str:
-        return f"<Response id={self.id} survey_id={self.survey_id}>"
\ No newline at end of file
+        return f"<ArchivedResponseKey survey_id={self.survey_id} response_id={self.response_id}>"
@@ -0,0 +1,53 @@
+"""Survey sketch ORM model — persisted streaming sketches for rating and respondent stats."""
+
+import uuid
+
+from sqlalchemy import Column, Integer, JSON, String, LargeBinary, ForeignKey, Index
+
+from database import Base
+
+
+def _generate_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+class SurveySketch(Base):
+    __tablename__ = "survey_sketches"
+
+    id = Column(String(36), primary_key=True, default=_generate_uuid)
+    survey_id = Column(String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    # "" for survey-level sketches (unique respondents), else the rating question's id
+    question_id = Column(String(36), nullable=False, default="")
+    kind = Column(String(20), nullable=False)  # "tdigest" | "hll"
+    bucket = Column(String(10), nullable=False)  # UTC day, YYYY-MM-DD
+    data = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("uq_survey_sketches_key", "survey_id", "question_id", "kind", "bucket", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SurveySketch survey_id={self.survey_id} kind={self.kind!r} bucket={self.bucket}>"
+
+
+class SurveySketchDelta(Base):
+    """
+    One submitted response's contribution to the sketches, appended by the submit path
+    and folded into SurveySketch rows by the periodic "sketch_merge" job.
+    """
+
+    __tablename__ = "survey_sketch_deltas"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    survey_id = Column(String(36), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    bucket = Column(String(10), nullable=False)  # UTC day, YYYY-MM-DD
+    respondent_id = Column(String(255), nullable=True)
+    # [[question_id, value], ...] for every numeric answer; rating types are picked at merge time
+    ratings = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        Index("ix_survey_sketch_deltas_survey_bucket", "survey_id", "bucket"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SurveySketchDelta survey_id={self.survey_id} bucket={self.bucket}>"
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, Text, DateTime, JSON, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -28,13 +28,18 @@ class Survey(Base):
     metadata_ = Column("metadata", JSON, nullable=True, default=dict)
     created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow, nullable=False)
+    # Set when deletion is requested; the survey is hidden while its rows are purged in the background
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Responses submitted before this live in the survey's archive file (services.archive_service)
+    archived_before = Column(DateTime(timezone=True), nullable=True)
+    archived_responses = Column(Integer, nullable=True, default=0)
 
     # Relationships
     questions = relationship(
         "Question",
         back_populates="survey",
         cascade="all, delete-orphan",
-        order_by="Question.order_index",
+        order_by="[Question.order_index, Question.id]",
         lazy="selectin",
     )
     responses = relationship(
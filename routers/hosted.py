@@ -2,37 +2,142 @@
 Hosted survey router — public runtime endpoints for live surveys.
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import bind_survey_shard, engine, get_read_db, get_write_db
 from schemas.survey import SurveyResponse
+from schemas.draft import DraftCreate, DraftPatch, DraftResponse
 from schemas.response import SurveySubmitRequest, ResponseResponse
+from services import draft_service
 from services import survey_service
 from services import response_service
+from services import rate_limit
+from services import serialization
+from services import survey_bundles
 
 router = APIRouter(prefix="/s", tags=["hosted"])
 
 
 @router.get("/{share_token}", response_model=SurveyResponse)
-def get_hosted_survey(share_token: str, db: Session = Depends(get_db)):
+def get_hosted_survey(
+    share_token: str,
+    accept_encoding: str = Header(""),
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
     Load hosted survey for respondents.
     Returns full survey structure for rendering the live survey form.
+    With SURVEY_BUNDLE_DIR set, published surveys are served from their precompressed
+    static bundle without a database query.
     """
-    return survey_service.get_survey_by_token(db, share_token)
+    bundle = survey_bundles.find_bundle(share_token, accept_encoding)
+    stale = False
+    if bundle is not None and survey_bundles.needs_revalidation(share_token):
+        updated_at = survey_service.get_survey_version_by_token(db, share_token)
+        stale = not survey_bundles.revalidate(share_token, updated_at)
+        if stale:
+            bundle = None
+    if bundle is not None:
+        path, digest, encoding = bundle
+        headers = {"ETag": f'"{digest}"', "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if if_none_match and digest in if_none_match:
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return FileResponse(path, media_type="application/json", headers=headers)
+
+    survey = survey_service.get_survey_by_token(db, share_token)
+    if survey_bundles.BUNDLES_ENABLED and (stale or db.get_bind() is engine):
+        # First load since bundles were enabled. Replica data may lag behind an edit, so only
+        # publish from the primary; otherwise writes and `python -m services.survey_bundles` do.
+        # A stale pointer is replaced from either: versions only ever move it forward.
+        survey_bundles.publish_survey(survey)
+    if serialization.FAST_JSON:
+        return serialization.json_response(serialization.survey_dict(survey), SurveyResponse)
+    return survey
 
 
-@router.post("/{share_token}/submit", response_model=ResponseResponse, status_code=201)
-def submit_survey(share_token: str, data: SurveySubmitRequest, db: Session = Depends(get_db)):
+@router.post(
+    "/{share_token}/submit",
+    response_model=ResponseResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit.submit_admission)],
+)
+def submit_survey(
+    share_token: str,
+    data: SurveySubmitRequest,
+    idempotency_key: str | None = Header(None, max_length=255),
+    db: Session = Depends(get_write_db),
+):
     """
     Submit a survey response.
     Atomically persists all answers — no partial saves.
+    Retries carrying the same Idempotency-Key header (or respondent_id) return the original response.
     """
     survey = survey_service.get_survey_by_token(db, share_token)
-    response = response_service.submit_response(db, survey.id, data)
+    bind_survey_shard(db, survey.id)
+    response = response_service.submit_response(db, survey.id, data, idempotency_key=idempotency_key)
 
     # The response object from the service has the answers loaded.
     # We can convert it directly to the response model.
     return response
 
+
+# ---------------------------------------------------------------------------
+# Drafts — resumable partial responses
+# ---------------------------------------------------------------------------
+
+@router.post(
+    "/{share_token}/drafts",
+    response_model=DraftResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit.submit_admission)],
+)
+def create_draft(share_token: str, data: DraftCreate, db: Session = Depends(get_write_db)):
+    """
+    Start a draft response. Keep the returned resume_token: it autosaves and resumes
+    the draft (from any device) until it is finalized.
+    """
+    survey_id = survey_service.get_survey_id_by_token(db, share_token)
+    bind_survey_shard(db, survey_id)
+    return draft_service.create_draft(db, survey_id, data)
+
+
+@router.get("/{share_token}/drafts/{resume_token}", response_model=DraftResponse)
+def get_draft(share_token: str, resume_token: str, db: Session = Depends(get_read_db)):
+    """Resume a draft: its current answers, with later autosaves applied over earlier ones."""
+    survey_id = survey_service.get_survey_id_by_token(db, share_token)
+    bind_survey_shard(db, survey_id)
+    return draft_service.get_draft(db, survey_id, resume_token)
+
+
+@router.patch(
+    "/{share_token}/drafts/{resume_token}",
+    status_code=204,
+    dependencies=[Depends(rate_limit.autosave_admission)],
+)
+def patch_draft(share_token: str, resume_token: str, data: DraftPatch, db: Session = Depends(get_write_db)):
+    """
+    Autosave: send only the questions that changed.  Each question's answers replace
+    what was saved for it; `cleared` removes answers.  Appends to the draft log only.
+    """
+    survey_id = survey_service.get_survey_id_by_token(db, share_token)
+    bind_survey_shard(db, survey_id)
+    draft_service.patch_draft(db, survey_id, resume_token, data)
+    return Response(status_code=204)
+
+
+@router.post(
+    "/{share_token}/drafts/{resume_token}/finalize",
+    response_model=ResponseResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit.submit_admission)],
+)
+def finalize_draft(share_token: str, resume_token: str, db: Session = Depends(get_write_db)):
+    """Submit a draft as the survey response. Retrying returns the same response."""
+    survey_id = survey_service.get_survey_id_by_token(db, share_token)
+    bind_survey_shard(db, survey_id)
+    return draft_service.finalize_draft(db, survey_id, resume_token)
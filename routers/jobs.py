@@ -0,0 +1,35 @@
+"""
+Background job router — status polling and cancellation for services.job_service jobs.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database import get_read_db, get_write_db
+from schemas.job import JobResponse
+from services import job_service
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+
+@router.get("/jobs", response_model=list[JobResponse])
+def list_jobs(
+    type: str | None = None,
+    status: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+):
+    """Most recent jobs first, optionally filtered by type and status."""
+    return job_service.list_jobs(db, type, status, limit)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_read_db)):
+    """Status, progress counters, result (output location) and error of a job."""
+    return job_service.get_job(db, job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse, status_code=202)
+def cancel_job(job_id: str, db: Session = Depends(get_write_db)):
+    """Cancel a pending job, or ask a running one to stop at its next progress checkpoint."""
+    return job_service.cancel_job(db, job_id)
@@ -2,29 +2,176 @@
 Creator analytics router — response viewing endpoints.
 """
 
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from database import get_db
-from schemas.response import ResponseCountResponse, ResponseListResponse
-from services import response_service
+from database import get_survey_read_db, get_survey_write_db
+from schemas.response import (
+    ResponseArchiveRequest,
+    ResponseArchiveStatus,
+    ResponseCountResponse,
+    ResponseDeltaResponse,
+    ResponseImportStatus,
+    ResponseListResponse,
+)
+from schemas.job import JobResponse
+from schemas.stats import RatingQuantilesResponse, UniqueRespondentsResponse
+from services import (
+    archive_service,
+    import_service,
+    job_service,
+    response_service,
+    serialization,
+    stats_service,
+    survey_service,
+)
 
 router = APIRouter(prefix="/api", tags=["responses"])
 
 
 @router.get("/surveys/{survey_id}/responses/count", response_model=ResponseCountResponse)
-def get_response_count(survey_id: str, db: Session = Depends(get_db)):
+def get_response_count(survey_id: str, db: Session = Depends(get_survey_read_db)):
     """Get total response count for a survey — ideal for polling."""
     count = response_service.get_response_count(db, survey_id)
     return ResponseCountResponse(survey_id=survey_id, count=count)
 
 
 @router.get("/surveys/{survey_id}/responses", response_model=ResponseListResponse)
-def get_responses(survey_id: str, db: Session = Depends(get_db)):
+def get_responses(survey_id: str, db: Session = Depends(get_survey_read_db)):
     """Get all responses with enriched answer data for the creator dashboard."""
+    if serialization.FAST_JSON:
+        records = response_service.get_response_records(db, survey_id)
+        return serialization.json_response(
+            serialization.response_list_dict(survey_id, records), ResponseListResponse
+        )
     responses = response_service.get_responses(db, survey_id)
     return ResponseListResponse(
         survey_id=survey_id,
         total=len(responses),
         responses=responses,
     )
+
+
+@router.get("/surveys/{survey_id}/responses/delta", response_model=ResponseDeltaResponse)
+def get_responses_delta(
+    survey_id: str,
+    cursor: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_survey_read_db),
+):
+    """
+    Incremental dashboard sync: responses newer than an opaque cursor, oldest first.
+    Omit the cursor for the first page; keep passing back the returned cursor.
+    """
+    responses, next_cursor, has_more = response_service.get_responses_since(db, survey_id, cursor, limit)
+    if serialization.FAST_JSON:
+        payload = {
+            "survey_id": survey_id,
+            "responses": [serialization.response_dict(response) for response in responses],
+            "cursor": next_cursor,
+            "has_more": has_more,
+        }
+        return serialization.json_response(payload, ResponseDeltaResponse)
+    return ResponseDeltaResponse(
+        survey_id=survey_id,
+        responses=responses,
+        cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
+@router.get("/surveys/{survey_id}/questions/{question_id}/quantiles", response_model=RatingQuantilesResponse)
+def get_rating_quantiles(
+    survey_id: str,
+    question_id: str,
+    q: list[float] = Query([0.25, 0.5, 0.75], description="Quantiles to estimate, each in [0, 1]"),
+    since: date | None = None,
+    until: date | None = None,
+    db: Session = Depends(get_survey_read_db),
+):
+    """Approximate percentiles of a star_rating/slider question, from per-day t-digests."""
+    quantiles = [min(1.0, max(0.0, value)) for value in q]
+    return stats_service.rating_quantiles(db, survey_id, question_id, quantiles, since, until)
+
+
+@router.get("/surveys/{survey_id}/respondents/unique", response_model=UniqueRespondentsResponse)
+def get_unique_respondents(
+    survey_id: str,
+    since: date | None = None,
+    until: date | None = None,
+    db: Session = Depends(get_survey_read_db),
+):
+    """Approximate distinct respondent_id count, from per-day HyperLogLogs."""
+    return stats_service.unique_respondents(db, survey_id, since, until)
+
+
+@router.post("/surveys/{survey_id}/stats/rebuild", response_model=JobResponse, status_code=202)
+def rebuild_stats(survey_id: str, db: Session = Depends(get_survey_write_db)):
+    """Recompute the survey's rating/respondent sketches from its stored responses in a background job."""
+    survey_service.get_survey(db, survey_id)
+    return job_service.submit(db, "sketch_rebuild", {"survey_id": survey_id}, dedupe_key=f"sketch_rebuild:{survey_id}")
+
+
+@router.post("/surveys/{survey_id}/imports", response_model=ResponseImportStatus, status_code=202)
+async def start_response_import(
+    survey_id: str,
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_survey_write_db),
+):
+    """
+    Bulk import historical responses. The request body is the raw CSV or NDJSON file;
+    it is streamed to disk and loaded by a background job. Poll the returned import for progress.
+    """
+    await run_in_threadpool(survey_service.get_survey, db, survey_id)
+    checkpoint = await import_service.store_upload(survey_id, request.stream(), format)
+    job = await run_in_threadpool(_submit_import, db, checkpoint["import_id"])
+    return {**checkpoint, "job_id": job.id}
+
+
+@router.get("/surveys/{survey_id}/imports/{import_id}", response_model=ResponseImportStatus)
+def get_response_import(survey_id: str, import_id: str):
+    """Import progress: rows imported/rejected so far, and where the error report is written."""
+    return import_service.get_import(import_id, survey_id)
+
+
+@router.post("/surveys/{survey_id}/imports/{import_id}/resume", response_model=ResponseImportStatus, status_code=202)
+def resume_response_import(survey_id: str, import_id: str, db: Session = Depends(get_survey_write_db)):
+    """Continue a failed or interrupted import from its last committed batch."""
+    checkpoint = import_service.get_import(import_id, survey_id)
+    job = _submit_import(db, import_id)
+    return {**checkpoint, "job_id": job.id}
+
+
+def _submit_import(db: Session, import_id: str):
+    return job_service.submit(db, "response_import", {"import_id": import_id}, dedupe_key=f"response_import:{import_id}")
+
+
+@router.get("/surveys/{survey_id}/archive", response_model=ResponseArchiveStatus)
+def get_response_archive(survey_id: str, db: Session = Depends(get_survey_read_db)):
+    """Archive cutoff, how many responses are archived, and the archive file size."""
+    return archive_service.archive_status(db, survey_id)
+
+
+@router.post("/surveys/{survey_id}/archive", response_model=JobResponse, status_code=202)
+def archive_responses(survey_id: str, data: ResponseArchiveRequest, db: Session = Depends(get_survey_write_db)):
+    """
+    Move responses submitted before `before` out of the database into the survey's
+    compressed archive file, in a background job. They stay readable through every
+    response endpoint. One archive or restore job runs per survey at a time.
+    """
+    survey_service.get_survey(db, survey_id)
+    params = {"survey_id": survey_id, "before": data.before.isoformat()}
+    return job_service.submit(db, "survey_archive", params, dedupe_key=f"survey_archive:{survey_id}")
+
+
+@router.post("/surveys/{survey_id}/archive/restore", response_model=JobResponse, status_code=202)
+def restore_responses(survey_id: str, db: Session = Depends(get_survey_write_db)):
+    """Move every archived response back into the database, in a background job."""
+    survey_service.get_survey(db, survey_id)
+    return job_service.submit(db, "survey_restore", {"survey_id": survey_id}, dedupe_key=f"survey_archive:{survey_id}")
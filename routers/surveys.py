@@ -5,16 +5,25 @@ Survey and Question API routers.
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_read_db, get_survey_read_db, get_survey_write_db, get_write_db
 from schemas.survey import (
     SurveyCreate,
     SurveyUpdate,
     SurveyResponse,
     SurveyListResponse,
     SurveyShareResponse,
+    SurveyDeletionResponse,
 )
-from schemas.question import QuestionCreate, QuestionUpdate, QuestionResponse
-from services import survey_service
+from schemas.question import (
+    QuestionCreate,
+    QuestionUpdate,
+    QuestionResponse,
+    QuestionReclassifyRequest,
+    QuestionReclassifyStatus,
+    QuestionMove,
+)
+from schemas.option import OptionMove, OptionResponse
+from services import deletion_service, job_service, reclassify_service, serialization, survey_service
 
 router = APIRouter(prefix="/api", tags=["surveys"])
 
@@ -24,50 +33,64 @@ router = APIRouter(prefix="/api", tags=["surveys"])
 # ---------------------------------------------------------------------------
 
 @router.post("/surveys", response_model=SurveyResponse, status_code=201)
-def create_survey(data: SurveyCreate, db: Session = Depends(get_db)):
+def create_survey(data: SurveyCreate, db: Session = Depends(get_write_db)):
     """Create a new survey container."""
     return survey_service.create_survey(db, data)
 
 
 @router.get("/surveys", response_model=list[SurveyListResponse])
-def list_surveys(db: Session = Depends(get_db)):
+def list_surveys(db: Session = Depends(get_read_db)):
     """List all surveys (most recent first)."""
     return survey_service.list_surveys(db)
 
 
 @router.get("/surveys/{survey_id}", response_model=SurveyResponse)
-def get_survey(survey_id: str, db: Session = Depends(get_db)):
+def get_survey(survey_id: str, db: Session = Depends(get_read_db)):
     """Get full survey with all questions and options."""
-    return survey_service.get_survey(db, survey_id)
+    survey = survey_service.get_survey(db, survey_id)
+    if serialization.FAST_JSON:
+        return serialization.json_response(serialization.survey_dict(survey), SurveyResponse)
+    return survey
 
 
 @router.patch("/surveys/{survey_id}", response_model=SurveyResponse)
-def update_survey(survey_id: str, data: SurveyUpdate, db: Session = Depends(get_db)):
+def update_survey(survey_id: str, data: SurveyUpdate, db: Session = Depends(get_write_db)):
     """Update survey metadata (title, description, settings)."""
     return survey_service.update_survey(db, survey_id, data)
 
 
-@router.delete("/surveys/{survey_id}", status_code=204)
-def delete_survey(survey_id: str, db: Session = Depends(get_db)):
-    """Delete a survey and all its questions/options."""
+@router.delete("/surveys/{survey_id}", response_model=SurveyDeletionResponse, status_code=202)
+def delete_survey(survey_id: str, db: Session = Depends(get_survey_write_db)):
+    """
+    Delete a survey and all its questions, options and responses.
+    The survey disappears immediately; its rows are purged by a background job.
+    """
     survey_service.delete_survey(db, survey_id)
+    job = job_service.submit(db, "survey_purge", {"survey_id": survey_id}, dedupe_key=f"survey_purge:{survey_id}")
+    return {**deletion_service.deletion_status(db, survey_id), "job_id": job.id}
+
+
+@router.get("/surveys/{survey_id}/deletion", response_model=SurveyDeletionResponse)
+def get_deletion_status(survey_id: str, db: Session = Depends(get_survey_read_db)):
+    """Progress of a survey deletion."""
+    return deletion_service.deletion_status(db, survey_id)
 
 
 @router.post("/surveys/{survey_id}/share", response_model=SurveyShareResponse)
-def share_survey(survey_id: str, db: Session = Depends(get_db)):
+def share_survey(survey_id: str, db: Session = Depends(get_write_db)):
     """Generate (or return existing) shareable link for a survey."""
     token, url = survey_service.generate_share_token(db, survey_id)
     return SurveyShareResponse(share_token=token, share_url=url)
 
 
 @router.post("/surveys/{survey_id}/generate-link")
-def generate_collector_link(survey_id: str, db: Session = Depends(get_db)):
+def generate_collector_link(survey_id: str, db: Session = Depends(get_survey_write_db)):
     """Generate a web link collector for the survey."""
     return survey_service.generate_collector_link(db, survey_id)
 
 
 @router.get("/surveys/{survey_id}/collectors")
-def get_collectors(survey_id: str, db: Session = Depends(get_db)):
+def get_collectors(survey_id: str, db: Session = Depends(get_survey_read_db)):
     """Get all collectors for a survey with live response counts."""
     return survey_service.get_collectors(db, survey_id)
 
@@ -77,18 +100,58 @@ def get_collectors(survey_id: str, db: Session = Depends(get_db)):
 # ---------------------------------------------------------------------------
 
 @router.post("/surveys/{survey_id}/questions", response_model=QuestionResponse, status_code=201)
-def add_question(survey_id: str, data: QuestionCreate, db: Session = Depends(get_db)):
+def add_question(survey_id: str, data: QuestionCreate, db: Session = Depends(get_write_db)):
     """Add a question to a survey."""
     return survey_service.add_question(db, survey_id, data)
 
 
+@router.post("/questions/reclassify", response_model=QuestionReclassifyStatus, status_code=202)
+def start_reclassify(data: QuestionReclassifyRequest | None = None, db: Session = Depends(get_write_db)):
+    """
+    Score every question title in the catalog with Answer genius in a background job.
+    Results (ranked types with scores, and whether the stored type disagrees) are
+    streamed to an NDJSON file; poll the returned run (or job) for progress.
+    """
+    state = reclassify_service.create_run(data.only_mismatches if data else False)
+    job = job_service.submit(db, "question_reclassify", {"run_id": state["run_id"]})
+    return {**state, "job_id": job.id}
+
+
+@router.get("/questions/reclassify/{run_id}", response_model=QuestionReclassifyStatus)
+def get_reclassify(run_id: str):
+    """Progress of a reclassification run and where its results are written."""
+    return reclassify_service.get_run(run_id)
+
+
 @router.put("/questions/{question_id}", response_model=QuestionResponse)
-def update_question(question_id: str, data: QuestionUpdate, db: Session = Depends(get_db)):
-    """Update a question (and optionally replace its options)."""
+def update_question(question_id: str, data: QuestionUpdate, db: Session = Depends(get_write_db)):
+    """Update a question (and optionally its option list, edited in place)."""
     return survey_service.update_question(db, question_id, data)
 
 
+@router.post("/questions/{question_id}/move", response_model=QuestionResponse)
+def move_question(question_id: str, data: QuestionMove, db: Session = Depends(get_write_db)):
+    """Move a question right after another one (or first). Only the moved question is rewritten."""
+    question, renumber_soon = survey_service.move_question(db, question_id, data.after_id)
+    if renumber_soon:
+        _schedule_renumber(db, question.survey_id)
+    return question
+
+
+@router.post("/options/{option_id}/move", response_model=OptionResponse)
+def move_option(option_id: str, data: OptionMove, db: Session = Depends(get_write_db)):
+    """Move an option right after another option of the same question (or first)."""
+    option, renumber_soon = survey_service.move_option(db, option_id, data.after_id)
+    if renumber_soon:
+        _schedule_renumber(db, option.question.survey_id)
+    return option
+
+
+def _schedule_renumber(db: Session, survey_id: str) -> None:
+    job_service.submit(db, "survey_renumber", {"survey_id": survey_id}, dedupe_key=f"survey_renumber:{survey_id}")
+
+
 @router.delete("/questions/{question_id}", status_code=204)
-def delete_question(question_id: str, db: Session = Depends(get_db)):
+def delete_question(question_id: str, db: Session = Depends(get_write_db)):
     """Delete a question and all its options."""
     survey_service.delete_question(db, question_id)
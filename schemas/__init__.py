@@ -1,2 +1,2 @@
 """Pydantic schemas."""
-from . import answer, option, question, response, survey
\ No newline at end of file
+from . import answer, draft, job, option, question, response, stats, survey
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Pydantic schemas for response drafts (resumable partial responses).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from .answer import AnswerCreate
+from .response import ResponseBase
+
+
+class DraftCreate(ResponseBase):
+    pass
+
+
+class DraftPatch(BaseModel):
+    seq: Optional[int] = Field(
+        None, description="Client sequence number; a later seq wins over an earlier one arriving late"
+    )
+    answers: List[AnswerCreate] = Field(
+        default_factory=list, description="New answers; replace everything saved for their questions"
+    )
+    cleared: List[str] = Field(default_factory=list, description="Question ids whose answers are removed")
+
+
+class DraftResponse(ResponseBase):
+    resume_token: str
+    survey_id: str
+    created_at: datetime
+    updated_at: datetime
+    finalized_at: Optional[datetime] = None
+    response_id: Optional[str] = None
+    answers: List[AnswerCreate]
@@ -0,0 +1,23 @@
+"""Background job Pydantic schemas."""
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str = Field(..., description="pending, running, completed, failed or cancelled")
+    params: dict[str, Any]
+    progress: dict[str, Any] | None = None
+    result: dict[str, Any] | None = Field(None, description="Summary and output location, once completed")
+    error: str | None = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
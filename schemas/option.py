@@ -4,9 +4,14 @@ from pydantic import BaseModel, Field
 
 
 class OptionCreate(BaseModel):
+    id: str | None = Field(None, description="Existing option to update in place (question edits only)")
     label: str = Field(..., min_length=1, max_length=500, description="Display label for this option")
     value: str | None = Field(None, max_length=500, description="Optional machine-readable value")
-    order_index: int | None = Field(None, ge=0, description="Position within the question; auto-assigned if omitted")
+    order_index: int | None = Field(None, ge=0, description="Sort key within the question; auto-assigned (sparse) if omitted")
+
+
+class OptionMove(BaseModel):
+    after_id: str | None = Field(None, description="Place the option right after this one; null moves it first")
 
 
 class OptionResponse(BaseModel):
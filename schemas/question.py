@@ -10,7 +10,7 @@ class QuestionCreate(BaseModel):
     title: str = Field(..., min_length=1, description="Question text displayed to respondent")
     description: str | None = Field(None, description="Optional secondary description or help text")
     required: bool = Field(False, description="Whether an answer is required")
-    order_index: int | None = Field(None, ge=0, description="Position within the survey; auto-assigned if omitted")
+    order_index: int | None = Field(None, ge=0, description="Sort key within the survey; auto-assigned (sparse) if omitted")
     options: list[OptionCreate] = Field(default_factory=list, description="Answer options (for MCQ, checkbox, dropdown types)")
 
 
@@ -20,7 +20,14 @@ class QuestionUpdate(BaseModel):
     description: str | None = None
     required: bool | None = None
     order_index: int | None = None
-    options: list[OptionCreate] | None = Field(None, description="If provided, replaces all existing options")
+    options: list[OptionCreate] | None = Field(
+        None,
+        description="If provided, becomes the option list; existing options are kept (same id) by label, then by position",
+    )
+
+
+class QuestionMove(BaseModel):
+    after_id: str | None = Field(None, description="Place the question right after this one; null moves it first")
 
 
 class QuestionResponse(BaseModel):
@@ -34,3 +41,22 @@ class QuestionResponse(BaseModel):
     options: list[OptionResponse] = []
 
     model_config = {"from_attributes": True}
+
+
+class QuestionReclassifyRequest(BaseModel):
+    only_mismatches: bool = Field(False, description="Only write questions whose stored type disagrees with the prediction")
+
+
+class QuestionReclassifyStatus(BaseModel):
+    run_id: str
+    status: str
+    only_mismatches: bool
+    processed: int
+    matched: int
+    mismatches: int
+    written: int
+    error: str | None = None
+    started_at: str
+    finished_at: str | None = None
+    results_path: str
+    job_id: str | None = Field(None, description="Background job doing the work; poll /api/jobs/{job_id}")
@@ -2,8 +2,8 @@
 Pydantic schemas for Responses.
 """
 
-from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from datetime import datetime, timezone
 from typing import Optional, List
 
 from .answer import AnswerResponse, AnswerCreate
@@ -29,6 +29,20 @@ class ResponseResponse(ResponseBase):
     submitted_at: datetime
     answers: List[AnswerResponse]
 
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_answers_doc(cls, data):
+        # Document-mode responses keep answers in Response.answers_doc rather than `answers` rows.
+        if getattr(data, "answers_doc", None) is None:
+            return data
+        return {
+            "id": data.id,
+            "respondent_id": data.respondent_id,
+            "metadata_": data.metadata_,
+            "submitted_at": data.submitted_at,
+            "answers": data.answer_records(),
+        }
+
 
 class ResponseCountResponse(BaseModel):
     survey_id: str
@@ -39,3 +53,42 @@ class ResponseListResponse(BaseModel):
     survey_id: str
     total: int
     responses: List[ResponseResponse]
+
+
+class ResponseImportStatus(BaseModel):
+    import_id: str
+    survey_id: str
+    format: str
+    status: str
+    line: int
+    imported: int
+    rejected: int
+    error: Optional[str] = None
+    errors_path: str
+    job_id: Optional[str] = None  # background job doing the work; poll /api/jobs/{job_id}
+
+
+class ResponseDeltaResponse(BaseModel):
+    survey_id: str
+    responses: List[ResponseResponse]
+    cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class ResponseArchiveRequest(BaseModel):
+    before: datetime  # responses submitted before this move to the archive (naive = UTC)
+
+    @field_validator("before")
+    @classmethod
+    def _not_in_future(cls, value: datetime) -> datetime:
+        # A future cutoff would sweep up responses still arriving, and delta cursors rely on it being past
+        if (value if value.tzinfo else value.replace(tzinfo=timezone.utc)) > datetime.now(timezone.utc):
+            raise ValueError("before must not be in the future")
+        return value
+
+
+class ResponseArchiveStatus(BaseModel):
+    survey_id: str
+    archived_before: Optional[datetime] = None
+    archived_responses: int
+    archive_bytes: int
@@ -0,0 +1,17 @@
+"""Pydantic schemas for sketch-backed survey statistics."""
+
+from pydantic import BaseModel
+
+
+class RatingQuantilesResponse(BaseModel):
+    survey_id: str
+    question_id: str
+    count: int
+    min: float | None
+    max: float | None
+    quantiles: dict[str, float | None]
+
+
+class UniqueRespondentsResponse(BaseModel):
+    survey_id: str
+    unique_respondents: int
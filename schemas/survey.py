@@ -47,3 +47,10 @@ class SurveyListResponse(BaseModel):
 class SurveyShareResponse(BaseModel):
     share_token: str
     share_url: str
+
+
+class SurveyDeletionResponse(BaseModel):
+    survey_id: str
+    status: str = Field(..., description="active, deleting or deleted")
+    remaining_responses: int | None = None
+    job_id: str | None = Field(None, description="Background job doing the work; poll /api/jobs/{job_id}")
@@ -0,0 +1,563 @@
+"""
+Archive service — moves old responses out of the hot tables into per-survey files.
+
+archive_survey writes every response of a survey submitted before a cutoff (with its
+answers) to a new gzip-compressed columnar segment, then deletes those rows:
+
+    ARCHIVE_DIR/<survey_id>/<segment>.json.gz
+    {"version": 1, "survey_id", "archived_before",
+     "responses": {"id": [...], "submitted_at": [...], "respondent_id": [...], "metadata": [...],
+                   "idempotency_key": [...], "document": [...]},
+     "answers":   {"response": [...row index in responses...], "id": [...], "question_id": [...],
+                   "answer_text": [...], "selected_option_id": [...], "value_json": [...]}}
+
+Segments are immutable: archiving again appends one, never reading or rewriting the
+earlier ones (a file of the older layout, ARCHIVE_DIR/<survey_id>.json.gz, is read as the
+first segment).  Readers (response_service, stats_service.rebuild_sketches) add archived
+responses to the hot ones; a response present in both (a run interrupted between writing
+its segment and deleting the rows) is taken from the hot table, and from the first segment
+holding it.  Survey.archived_responses counts the archived responses no longer in the hot
+tables, so counts stay cheap and readers skip the files while it is 0; it moves with each
+chunk of deletes (or restoring inserts), in the same commit.  So do the archived responses'
+idempotency keys (ArchivedResponseKey), which keep retries of an archived submission
+replaying it.  restore_survey puts everything back into the hot tables and removes the files.
+Both run as jobs ("survey_archive", "survey_restore") and can be re-run after a crash.
+"""
+
+import bisect
+import contextlib
+import gzip
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from database import bind_survey_shard
+from models.answer import Answer
+from models.response import ANSWER_FIELDS, ArchivedResponseKey, Response
+from models.survey import Survey
+from services import serialization
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "1000"))
+# Decoded archives kept in memory, so dashboard polling does not re-read the segments.
+ARCHIVE_CACHE_SIZE = int(os.getenv("ARCHIVE_CACHE_SIZE", "8"))
+
+ARCHIVE_VERSION = 1
+_RESPONSE_COLUMNS = ("id", "submitted_at", "respondent_id", "metadata", "idempotency_key", "document")
+_ANSWER_COLUMNS = ("response", *ANSWER_FIELDS)
+
+
+def archive_path(survey_id: str) -> str:
+    """Directory holding the survey's archive segments."""
+    return os.path.join(ARCHIVE_DIR, survey_id)
+
+
+def _legacy_path(survey_id: str) -> str:
+    # Single-file archive written before segments; read as the first segment
+    return os.path.join(ARCHIVE_DIR, f"{survey_id}.json.gz")
+
+
+def _segment_paths(survey_id: str) -> list[str]:
+    """The survey's segments, oldest first."""
+    paths = [_legacy_path(survey_id)] if os.path.exists(_legacy_path(survey_id)) else []
+    directory = archive_path(survey_id)
+    with contextlib.suppress(FileNotFoundError):
+        paths += [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".json.gz") and not name.startswith(".")
+        ]
+    return paths
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _empty_archive(survey_id: str) -> dict:
+    return {
+        "version": ARCHIVE_VERSION,
+        "survey_id": survey_id,
+        "archived_before": None,
+        "responses": {column: [] for column in _RESPONSE_COLUMNS},
+        "answers": {column: [] for column in _ANSWER_COLUMNS},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+# (sorted (submitted_at, id) keys, row of each key, answer positions of each row)
+_Index = tuple[list[tuple[datetime, str]], list[int], list[list[int]]]
+
+
+def _build_index(archive: dict) -> _Index:
+    """Keyset order of an archive's responses, so cursor reads can bisect instead of scanning."""
+    responses = archive["responses"]
+    keyed = sorted(
+        ((as_utc(datetime.fromisoformat(submitted_at)), response_id), row)
+        for row, (submitted_at, response_id) in enumerate(zip(responses["submitted_at"], responses["id"]))
+    )
+    answers_at: list[list[int]] = [[] for _ in responses["id"]]
+    for index, row in enumerate(archive["answers"]["response"]):
+        answers_at[row].append(index)
+    return [key for key, _ in keyed], [row for _, row in keyed], answers_at
+
+
+def _merge_segments(survey_id: str, segments: list[dict]) -> dict:
+    """One archive of all segments; a response in several of them is kept from the first."""
+    if len(segments) == 1:
+        return segments[0]
+    archive = _empty_archive(survey_id)
+    responses, answers = archive["responses"], archive["answers"]
+    seen: set[str] = set()
+    for segment in segments:
+        moved: dict[int, int] = {}
+        for row, response_id in enumerate(segment["responses"]["id"]):
+            if response_id in seen:
+                continue
+            seen.add(response_id)
+            moved[row] = len(responses["id"])
+            for column in _RESPONSE_COLUMNS:
+                responses[column].append(segment["responses"][column][row])
+        for index, row in enumerate(segment["answers"]["response"]):
+            if row in moved:
+                answers["response"].append(moved[row])
+                for field in ANSWER_FIELDS:
+                    answers[field].append(segment["answers"][field][index])
+        cutoff = segment["archived_before"]
+        latest = archive["archived_before"]
+        if cutoff and (latest is None or datetime.fromisoformat(cutoff) > datetime.fromisoformat(latest)):
+            archive["archived_before"] = cutoff
+    return archive
+
+
+class _ArchiveCache:
+    """Small thread-safe LRU of decoded archives and their index, keyed by survey and invalidated by its segment list."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, tuple[tuple, tuple[dict, _Index]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, survey_id: str, stamp: tuple) -> tuple[dict, _Index] | None:
+        with self._lock:
+            item = self._items.get(survey_id)
+            if item is None or item[0] != stamp:
+                return None
+            self._items.move_to_end(survey_id)
+            return item[1]
+
+    def put(self, survey_id: str, stamp: tuple, entry: tuple[dict, _Index]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[survey_id] = (stamp, entry)
+            self._items.move_to_end(survey_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def discard(self, survey_id: str) -> None:
+        with self._lock:
+            self._items.pop(survey_id, None)
+
+
+_cache = _ArchiveCache(ARCHIVE_CACHE_SIZE)
+
+
+def _read_indexed(survey_id: str) -> tuple[dict, _Index] | None:
+    paths = _segment_paths(survey_id)
+    if not paths:
+        return None
+    stamp = tuple(paths)  # segments never change once written, so their names identify the content
+    entry = _cache.get(survey_id, stamp)
+    if entry is None:
+        segments = []
+        for path in paths:
+            with gzip.open(path, "rb") as f:
+                segments.append(json.loads(f.read()))
+        archive = _merge_segments(survey_id, segments)
+        entry = (archive, _build_index(archive))
+        _cache.put(survey_id, stamp, entry)
+    return entry
+
+
+def read_archive(survey_id: str) -> dict | None:
+    """The survey's decoded archive (all segments), or None if it has none. Treat the result as read-only."""
+    entry = _read_indexed(survey_id)
+    return entry[0] if entry is not None else None
+
+
+def _write_segment(survey_id: str, segment: dict) -> str:
+    directory = archive_path(survey_id)
+    os.makedirs(directory, exist_ok=True)
+    # Names sort by creation time; the random part keeps concurrent runs apart
+    path = os.path.join(directory, f"{time.time_ns():020d}-{secrets.token_hex(4)}.json.gz")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(gzip.compress(serialization.dumps(segment), compresslevel=6))
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def remove_archive(survey_id: str) -> None:
+    _cache.discard(survey_id)
+    shutil.rmtree(archive_path(survey_id), ignore_errors=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_legacy_path(survey_id))
+
+
+def _row_answers(archive: dict, positions: list[int]) -> list[dict]:
+    answers = archive["answers"]
+    return [{field: answers[field][index] for field in ANSWER_FIELDS} for index in positions]
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def archived_records(
+    survey_id: str,
+    exclude_ids: set[str] | frozenset = frozenset(),
+    after: tuple[datetime, str] | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Archived responses as plain dicts with ResponseResponse keys (answers keyed like
+    AnswerResponse), oldest first, skipping ids in exclude_ids and, with `after`,
+    everything up to that (submitted_at, id) keyset position; at most `limit` of them.
+    """
+    entry = _read_indexed(survey_id)
+    if entry is None:
+        return []
+    archive, (keys, rows, answers_at) = entry
+    start = 0
+    if after is not None:
+        after = (as_utc(after[0]), after[1])
+        if archive["archived_before"] and after[0] >= datetime.fromisoformat(archive["archived_before"]):
+            return []  # every archived response is older than the cutoff
+        start = bisect.bisect_right(keys, after)
+    responses = archive["responses"]
+    records = []
+    for position in range(start, len(keys)):
+        if limit is not None and len(records) >= limit:
+            break
+        (submitted_at, response_id), row = keys[position], rows[position]
+        if response_id in exclude_ids:
+            continue
+        records.append({
+            "respondent_id": responses["respondent_id"][row],
+            "metadata_": responses["metadata"][row],
+            "id": response_id,
+            "submitted_at": submitted_at,
+            "answers": _row_answers(archive, answers_at[row]),
+        })
+    return records
+
+
+def archived_responses(
+    survey_id: str,
+    exclude_ids: set[str] | frozenset = frozenset(),
+    after: tuple[datetime, str] | None = None,
+    limit: int | None = None,
+) -> list[Response]:
+    """
+    Archived responses as transient Response objects (never added to a session), with
+    their answers in answers_doc so Response.answer_records and the schemas work unchanged.
+    """
+    return [_transient_response(survey_id, record) for record in archived_records(survey_id, exclude_ids, after, limit)]
+
+
+def _transient_response(survey_id: str, record: dict) -> Response:
+    return Response(
+        id=record["id"],
+        survey_id=survey_id,
+        submitted_at=record["submitted_at"],
+        respondent_id=record["respondent_id"],
+        metadata_=record["metadata_"],
+        answers_doc=record["answers"],
+    )
+
+
+def archived_response(db: Session, survey_id: str, idempotency_key: str) -> Response | None:
+    """The archived response stored under an idempotency key, as a transient Response, or None."""
+    response_id = db.execute(
+        select(ArchivedResponseKey.response_id).where(
+            ArchivedResponseKey.survey_id == survey_id, ArchivedResponseKey.idempotency_key == idempotency_key
+        )
+    ).scalar()
+    entry = _read_indexed(survey_id) if response_id is not None else None
+    if entry is None:
+        return None
+    archive, (_, _, answers_at) = entry
+    responses = archive["responses"]
+    try:
+        row = responses["id"].index(response_id)
+    except ValueError:
+        return None
+    return _transient_response(survey_id, {
+        "id": response_id,
+        "submitted_at": as_utc(datetime.fromisoformat(responses["submitted_at"][row])),
+        "respondent_id": responses["respondent_id"][row],
+        "metadata_": responses["metadata"][row],
+        "answers": _row_answers(archive, answers_at[row]),
+    })
+
+
+def archived_count(db: Session, survey_id: str) -> int:
+    """Archived responses not in the hot tables; while it is 0 readers need not open the files."""
+    return db.execute(select(Survey.archived_responses).where(Survey.id == survey_id)).scalar() or 0
+
+
+def archive_status(db: Session, survey_id: str) -> dict:
+    survey = db.get(Survey, survey_id)
+    if survey is None or survey.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
+    return {
+        "survey_id": survey_id,
+        "archived_before": survey.archived_before,
+        "archived_responses": survey.archived_responses or 0,
+        "archive_bytes": sum(os.path.getsize(path) for path in _segment_paths(survey_id)),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Archive / restore
+# ---------------------------------------------------------------------------
+
+def archive_survey(
+    db: Session,
+    survey_id: str,
+    before: datetime,
+    chunk_size: int = ARCHIVE_CHUNK_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> int:
+    """
+    Move the survey's responses submitted before `before` into a new archive segment.
+    Returns the number of responses archived by this call.
+    """
+    bind_survey_shard(db, survey_id)
+    before = as_utc(before)
+    segment = _empty_archive(survey_id)
+    segment["archived_before"] = before.isoformat()
+    responses, answers = segment["responses"], segment["answers"]
+
+    query = (
+        select(Response)
+        .where(Response.survey_id == survey_id, Response.submitted_at < before)
+        .order_by(Response.submitted_at, Response.id)
+        .options(selectinload(Response.answers).lazyload(Answer.question))
+        .options(selectinload(Response.answers).lazyload(Answer.selected_option))
+        .execution_options(yield_per=chunk_size)
+    )
+    added = 0
+    for partition in db.execute(query).scalars().partitions():
+        for response in partition:
+            # Rows an interrupted run already wrote to a segment are written again; readers keep the first copy
+            row = len(responses["id"])
+            responses["id"].append(response.id)
+            responses["submitted_at"].append(as_utc(response.submitted_at).isoformat())
+            responses["respondent_id"].append(response.respondent_id)
+            responses["metadata"].append(response.metadata_)
+            responses["idempotency_key"].append(response.idempotency_key)
+            responses["document"].append(response.answers_doc is not None)
+            for record in response.answer_records():
+                answers["response"].append(row)
+                for field in ANSWER_FIELDS:
+                    answers[field].append(record[field])
+            added += 1
+    db.rollback()  # end the read transaction (and drop the loaded rows) before writing
+
+    if added:
+        _write_segment(survey_id, segment)
+    previous = db.execute(select(Survey.archived_before).where(Survey.id == survey_id)).scalar()
+    if previous is None or as_utc(previous) < before:
+        db.execute(update(Survey).where(Survey.id == survey_id).values(archived_before=before))
+    db.commit()
+
+    # The segment is complete: drop its rows from the hot tables, a chunk per transaction.
+    # The counter only grows by rows actually deleted, with them, so counts never see a row twice;
+    # idempotency keys move to archived_response_keys in the same commit.
+    archived_ids = responses["id"]
+    for start in range(0, len(archived_ids), chunk_size):
+        chunk = archived_ids[start:start + chunk_size]
+        _archive_keys(db, survey_id, chunk)
+        db.execute(delete(Answer).where(Answer.response_id.in_(chunk)))
+        deleted = db.execute(
+            delete(Response).where(Response.id.in_(chunk), Response.survey_id == survey_id)
+        ).rowcount
+        if deleted:
+            db.execute(
+                update(Survey)
+                .where(Survey.id == survey_id)
+                .values(archived_responses=func.coalesce(Survey.archived_responses, 0) + deleted)
+            )
+        db.commit()
+        if on_progress:
+            on_progress({"archived_responses": min(start + chunk_size, len(archived_ids)), "added": added})
+    return added
+
+
+def _archive_keys(db: Session, survey_id: str, response_ids: list[str]) -> None:
+    """Record the idempotency keys of the hot rows about to be archived."""
+    keyed = dict(db.execute(
+        select(Response.idempotency_key, Response.id).where(
+            Response.id.in_(response_ids), Response.survey_id == survey_id, Response.idempotency_key.is_not(None)
+        )
+    ).all())
+    if not keyed:
+        return
+    # A key already archived (a duplicate from before keys were kept) stays with its first response
+    taken = set(db.execute(
+        select(ArchivedResponseKey.idempotency_key).where(
+            ArchivedResponseKey.survey_id == survey_id, ArchivedResponseKey.idempotency_key.in_(list(keyed))
+        )
+    ).scalars())
+    rows = [
+        {"survey_id": survey_id, "idempotency_key": key, "response_id": response_id}
+        for key, response_id in keyed.items() if key not in taken
+    ]
+    if rows:
+        db.execute(insert(ArchivedResponseKey.__table__), rows)
+
+
+def restore_survey(
+    db: Session,
+    survey_id: str,
+    chunk_size: int = ARCHIVE_CHUNK_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> int:
+    """
+    Move every archived response back into the hot tables and remove the files. Returns how many.
+    A restored response whose idempotency key a hot response holds by now is restored without it.
+    """
+    bind_survey_shard(db, survey_id)
+    entry = _read_indexed(survey_id)
+    restored = 0
+    if entry is not None:
+        archive, (_, _, answers_at) = entry
+        responses = archive["responses"]
+        total = len(responses["id"])
+        for start in range(0, total, chunk_size):
+            rows = range(start, min(start + chunk_size, total))
+            present = set(
+                db.execute(
+                    select(Response.id).where(Response.id.in_([responses["id"][row] for row in rows]))
+                ).scalars()
+            )
+            keys = {
+                responses["idempotency_key"][row] for row in rows
+                if responses["idempotency_key"][row] is not None and responses["id"][row] not in present
+            }
+            held = set(
+                db.execute(
+                    select(Response.idempotency_key).where(
+                        Response.survey_id == survey_id, Response.idempotency_key.in_(list(keys))
+                    )
+                ).scalars()
+            ) if keys else set()
+            response_rows, answer_rows, json_answer_rows = [], [], []
+            for row in rows:
+                response_id = responses["id"][row]
+                if response_id in present:
+                    continue  # restored by an interrupted run
+                document = responses["document"][row]
+                answers = _row_answers(archive, answers_at[row])
+                key = responses["idempotency_key"][row]
+                if key in held:
+                    key = None  # a retry was stored as a new response meanwhile; it keeps the key
+                elif key is not None:
+                    held.add(key)
+                response_rows.append({
+                    "id": response_id,
+                    "survey_id": survey_id,
+                    "submitted_at": datetime.fromisoformat(responses["submitted_at"][row]),
+                    "respondent_id": responses["respondent_id"][row],
+                    "metadata": responses["metadata"][row],
+                    "idempotency_key": key,
+                    "answers_doc": (
+                        [{k: v for k, v in answer.items() if v is not None} for answer in answers]
+                        if document else None
+                    ),
+                })
+                if document:
+                    continue
+                for answer in answers:
+                    answer_row = {**answer, "response_id": response_id}
+                    if answer_row["value_json"] is None:
+                        del answer_row["value_json"]  # left SQL NULL, as submit and import do
+                        answer_rows.append(answer_row)
+                    else:
+                        json_answer_rows.append(answer_row)
+            if response_rows:
+                db.execute(insert(Response.__table__), response_rows)
+            for batch in (answer_rows, json_answer_rows):
+                if batch:
+                    db.execute(insert(Answer.__table__), batch)
+            if response_rows:  # back in the hot table: stop counting them as archived, in the same commit
+                db.execute(
+                    delete(ArchivedResponseKey).where(
+                        ArchivedResponseKey.survey_id == survey_id,
+                        ArchivedResponseKey.response_id.in_([r["id"] for r in response_rows]),
+                    )
+                )
+                db.execute(
+                    update(Survey)
+                    .where(Survey.id == survey_id)
+                    .values(archived_responses=case(
+                        (Survey.archived_responses > len(response_rows), Survey.archived_responses - len(response_rows)),
+                        else_=0,
+                    ))
+                )
+            db.commit()
+            restored += len(response_rows)
+            if on_progress:
+                on_progress({"restored_responses": rows.stop})
+
+    db.execute(delete(ArchivedResponseKey).where(ArchivedResponseKey.survey_id == survey_id))
+    db.execute(
+        update(Survey).where(Survey.id == survey_id).values(archived_before=None, archived_responses=0)
+    )
+    db.commit()
+    remove_archive(survey_id)
+    return restored
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive or restore a survey's old responses.")
+    parser.add_argument("survey_id")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--before", type=datetime.fromisoformat, help="Archive responses submitted before this ISO date")
+    group.add_argument("--restore", action="store_true", help="Move archived responses back into the database")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        if args.restore:
+            print(f"Restored {restore_survey(session, args.survey_id)} response(s).")
+        else:
+            print(f"Archived {archive_survey(session, args.survey_id, args.before)} response(s).")
+    finally:
+        session.close()
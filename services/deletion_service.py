@@ -0,0 +1,103 @@
+"""
+Deletion service — purges soft-deleted surveys in small set-based chunks.
+
+survey_service.delete_survey only stamps Survey.deleted_at, which hides the survey at
+once.  purge_survey then deletes its answers and responses a chunk at a time (one short
+transaction per chunk, nothing loaded into the ORM), followed by the structure rows.
+Purges run as "survey_purge" jobs (services.job_service) and are restartable; surveys left half-purged by a crash are finished by
+`python -m services.deletion_service`.
+"""
+
+import os
+from typing import Callable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from database import bind_survey_shard
+from models.answer import Answer
+from models.draft import Draft, DraftEvent
+from models.option import Option
+from models.question import Question
+from models.response import ArchivedResponseKey, Response
+from models.sketch import SurveySketch, SurveySketchDelta
+from models.survey import Survey
+from services import archive_service
+
+DELETE_CHUNK_SIZE = int(os.getenv("DELETE_CHUNK_SIZE", "1000"))
+
+
+def purge_survey(
+    db: Session,
+    survey_id: str,
+    chunk_size: int = DELETE_CHUNK_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> int:
+    """
+    Delete a soft-deleted survey and everything under it. Returns the number of responses removed.
+    A survey that is not (or no longer) marked deleted is left untouched.
+    """
+    deleted_at = db.execute(select(Survey.deleted_at).where(Survey.id == survey_id)).scalar()
+    db.rollback()  # release the read transaction; each chunk below is its own
+    if deleted_at is None:
+        return 0
+    bind_survey_shard(db, survey_id)
+    removed = 0
+    while True:
+        response_ids = db.execute(
+            select(Response.id).where(Response.survey_id == survey_id).limit(chunk_size)
+        ).scalars().all()
+        if not response_ids:
+            break
+        db.execute(delete(Answer).where(Answer.response_id.in_(response_ids)))
+        db.execute(delete(Response).where(Response.id.in_(response_ids)))
+        db.commit()
+        removed += len(response_ids)
+        if on_progress:
+            on_progress({"removed_responses": removed})
+
+    draft_ids = select(Draft.id).where(Draft.survey_id == survey_id)
+    db.execute(delete(DraftEvent).where(DraftEvent.draft_id.in_(draft_ids)))
+    db.execute(delete(Draft).where(Draft.survey_id == survey_id))
+    question_ids = select(Question.id).where(Question.survey_id == survey_id)
+    db.execute(delete(Option).where(Option.question_id.in_(question_ids)))
+    db.execute(delete(Question).where(Question.survey_id == survey_id))
+    db.execute(delete(SurveySketch).where(SurveySketch.survey_id == survey_id))
+    db.execute(delete(SurveySketchDelta).where(SurveySketchDelta.survey_id == survey_id))
+    db.execute(delete(ArchivedResponseKey).where(ArchivedResponseKey.survey_id == survey_id))
+    db.execute(delete(Survey).where(Survey.id == survey_id, Survey.deleted_at.is_not(None)))
+    db.commit()
+    archive_service.remove_archive(survey_id)
+    return removed
+
+
+def deletion_status(db: Session, survey_id: str) -> dict:
+    """Progress of a survey deletion: 'deleting' with responses left, or 'deleted' once the row is gone."""
+    survey = db.query(Survey).filter(Survey.id == survey_id).first()
+    if survey is None:
+        return {"survey_id": survey_id, "status": "deleted", "remaining_responses": 0}
+    if survey.deleted_at is None:
+        return {"survey_id": survey_id, "status": "active", "remaining_responses": None}
+    remaining = db.execute(
+        select(func.count()).select_from(Response).where(Response.survey_id == survey_id)
+    ).scalar_one()
+    return {"survey_id": survey_id, "status": "deleting", "remaining_responses": remaining}
+
+
+def purge_pending(db: Session) -> int:
+    """Finish every soft-deleted survey (e.g. after a crash mid-purge). Returns how many were purged."""
+    survey_ids = db.execute(select(Survey.id).where(Survey.deleted_at.is_not(None))).scalars().all()
+    for survey_id in survey_ids:
+        purge_survey(db, survey_id)
+    return len(survey_ids)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = purge_pending(session)
+    finally:
+        session.close()
+    print(f"Purged {count} deleted survey(s).")
@@ -0,0 +1,214 @@
+"""
+Draft service — resumable partial responses with delta autosave.
+
+A respondent opens a draft and gets a resume token.  Autosaves PATCH only the answers
+that changed; each becomes an append-only DraftEvent row (one INSERT per patch, the draft
+row itself is never rewritten).  Reading a draft folds its events: the latest event per
+question wins, ordered by the client's `seq` and then arrival.
+
+finalize_draft folds the log once and writes the Response/Answer rows through
+response_service.submit_response, keyed by the resume token so a retried finalize
+returns the same response.  Drafts with no activity for DRAFT_TTL_HOURS are deleted by
+the periodic "draft_gc" job (services.job_service).
+"""
+
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import iter_shard_sessions
+from models.draft import Draft, DraftEvent
+from models.response import Response
+from schemas.draft import DraftCreate, DraftPatch
+from schemas.response import SurveySubmitRequest
+
+DRAFT_TTL_HOURS = float(os.getenv("DRAFT_TTL_HOURS", "72"))
+DRAFT_GC_INTERVAL_SECONDS = float(os.getenv("DRAFT_GC_INTERVAL_SECONDS", "3600"))
+DRAFT_GC_CHUNK_SIZE = int(os.getenv("DRAFT_GC_CHUNK_SIZE", "1000"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _idempotency_key(resume_token: str) -> str:
+    return f"draft:{resume_token}"
+
+
+def _get_draft_row(db: Session, survey_id: str, resume_token: str) -> Draft:
+    draft = db.execute(
+        select(Draft).where(Draft.resume_token == resume_token, Draft.survey_id == survey_id)
+    ).scalar_one_or_none()
+    if draft is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found")
+    return draft
+
+
+def _fold(db: Session, draft_id: str) -> tuple[list[dict], datetime | None]:
+    """Current answers of a draft (latest event per question wins), and its last activity."""
+    rows = db.execute(
+        select(DraftEvent.question_id, DraftEvent.answers, DraftEvent.created_at)
+        .where(DraftEvent.draft_id == draft_id)
+        .order_by(DraftEvent.seq, DraftEvent.id)
+    ).all()
+    latest: dict[str, list[dict]] = {}
+    last_activity = None
+    for question_id, answers, created_at in rows:
+        latest.pop(question_id, None)  # re-insert so answers keep the order they were last given in
+        latest[question_id] = answers
+        if last_activity is None or created_at > last_activity:
+            last_activity = created_at
+    return [answer for answers in latest.values() for answer in answers], last_activity
+
+
+def _draft_dict(draft: Draft, answers: list[dict], last_activity: datetime | None) -> dict:
+    return {
+        "resume_token": draft.resume_token,
+        "survey_id": draft.survey_id,
+        "respondent_id": draft.respondent_id,
+        "metadata_": draft.metadata_,
+        "created_at": draft.created_at,
+        "updated_at": max(draft.created_at, last_activity) if last_activity else draft.created_at,
+        "finalized_at": draft.finalized_at,
+        "response_id": draft.response_id,
+        "answers": answers,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Respondent API
+# ---------------------------------------------------------------------------
+
+def create_draft(db: Session, survey_id: str, data: DraftCreate) -> dict:
+    draft = Draft(
+        survey_id=survey_id,
+        resume_token=secrets.token_urlsafe(24),
+        respondent_id=data.respondent_id,
+        metadata_=data.metadata_ or {},
+    )
+    db.add(draft)
+    db.commit()
+    db.refresh(draft)
+    return _draft_dict(draft, [], None)
+
+
+def get_draft(db: Session, survey_id: str, resume_token: str) -> dict:
+    draft = _get_draft_row(db, survey_id, resume_token)
+    answers, last_activity = _fold(db, draft.id)
+    return _draft_dict(draft, answers, last_activity)
+
+
+def patch_draft(db: Session, survey_id: str, resume_token: str, data: DraftPatch) -> int:
+    """
+    Append one event per question touched by the patch. Returns how many were written.
+    Kept to a key lookup and one multi-row INSERT, since clients call it on every change.
+    """
+    row = db.execute(
+        select(Draft.id, Draft.finalized_at).where(
+            Draft.resume_token == resume_token, Draft.survey_id == survey_id
+        )
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found")
+    if row.finalized_at is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Draft was already submitted")
+
+    by_question: dict[str, list[dict]] = {question_id: [] for question_id in data.cleared}
+    for answer in data.answers:
+        by_question.setdefault(answer.question_id, []).append(answer.model_dump())
+    if not by_question:
+        return 0
+
+    now = _utcnow()
+    db.execute(
+        insert(DraftEvent),
+        [
+            {
+                "draft_id": row.id,
+                "seq": data.seq or 0,
+                "question_id": question_id,
+                "answers": answers,
+                "created_at": now,
+            }
+            for question_id, answers in by_question.items()
+        ],
+    )
+    db.commit()
+    return len(by_question)
+
+
+def finalize_draft(db: Session, survey_id: str, resume_token: str) -> Response:
+    """Turn a draft into a Response in one batch. Finalizing again returns the same response."""
+    from services import response_service
+
+    draft = _get_draft_row(db, survey_id, resume_token)
+    if draft.response_id is not None:
+        response = db.get(Response, draft.response_id)
+        if response is not None:
+            return response
+
+    answers, _ = _fold(db, draft.id)
+    response = response_service.submit_response(
+        db,
+        survey_id,
+        SurveySubmitRequest(respondent_id=draft.respondent_id, metadata_=draft.metadata_, answers=answers),
+        idempotency_key=_idempotency_key(resume_token),
+    )
+    # Once the response exists its key makes a crash here harmless: the retry replays it.
+    db.execute(
+        update(Draft).where(Draft.id == draft.id).values(finalized_at=_utcnow(), response_id=response.id)
+    )
+    db.execute(delete(DraftEvent).where(DraftEvent.draft_id == draft.id))
+    db.commit()
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Garbage collection
+# ---------------------------------------------------------------------------
+
+def _expired_drafts(cutoff: datetime, limit: int):
+    recent_activity = (
+        select(DraftEvent.id)
+        .where(DraftEvent.draft_id == Draft.id, DraftEvent.created_at >= cutoff)
+        .exists()
+    )
+    return (
+        select(Draft.id)
+        .where(func.coalesce(Draft.finalized_at, Draft.created_at) < cutoff, ~recent_activity)
+        .limit(limit)
+    )
+
+
+def collect_garbage(
+    ttl_hours: float = DRAFT_TTL_HOURS,
+    chunk_size: int = DRAFT_GC_CHUNK_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> int:
+    """
+    Delete drafts (finalized or abandoned) with no activity for ttl_hours, on every shard.
+    Returns the number of drafts removed.
+    """
+    cutoff = _utcnow() - timedelta(hours=ttl_hours)
+    removed = 0
+    for db in iter_shard_sessions():
+        while True:
+            draft_ids = db.execute(_expired_drafts(cutoff, chunk_size)).scalars().all()
+            if not draft_ids:
+                break
+            db.execute(delete(DraftEvent).where(DraftEvent.draft_id.in_(draft_ids)))
+            db.execute(delete(Draft).where(Draft.id.in_(draft_ids)))
+            db.commit()
+            removed += len(draft_ids)
+            if on_progress:
+                on_progress({"removed_drafts": removed})
+    return removed
+
+
+if __name__ == "__main__":
+    print(f"Removed {collect_garbage()} expired draft(s).")
@@ -0,0 +1,436 @@
+"""
+Import service — bulk loads historical responses from CSV or NDJSON files.
+
+Formats
+  CSV:    header row; `submitted_at` (ISO 8601, required) and `respondent_id` (optional) are
+          reserved columns, every other column is a question id or exact question title. Cells
+          of questions with options hold an option label/value; separate several with "|".
+  NDJSON: one object per line: {"respondent_id": ..., "submitted_at": ..., "answers":
+          {"<question id or title>": value or [values]}}.
+
+Rows without a submitted_at, or with one later than the start of the import, are rejected.
+
+Rows are streamed, validated against a lookup of the survey's questions and options loaded
+once up front, and inserted with set-based executemany batches, one commit per batch.
+Row ids are time-ordered (UUIDv7 layout), so a batch appends to the end of the id indexes
+instead of scattering over them.
+State lives in IMPORT_DIR/<import_id>/: checkpoint.json (progress, last committed line —
+used to resume) and errors.ndjson (one entry per rejected row).
+
+    python -m services.import_service SURVEY_ID FILE [--format csv|ndjson]
+    python -m services.import_service --resume IMPORT_ID
+"""
+
+import csv
+import json
+import os
+import secrets
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Iterator
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from database import bind_survey_shard
+from models.answer import Answer
+from models.option import Option
+from models.question import Question
+from models.response import Response
+
+IMPORT_DIR = os.getenv("IMPORT_DIR", "./imports")
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+# Largest accepted upload; 0 disables the cap.
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+IMPORT_FORMATS = ("csv", "ndjson")
+
+_RESERVED_COLUMNS = ("respondent_id", "submitted_at")
+_MULTI_VALUE_SEPARATOR = "|"
+
+
+class ImportRowError(ValueError):
+    """A source row that cannot be imported; recorded in the error report and skipped."""
+
+
+# ---------------------------------------------------------------------------
+# State files
+# ---------------------------------------------------------------------------
+
+def import_dir(import_id: str) -> str:
+    return os.path.join(IMPORT_DIR, import_id)
+
+
+def new_import_id() -> str:
+    return secrets.token_hex(8)
+
+
+def read_checkpoint(import_id: str) -> dict | None:
+    if not import_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(import_dir(import_id), "checkpoint.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(import_id: str, checkpoint: dict) -> None:
+    path = os.path.join(import_dir(import_id), "checkpoint.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)  # atomic, so a crash never leaves a torn checkpoint
+
+
+def get_import(import_id: str, survey_id: str | None = None) -> dict:
+    checkpoint = read_checkpoint(import_id)
+    if checkpoint is None or (survey_id and checkpoint["survey_id"] != survey_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return checkpoint
+
+
+def create_import(survey_id: str, source_path: str, fmt: str, import_id: str | None = None) -> dict:
+    """Register an import (state directory + initial checkpoint). Returns the checkpoint."""
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import format: {fmt}")
+    import_id = import_id or new_import_id()
+    os.makedirs(import_dir(import_id), exist_ok=True)
+    checkpoint = {
+        "import_id": import_id,
+        "survey_id": survey_id,
+        "source": os.path.abspath(source_path),
+        "format": fmt,
+        "status": "pending",
+        "line": 0,
+        "imported": 0,
+        "rejected": 0,
+        "error": None,
+        "errors_path": os.path.abspath(os.path.join(import_dir(import_id), "errors.ndjson")),
+    }
+    write_checkpoint(import_id, checkpoint)
+    return checkpoint
+
+
+async def store_upload(survey_id: str, chunks: AsyncIterator[bytes], fmt: str) -> dict:
+    """
+    Stream an uploaded body to the import's state directory and register the import.
+    File I/O runs in the thread pool so the event loop never blocks on disk; bodies over
+    IMPORT_MAX_BYTES are rejected with 413.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import format: {fmt}")
+    import_id = new_import_id()
+    await run_in_threadpool(os.makedirs, import_dir(import_id), exist_ok=True)
+    source_path = os.path.join(import_dir(import_id), f"source.{fmt}")
+    f = await run_in_threadpool(open, source_path, "wb")
+    try:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if IMPORT_MAX_BYTES and size > IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                    detail=f"Import files are limited to {IMPORT_MAX_BYTES} bytes",
+                )
+            await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(shutil.rmtree, import_dir(import_id), ignore_errors=True)
+        raise
+    await run_in_threadpool(f.close)
+    return await run_in_threadpool(create_import, survey_id, source_path, fmt, import_id)
+
+
+# ---------------------------------------------------------------------------
+# Parsing and validation
+# ---------------------------------------------------------------------------
+
+def iter_source(path: str, fmt: str) -> Iterator[tuple[int, dict | str]]:
+    """Yield (line_number, raw row): a dict for CSV, the unparsed line for NDJSON."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                answers = {
+                    column: value
+                    for column, value in row.items()
+                    if column not in _RESERVED_COLUMNS and column is not None and value not in (None, "")
+                }
+                record = {
+                    "respondent_id": row.get("respondent_id") or None,
+                    "submitted_at": row.get("submitted_at") or None,
+                    "answers": answers,
+                }
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, line
+
+
+class QuestionLookup:
+    """Survey questions keyed by id and by title, each with its options keyed by label and value."""
+
+    def __init__(self, db: Session, survey_id: str):
+        self.questions: dict[str, str] = {}
+        self.options: dict[str, dict[str, str]] = {}
+        rows = db.execute(select(Question.id, Question.title).where(Question.survey_id == survey_id))
+        for question_id, title in rows:
+            self.questions[question_id] = question_id
+            self.questions.setdefault(title.strip(), question_id)
+        option_rows = db.execute(
+            select(Option.question_id, Option.id, Option.label, Option.value)
+            .join(Question, Option.question_id == Question.id)
+            .where(Question.survey_id == survey_id, Option.deleted_at.is_(None))
+        )
+        for question_id, option_id, label, value in option_rows:
+            by_text = self.options.setdefault(question_id, {})
+            for text in (label, value):
+                if text:
+                    by_text.setdefault(text.strip().casefold(), option_id)
+
+    def question_id(self, key: str) -> str:
+        question_id = self.questions.get(key.strip())
+        if question_id is None:
+            raise ImportRowError(f"Unknown question: {key!r}")
+        return question_id
+
+    def option_id(self, question_id: str, text: str) -> str:
+        option_id = self.options[question_id].get(text.strip().casefold())
+        if option_id is None:
+            raise ImportRowError(f"Unknown option {text!r} for question {question_id}")
+        return option_id
+
+
+def _parse_submitted_at(value, not_after: datetime) -> datetime:
+    if value in (None, ""):
+        raise ImportRowError("Missing submitted_at")
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ImportRowError(f"Invalid submitted_at: {value!r}") from None
+    parsed = parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    if parsed > not_after:
+        raise ImportRowError(f"submitted_at is in the future: {value!r}")
+    return parsed
+
+
+def parse_row(raw: dict | str, lookup: QuestionLookup, fmt: str, not_after: datetime | None = None) -> dict:
+    """
+    Validate one source row. Returns {"respondent_id", "submitted_at", "answers"} with
+    answers mapped to AnswerCreate-shaped dicts; raises ImportRowError if it is unusable.
+    submitted_at must be present and no later than not_after (default: now).
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError as exc:
+            raise ImportRowError(f"Invalid JSON: {exc}") from None
+        if not isinstance(raw, dict):
+            raise ImportRowError("Row is not a JSON object")
+    respondent_id = raw.get("respondent_id")
+    return {
+        "respondent_id": str(respondent_id) if respondent_id not in (None, "") else None,
+        "submitted_at": _parse_submitted_at(raw.get("submitted_at"), not_after or datetime.now(timezone.utc)),
+        "answers": _build_answers(raw.get("answers"), lookup, fmt),
+    }
+
+
+def _build_answers(answers, lookup: QuestionLookup, fmt: str) -> list[dict]:
+    if not isinstance(answers, dict):
+        raise ImportRowError("Missing or invalid 'answers' object")
+    built = []
+    for key, value in answers.items():
+        question_id = lookup.question_id(key)
+        if question_id in lookup.options:
+            if isinstance(value, list):
+                labels = value
+            elif fmt == "csv":
+                labels = str(value).split(_MULTI_VALUE_SEPARATOR)
+            else:
+                labels = [value]
+            for label in labels:
+                built.append({
+                    "question_id": question_id,
+                    "answer_text": None,
+                    "selected_option_id": lookup.option_id(question_id, str(label)),
+                    "value_json": None,
+                })
+        elif isinstance(value, (dict, list)):
+            built.append({"question_id": question_id, "answer_text": None, "selected_option_id": None, "value_json": value})
+        else:
+            built.append({"question_id": question_id, "answer_text": str(value), "selected_option_id": None, "value_json": None})
+    return built
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _ordered_ids(count: int) -> list[str]:
+    """
+    count fresh UUID strings in UUIDv7 layout (millisecond timestamp, version, variant), with
+    the remaining 74 bits a random start plus a counter: increasing within the batch.
+    """
+    millis = time.time_ns() // 1_000_000
+    start = int.from_bytes(os.urandom(10), "big") >> 7  # 73 bits: room for the counter
+    ids = []
+    for counter in range(start, start + count):
+        value = millis << 80 | 0x7 << 76 | (counter >> 62) << 64 | 0b10 << 62 | counter & (1 << 62) - 1
+        h = f"{value:032x}"
+        ids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return ids
+
+
+def _insert_batch(db: Session, survey_id: str, import_id: str, batch: list[tuple[int, dict]]) -> int:
+    """Insert one batch in a single transaction. Rows already imported (by an interrupted run) are skipped."""
+    from services import response_service, stats_service
+
+    keys = {line_number: f"import:{import_id}:{line_number}" for line_number, _ in batch}
+    existing = set(
+        db.execute(
+            select(Response.idempotency_key).where(
+                Response.survey_id == survey_id,
+                Response.idempotency_key.in_(list(keys.values())),
+            )
+        ).scalars()
+    )
+    document_mode = response_service.RESPONSE_STORAGE_MODE == "document"
+    pending = [(line_number, record) for line_number, record in batch if keys[line_number] not in existing]
+    response_ids = _ordered_ids(len(pending))
+    answer_ids = iter(_ordered_ids(sum(len(record["answers"]) for _, record in pending)))
+    metadata = {"import_id": import_id}
+
+    response_rows, answer_rows, json_answer_rows, sketch_items = [], [], [], []
+    for response_id, (line_number, record) in zip(response_ids, pending):
+        submitted_at, respondent_id, answers = record["submitted_at"], record["respondent_id"], record["answers"]
+        response_rows.append({
+            "id": response_id,
+            "survey_id": survey_id,
+            "submitted_at": submitted_at,
+            "respondent_id": respondent_id,
+            "metadata": metadata,
+            "idempotency_key": keys[line_number],
+            "answers_doc": (
+                [{"id": next(answer_ids), **{k: v for k, v in a.items() if v is not None}} for a in answers]
+                if document_mode else None
+            ),
+        })
+        if not document_mode:
+            for answer in answers:
+                if answer["value_json"] is None:
+                    # value_json left out (SQL NULL): skips JSON encoding for the common case
+                    answer_rows.append({
+                        "id": next(answer_ids),
+                        "response_id": response_id,
+                        "question_id": answer["question_id"],
+                        "answer_text": answer["answer_text"],
+                        "selected_option_id": answer["selected_option_id"],
+                    })
+                else:
+                    json_answer_rows.append({"id": next(answer_ids), "response_id": response_id, **answer})
+        sketch_items.append((submitted_at, respondent_id, answers))
+
+    # Core inserts on the tables with uniform keys: one executemany per table
+    if response_rows:
+        db.execute(insert(Response.__table__), response_rows)
+    for rows in (answer_rows, json_answer_rows):
+        if rows:
+            db.execute(insert(Answer.__table__), rows)
+    stats_service.record_responses(db, survey_id, sketch_items)
+    db.commit()
+    return len(response_rows)
+
+
+def run_import(
+    db: Session,
+    import_id: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Run (or resume) an import to completion. Returns the final checkpoint."""
+    checkpoint = get_import(import_id)
+    survey_id, fmt = checkpoint["survey_id"], checkpoint["format"]
+    bind_survey_shard(db, survey_id)
+    resume_after = checkpoint["line"]
+    checkpoint.update(status="running", error=None)
+    write_checkpoint(import_id, checkpoint)
+
+    def flush(batch: list, errors: list[dict], last_line: int) -> None:
+        if batch:
+            checkpoint["imported"] += _insert_batch(db, survey_id, import_id, batch)
+        if errors:
+            with open(checkpoint["errors_path"], "a") as report:
+                report.writelines(json.dumps(error) + "\n" for error in errors)
+            checkpoint["rejected"] += len(errors)
+        checkpoint["line"] = last_line
+        write_checkpoint(import_id, checkpoint)
+        if on_progress:
+            on_progress({key: checkpoint[key] for key in ("line", "imported", "rejected")})
+
+    try:
+        lookup = QuestionLookup(db, survey_id)
+        started_at = datetime.now(timezone.utc)
+        batch: list[tuple[int, dict]] = []
+        errors: list[dict] = []
+        line_number = resume_after
+        for line_number, raw in iter_source(checkpoint["source"], fmt):
+            if line_number <= resume_after:
+                continue
+            try:
+                batch.append((line_number, parse_row(raw, lookup, fmt, started_at)))
+            except ImportRowError as exc:
+                errors.append({"line": line_number, "error": str(exc)})
+                continue
+            if len(batch) >= batch_size:
+                flush(batch, errors, line_number)
+                batch, errors = [], []
+        flush(batch, errors, line_number)
+    except Exception as exc:
+        db.rollback()
+        checkpoint.update(status="failed", error=str(exc))
+        write_checkpoint(import_id, checkpoint)
+        raise
+
+    checkpoint["status"] = "completed"
+    write_checkpoint(import_id, checkpoint)
+    return checkpoint
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Bulk import survey responses from CSV or NDJSON.")
+    parser.add_argument("survey_id", nargs="?")
+    parser.add_argument("file", nargs="?")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--resume", metavar="IMPORT_ID", help="Continue an interrupted import")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    if args.resume:
+        target = args.resume
+    elif args.survey_id and args.file:
+        source_format = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+        target = create_import(args.survey_id, args.file, source_format)["import_id"]
+    else:
+        parser.error("pass SURVEY_ID FILE, or --resume IMPORT_ID")
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        result = run_import(session, target, args.batch_size)
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Import {target}: {result['imported']} imported, {result['rejected']} rejected "
+        f"in {elapsed:.1f}s ({result['imported'] / max(elapsed, 1e-9):,.0f} responses/s). "
+        f"Errors: {result['errors_path']}"
+    )
@@ -0,0 +1,501 @@
+"""
+Job service — in-process background jobs with persisted state.
+
+Slow work (survey purges, imports, sketch rebuilds, reclassification, renumbering,
+archiving) is submitted as a row in the `jobs` table and run on a thread pool outside
+the request thread pool.  Each job type has its own concurrency limit; jobs over the
+limit wait in a per-type queue.  Handlers report progress through JobContext.progress, which is also
+where cancellation is noticed.  Housekeeping jobs (sketch merges, draft garbage
+collection) are submitted periodically by a scheduler thread started with the runner.
+
+Jobs survive restarts: on startup, pending jobs are queued again.  Running jobs not heard
+from in JOB_STALE_SECONDS (their worker died) are put back to pending, on startup and by
+a sweep the scheduler runs every JOB_SWEEP_SECONDS, so a job orphaned by a crashed
+process is picked up even if that process came back before it looked stale.  A running
+job is kept fresh by a heartbeat thread, independent of how often its handler reports.  Every
+handler is restartable.  A job is claimed with a conditional UPDATE, so several
+processes sharing a database never run the same job twice.  A partial unique index keeps
+one active job per dedupe_key, also across processes.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_STALE_SECONDS / 4)))
+JOB_SWEEP_SECONDS = float(os.getenv("JOB_SWEEP_SECONDS", str(JOB_STALE_SECONDS / 4)))
+
+ACTIVE_STATUSES = ("pending", "running")
+# Stopping these halfway leaves data no other request can finish, so they always run to the end
+UNCANCELLABLE_TYPES = ("survey_purge",)
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler (from JobContext.progress) once cancellation was requested."""
+
+
+class JobContext:
+    """Handed to job handlers: progress reporting and cooperative cancellation."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def progress(self, values: dict[str, Any]) -> None:
+        """
+        Record progress counters; raises JobCancelled if the job was cancelled meanwhile.
+        Call it between the handler's transactions: on SQLite an open write transaction
+        of the job itself would block this update.
+        """
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job).where(Job.id == self.job_id).values(progress=values, updated_at=_utcnow())
+            )
+            db.commit()
+            cancelled = db.execute(select(Job.cancel_requested).where(Job.id == self.job_id)).scalar()
+        finally:
+            db.close()
+        if cancelled:
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Job types — handler(job, db, **params) -> result dict, or handler(job, **params) for
+# jobs that open their own sessions
+# ---------------------------------------------------------------------------
+
+def _survey_purge(job: JobContext, db: Session, survey_id: str) -> dict:
+    from services import deletion_service
+
+    removed = deletion_service.purge_survey(db, survey_id, on_progress=job.progress)
+    return {"survey_id": survey_id, "removed_responses": removed}
+
+
+def _response_import(job: JobContext, db: Session, import_id: str) -> dict:
+    from services import import_service
+
+    checkpoint = import_service.run_import(db, import_id, on_progress=job.progress)
+    return {key: checkpoint[key] for key in ("import_id", "imported", "rejected", "errors_path")}
+
+
+def _sketch_rebuild(job: JobContext, db: Session, survey_id: str) -> dict:
+    from services import stats_service
+
+    # One transaction (readers never see half-rebuilt stats), so no progress checkpoints
+    count = stats_service.rebuild_sketches(db, survey_id)
+    return {"survey_id": survey_id, "responses": count}
+
+
+def _question_reclassify(job: JobContext, db: Session, run_id: str) -> dict:
+    from services import reclassify_service
+
+    state = reclassify_service.run_reclassify(db, run_id, on_progress=job.progress)
+    return {key: state[key] for key in ("run_id", "processed", "mismatches", "results_path")}
+
+
+def _survey_renumber(job: JobContext, db: Session, survey_id: str) -> dict:
+    from services import survey_service
+
+    survey_service.renumber_survey(db, survey_id)
+    return {"survey_id": survey_id}
+
+
+def _survey_archive(job: JobContext, db: Session, survey_id: str, before: str) -> dict:
+    from services import archive_service
+
+    added = archive_service.archive_survey(db, survey_id, datetime.fromisoformat(before), on_progress=job.progress)
+    return {"survey_id": survey_id, "archived_responses": added, "path": archive_service.archive_path(survey_id)}
+
+
+def _survey_restore(job: JobContext, db: Session, survey_id: str) -> dict:
+    from services import archive_service
+
+    restored = archive_service.restore_survey(db, survey_id, on_progress=job.progress)
+    return {"survey_id": survey_id, "restored_responses": restored}
+
+
+def _sketch_merge(job: JobContext) -> dict:
+    from services import stats_service
+
+    return {"merged_deltas": stats_service.merge_all_deltas(on_progress=job.progress)}
+
+
+def _draft_gc(job: JobContext) -> dict:
+    from services import draft_service
+
+    return {"removed_drafts": draft_service.collect_garbage(on_progress=job.progress)}
+
+
+# type -> (handler, max concurrently running in this process, session handed to the handler:
+# "primary", "read" (the read replica) or None when it walks every shard with its own sessions)
+JOB_TYPES: dict[str, tuple[Callable[..., dict | None], int, str | None]] = {
+    "survey_purge": (_survey_purge, 2, "primary"),
+    "response_import": (_response_import, 2, "primary"),
+    "sketch_rebuild": (_sketch_rebuild, 1, "primary"),
+    "question_reclassify": (_question_reclassify, 1, "read"),
+    "survey_renumber": (_survey_renumber, 4, "primary"),
+    "survey_archive": (_survey_archive, 1, "primary"),
+    "survey_restore": (_survey_restore, 1, "primary"),
+    "sketch_merge": (_sketch_merge, 1, None),
+    "draft_gc": (_draft_gc, 1, None),
+}
+
+# Per-type overrides, e.g. JOB_CONCURRENCY="response_import=4,survey_purge=1"
+_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition("=") for item in os.getenv("JOB_CONCURRENCY", "").split(","))
+    if name.strip() and limit
+}
+
+
+def concurrency_limit(job_type: str) -> int:
+    return max(1, _CONCURRENCY.get(job_type, JOB_TYPES[job_type][1]))
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class _JobRunner:
+    """Thread pool plus per-type queues, so one busy job type never starves the others."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._queued: dict[str, deque[str]] = defaultdict(deque)
+        self._running: dict[str, int] = defaultdict(int)
+
+    def enqueue(self, job_type: str, job_id: str) -> None:
+        with self._lock:
+            if job_id not in self._queued[job_type]:
+                self._queued[job_type].append(job_id)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        ready = []
+        with self._lock:
+            for job_type, queue in self._queued.items():
+                while queue and self._running[job_type] < concurrency_limit(job_type):
+                    ready.append((job_type, queue.popleft()))
+                    self._running[job_type] += 1
+            if ready and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            executor = self._executor
+        for job_type, job_id in ready:
+            executor.submit(self._run, job_type, job_id)
+
+    def _run(self, job_type: str, job_id: str) -> None:
+        try:
+            execute_job(job_id)
+        except Exception:
+            logger.exception("Job %s crashed the runner", job_id)
+        finally:
+            with self._lock:
+                self._running[job_type] -= 1
+            self._dispatch()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._queued.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # Jobs still queued stay pending in the table and are picked up on the next start
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_runner = _JobRunner(JOB_WORKERS)
+
+
+class _Heartbeat:
+    """Bumps a running job's updated_at every JOB_HEARTBEAT_SECONDS, so a live job never looks stale."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"job-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _loop(self) -> None:
+        from database import SessionLocal
+
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(Job).where(Job.id == self.job_id, Job.status == "running").values(updated_at=_utcnow())
+                )
+                db.commit()
+            except Exception:
+                logger.warning("Heartbeat of job %s failed", self.job_id, exc_info=True)
+            finally:
+                db.close()
+
+
+class _Scheduler:
+    """
+    Daemon thread submitting periodic jobs (a still-active run of the same job is not
+    doubled) and sweeping stale running jobs back to pending every JOB_SWEEP_SECONDS.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, schedule: dict[str, float]) -> None:
+        if self._thread is not None or (not schedule and JOB_SWEEP_SECONDS <= 0):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(schedule,), name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self, schedule: dict[str, float]) -> None:
+        from database import SessionLocal
+
+        due = {job_type: 0.0 for job_type in schedule}
+        next_sweep = time.monotonic() + JOB_SWEEP_SECONDS if JOB_SWEEP_SECONDS > 0 else float("inf")
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if next_sweep <= now:
+                next_sweep = now + JOB_SWEEP_SECONDS
+                try:
+                    sweep_stale_jobs()
+                except Exception:
+                    logger.exception("Sweeping stale jobs failed")
+            for job_type, interval in schedule.items():
+                if due[job_type] > now:
+                    continue
+                due[job_type] = now + interval
+                db = SessionLocal()
+                try:
+                    submit(db, job_type, {}, dedupe_key=job_type)
+                except Exception:
+                    logger.exception("Scheduling %s failed", job_type)
+                finally:
+                    db.close()
+            self._stop.wait(max(0.0, min([*due.values(), next_sweep]) - time.monotonic()))
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+_scheduler = _Scheduler()
+
+
+def periodic_jobs() -> dict[str, float]:
+    """Job type -> seconds between runs, for jobs the scheduler submits on its own."""
+    from services import draft_service, stats_service
+
+    schedule = {
+        "sketch_merge": stats_service.SKETCH_MERGE_INTERVAL_SECONDS,
+        "draft_gc": draft_service.DRAFT_GC_INTERVAL_SECONDS,
+    }
+    return {job_type: interval for job_type, interval in schedule.items() if interval > 0}
+
+
+def execute_job(job_id: str) -> None:
+    """Claim a pending job and run its handler to completion in this thread."""
+    from database import ReadSessionLocal, SessionLocal
+
+    db = SessionLocal()
+    try:
+        now = _utcnow()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "pending")
+            .values(status="running", started_at=now, updated_at=now)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return  # cancelled while queued, or another process took it
+        job_type, params = db.execute(select(Job.type, Job.params).where(Job.id == job_id)).one()
+        handler, _, session = JOB_TYPES[job_type]
+    finally:
+        db.close()
+
+    outcome: dict[str, Any] = {"status": "completed"}
+    work_db = {"primary": SessionLocal, "read": ReadSessionLocal}[session]() if session else None
+    args = (JobContext(job_id),) if work_db is None else (JobContext(job_id), work_db)
+    try:
+        with _Heartbeat(job_id):
+            outcome["result"] = handler(*args, **(params or {}))
+    except JobCancelled:
+        outcome = {"status": "cancelled"}
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job_id, job_type)
+        outcome = {"status": "failed", "error": str(exc) or type(exc).__name__}
+    finally:
+        if work_db is not None:
+            work_db.close()  # rolls back whatever the handler left uncommitted
+
+    db = SessionLocal()
+    try:
+        now = _utcnow()
+        db.execute(update(Job).where(Job.id == job_id).values(finished_at=now, updated_at=now, **outcome))
+        db.commit()
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def submit(db: Session, job_type: str, params: dict[str, Any], dedupe_key: str | None = None) -> Job:
+    """
+    Persist a job and queue it. With a dedupe_key, an already pending/running job with
+    the same key is returned instead of starting a second one.
+    """
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {job_type}")
+    while True:
+        if dedupe_key:
+            existing = db.execute(
+                select(Job).where(Job.dedupe_key == dedupe_key, Job.status.in_(ACTIVE_STATUSES)).limit(1)
+            ).scalar_one_or_none()
+            if existing is not None:
+                return existing
+        job = Job(type=job_type, params=params, dedupe_key=dedupe_key)
+        db.add(job)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            # Another submit of the same key won the race (ux_jobs_active_dedupe_key); return its job
+            db.rollback()
+            if not dedupe_key:
+                raise
+    db.refresh(job)
+    _runner.enqueue(job_type, job.id)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Job:
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+def list_jobs(db: Session, job_type: str | None = None, job_status: str | None = None, limit: int = 50) -> list[Job]:
+    query = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if job_type:
+        query = query.where(Job.type == job_type)
+    if job_status:
+        query = query.where(Job.status == job_status)
+    return list(db.execute(query).scalars())
+
+
+def cancel_job(db: Session, job_id: str) -> Job:
+    """
+    Cancel a job. A pending job is cancelled at once; a running one stops at its next
+    progress report (work committed so far is kept — every handler can be resumed).
+    Purges (UNCANCELLABLE_TYPES) cannot be cancelled.
+    """
+    job = get_job(db, job_id)
+    if job.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}")
+    if job.type in UNCANCELLABLE_TYPES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{job.type} jobs cannot be cancelled")
+    now = _utcnow()
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "pending")
+        .values(status="cancelled", cancel_requested=True, finished_at=now, updated_at=now)
+    )
+    db.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(cancel_requested=True))
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _requeue_stale(db: Session) -> list[tuple[str, str]]:
+    """
+    Put running jobs whose heartbeat (updated_at) is older than JOB_STALE_SECONDS back to
+    pending, or to cancelled if that was requested. Returns (type, id) of the requeued jobs.
+    """
+    now = _utcnow()
+    stale = (Job.status == "running", Job.updated_at < now - timedelta(seconds=JOB_STALE_SECONDS))
+    db.execute(
+        update(Job).where(*stale, Job.cancel_requested.is_(True)).values(status="cancelled", finished_at=now)
+    )
+    requeued = db.execute(select(Job.type, Job.id).where(*stale)).all()
+    if requeued:
+        db.execute(update(Job).where(*stale, Job.id.in_([job_id for _, job_id in requeued])).values(status="pending"))
+    db.commit()
+    return [(job_type, job_id) for job_type, job_id in requeued]
+
+
+def sweep_stale_jobs() -> int:
+    """Requeue stale running jobs (their process died) on this process's runner. Returns how many."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        requeued = _requeue_stale(db)
+    finally:
+        db.close()
+    for job_type, job_id in requeued:
+        if job_type in JOB_TYPES:
+            logger.warning("Requeuing stale job %s (%s)", job_id, job_type)
+            _runner.enqueue(job_type, job_id)
+    return len(requeued)
+
+
+def start() -> int:
+    """
+    Requeue pending jobs (and stale running ones) left by a previous process, and start
+    the periodic scheduler. Returns how many jobs were requeued.
+    """
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _requeue_stale(db)
+        pending = db.execute(
+            select(Job.type, Job.id).where(Job.status == "pending").order_by(Job.created_at)
+        ).all()
+    finally:
+        db.close()
+    for job_type, job_id in pending:
+        if job_type in JOB_TYPES:
+            _runner.enqueue(job_type, job_id)
+    _scheduler.start(periodic_jobs())
+    return len(pending)
+
+
+def shutdown() -> None:
+    _scheduler.shutdown()
+    _runner.shutdown()
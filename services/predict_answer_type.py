@@ -3,7 +3,8 @@ Predicts a suitable question/answer type from the question text (Answer genius).
 Uses keyword and phrase matching; only suggests types that can be auto-applied.
 """
 import re
-from typing import Literal
+from bisect import bisect_right
+from typing import Literal, Sequence
 
 PredictableType = Literal["Single text box", "Multiple choice", "Checkboxes"]
 
@@ -94,3 +95,72 @@ def predict_answer_type(question_text: str) -> PredictableType | None:
             if pattern.search(trimmed):
                 return answer_type
     return None
+
+
+# ---------------------------------------------------------------------------
+# Batch scoring
+# ---------------------------------------------------------------------------
+
+# Titles are joined into one text per batch. "\n" ends each title for `$`, and "\x00" stops
+# `\s` from matching across a title boundary.
+_BATCH_SEPARATOR = "\n\x00"
+
+# Same rules as COMPILED_RULES, with `$` matching at each title's end inside a batch text.
+# The batch text is lower-cased once instead of using IGNORECASE, which keeps the regex
+# engine's fast literal-prefix scan. Earlier patterns in a rule are more specific, so they
+# weigh more when scoring.
+_BATCH_RULES: list[tuple[PredictableType, list[tuple[re.Pattern, float]]]] = [
+    (
+        answer_type,
+        [
+            (re.compile(p, re.MULTILINE), 1.0 + (len(patterns) - i) / len(patterns))
+            for i, p in enumerate(patterns)
+        ],
+    )
+    for answer_type, patterns in RULES
+]
+
+
+def score_answer_types(titles: Sequence[str]) -> list[list[tuple[PredictableType, float]]]:
+    """
+    Score many question titles at once.
+
+    Each pattern scans the whole batch in a single regex pass instead of once per title, and
+    every rule that matches contributes (not just the first one).  Returns, per title, the
+    matching types ranked by score (normalized to sum to 1); an empty list means no match.
+    """
+    cleaned = [" ".join(title.replace("\x00", " ").split()).lower() for title in titles]
+    text = _BATCH_SEPARATOR.join(cleaned)
+    starts = []
+    offset = 0
+    for title in cleaned:
+        starts.append(offset)
+        offset += len(title) + len(_BATCH_SEPARATOR)
+
+    raw_scores: list[dict[PredictableType, float]] = [{} for _ in cleaned]
+    for answer_type, patterns in _BATCH_RULES:
+        for pattern, weight in patterns:
+            position = 0
+            while True:
+                match = pattern.search(text, position)
+                if match is None:
+                    break
+                index = bisect_right(starts, match.start()) - 1
+                scores = raw_scores[index]
+                scores[answer_type] = scores.get(answer_type, 0.0) + weight
+                # One hit per title and pattern is enough; resume at the next title.
+                if index + 1 >= len(starts):
+                    break
+                position = starts[index + 1]
+
+    rule_order = {answer_type: i for i, (answer_type, _) in enumerate(RULES)}
+    ranked = []
+    for scores in raw_scores:
+        total = sum(scores.values())
+        ranked.append(
+            sorted(
+                ((answer_type, round(score / total, 4)) for answer_type, score in scores.items()),
+                key=lambda item: (-item[1], rule_order[item[0]]),
+            )
+        )
+    return ranked
@@ -0,0 +1,238 @@
+"""
+Admission control for the public submit and draft autosave paths.
+
+Token buckets keyed by share token (or draft) and by client IP keep one viral survey (or
+one noisy client) from saturating the database, and a global cap bounds the number of
+submit transactions in flight.  Rejected requests get 429 with a Retry-After hint.
+
+Buckets live in process memory by default.  Set RATE_LIMIT_REDIS_URL to share them
+across workers, or call set_backend() with any RateLimitBackend implementation.
+
+Behind a reverse proxy every request arrives from the proxy's address, so per-IP buckets
+would throttle the whole site as one client.  List the proxies in RATE_LIMIT_TRUSTED_PROXIES
+and the client address is taken from X-Forwarded-For instead.
+"""
+
+import ipaddress
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+# Sustained submits per second and burst size. A rate of 0 disables that limit.
+SUBMIT_RATE_PER_TOKEN = float(os.getenv("SUBMIT_RATE_PER_TOKEN", "50"))
+SUBMIT_BURST_PER_TOKEN = float(os.getenv("SUBMIT_BURST_PER_TOKEN", "100"))
+SUBMIT_RATE_PER_IP = float(os.getenv("SUBMIT_RATE_PER_IP", "10"))
+SUBMIT_BURST_PER_IP = float(os.getenv("SUBMIT_BURST_PER_IP", "30"))
+# Draft autosaves (PATCH, sent on every change): per draft and per client IP, separate from submits.
+AUTOSAVE_RATE_PER_DRAFT = float(os.getenv("AUTOSAVE_RATE_PER_DRAFT", "5"))
+AUTOSAVE_BURST_PER_DRAFT = float(os.getenv("AUTOSAVE_BURST_PER_DRAFT", "20"))
+AUTOSAVE_RATE_PER_IP = float(os.getenv("AUTOSAVE_RATE_PER_IP", "20"))
+AUTOSAVE_BURST_PER_IP = float(os.getenv("AUTOSAVE_BURST_PER_IP", "60"))
+# Max submit/autosave transactions running at once in this process. 0 disables the cap.
+SUBMIT_MAX_IN_FLIGHT = int(os.getenv("SUBMIT_MAX_IN_FLIGHT", "32"))
+
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Comma-separated proxy addresses or networks (e.g. "10.0.0.0/8,127.0.0.1") allowed to set X-Forwarded-For.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+    if entry.strip()
+]
+
+
+# (key, rate per second, burst)
+Bucket = tuple[str, float, float]
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets. Implementations must make take() atomic across its buckets."""
+
+    @abstractmethod
+    def take(self, buckets: list[Bucket]) -> float:
+        """
+        Consume one token from every bucket, or from none of them. Returns 0 if admitted,
+        else seconds until every bucket has a token again.
+        """
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Per-process buckets. Least recently used keys are dropped beyond max_keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: list[Bucket]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for key, rate, burst in buckets:
+                tokens, last = self._buckets.get(key, (burst, now))
+                levels[key] = min(burst, tokens + (now - last) * rate)
+                if levels[key] < 1:
+                    wait = max(wait, (1 - levels[key]) / rate)
+            for key, tokens in levels.items():
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill-and-take of every bucket in one round trip (ARGV holds rate, burst per key);
+# uses the Redis clock so workers agree on time.
+_REDIS_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return tostring(wait)
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Buckets shared by every worker through Redis (requires the `redis` package)."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_REDIS_TAKE_SCRIPT)
+
+    def take(self, buckets: list[Bucket]) -> float:
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args = [value for _, rate, burst in buckets for value in (rate, burst)]
+        return float(self._take(keys=keys, args=args))
+
+
+_backend: RateLimitBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else InMemoryBackend()
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend) -> None:
+    """Plug in a different bucket store (e.g. a shared one, or a fresh one in tests)."""
+    global _backend
+    _backend = backend
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many submissions, retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The address per-IP buckets are keyed by. The peer address, unless it is a trusted proxy:
+    then the rightmost X-Forwarded-For entry that is not itself a trusted proxy.
+    """
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(address):
+        return address
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        address = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return address
+
+
+def check_rates(buckets: list[Bucket]) -> None:
+    """
+    Raise 429 unless every bucket has a token; a rejected request takes from none of them,
+    so it does not use up another limit's budget. Buckets with a non-positive rate are skipped.
+    """
+    buckets = [bucket for bucket in buckets if bucket[1] > 0]
+    if not buckets:
+        return
+    wait = get_backend().take(buckets)
+    if wait > 0:
+        raise _too_many_requests(wait)
+
+
+_in_flight = threading.BoundedSemaphore(SUBMIT_MAX_IN_FLIGHT) if SUBMIT_MAX_IN_FLIGHT > 0 else None
+
+
+def submit_admission(share_token: str, request: Request):
+    """
+    FastAPI dependency guarding /s/{share_token}/submit.
+    Applies per-survey and per-client buckets, then holds an in-flight slot until the request finishes.
+    """
+    check_rates([
+        (f"submit:token:{share_token}", SUBMIT_RATE_PER_TOKEN, SUBMIT_BURST_PER_TOKEN),
+        (f"submit:ip:{client_ip(request)}", SUBMIT_RATE_PER_IP, SUBMIT_BURST_PER_IP),
+    ])
+    yield from _hold_in_flight_slot()
+
+
+def autosave_admission(resume_token: str, request: Request):
+    """
+    FastAPI dependency guarding draft autosaves. Uses its own per-draft and per-client buckets,
+    so frequent autosaves never eat into the submit budget, and shares the in-flight cap.
+    """
+    check_rates([
+        (f"autosave:draft:{resume_token}", AUTOSAVE_RATE_PER_DRAFT, AUTOSAVE_BURST_PER_DRAFT),
+        (f"autosave:ip:{client_ip(request)}", AUTOSAVE_RATE_PER_IP, AUTOSAVE_BURST_PER_IP),
+    ])
+    yield from _hold_in_flight_slot()
+
+
+def _hold_in_flight_slot():
+    if _in_flight is None:
+        yield
+        return
+    if not _in_flight.acquire(blocking=False):
+        raise _too_many_requests(1)
+    try:
+        yield
+    finally:
+        _in_flight.release()
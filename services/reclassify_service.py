@@ -0,0 +1,182 @@
+"""
+Reclassify service — audits question types across the whole catalog with Answer genius.
+
+Questions are streamed from the DB in batches (never all in memory), scored with
+predict_answer_type.score_answer_types, and written to RECLASSIFY_DIR/<run_id>/results.ndjson,
+one line per question:
+
+    {"question_id", "survey_id", "title", "current_type", "predictions": [{"type", "score"}],
+     "suggested_type", "mismatch"}
+
+`suggested_type` is the top prediction mapped to the stored question type; `mismatch` is
+true when it differs from the current type.  Progress is kept in status.json.
+
+    python -m services.reclassify_service [--only-mismatches]
+"""
+
+import json
+import os
+import secrets
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.question import Question
+from models.survey import Survey
+from services.predict_answer_type import score_answer_types
+
+RECLASSIFY_DIR = os.getenv("RECLASSIFY_DIR", "./reclassify")
+RECLASSIFY_BATCH_SIZE = int(os.getenv("RECLASSIFY_BATCH_SIZE", "2000"))
+
+# Answer genius type -> stored Question.type
+PREDICTED_TO_QUESTION_TYPE = {
+    "Single text box": "text",
+    "Multiple choice": "multiple_choice",
+    "Checkboxes": "checkbox",
+}
+
+
+# ---------------------------------------------------------------------------
+# State files
+# ---------------------------------------------------------------------------
+
+def run_dir(run_id: str) -> str:
+    return os.path.join(RECLASSIFY_DIR, run_id)
+
+
+def read_status(run_id: str) -> dict | None:
+    if not run_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(run_dir(run_id), "status.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_status(run_id: str, state: dict) -> None:
+    path = os.path.join(run_dir(run_id), "status.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def get_run(run_id: str) -> dict:
+    state = read_status(run_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reclassification run not found")
+    return state
+
+
+def create_run(only_mismatches: bool = False) -> dict:
+    """Register a run (state directory + initial status). Returns the status."""
+    run_id = secrets.token_hex(8)
+    os.makedirs(run_dir(run_id), exist_ok=True)
+    state = {
+        "run_id": run_id,
+        "status": "pending",
+        "only_mismatches": only_mismatches,
+        "processed": 0,
+        "matched": 0,
+        "mismatches": 0,
+        "written": 0,
+        "error": None,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+        "results_path": os.path.abspath(os.path.join(run_dir(run_id), "results.ndjson")),
+    }
+    write_status(run_id, state)
+    return state
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def classify_batch(rows: list[tuple[str, str, str, str]]) -> list[dict]:
+    """Score (question_id, survey_id, type, title) rows. Returns one result dict per row."""
+    results = []
+    for (question_id, survey_id, current_type, title), ranked in zip(rows, score_answer_types([r[3] for r in rows])):
+        suggested = PREDICTED_TO_QUESTION_TYPE[ranked[0][0]] if ranked else None
+        results.append({
+            "question_id": question_id,
+            "survey_id": survey_id,
+            "title": title,
+            "current_type": current_type,
+            "predictions": [{"type": answer_type, "score": score} for answer_type, score in ranked],
+            "suggested_type": suggested,
+            "mismatch": suggested is not None and suggested != current_type,
+        })
+    return results
+
+
+def run_reclassify(
+    db: Session,
+    run_id: str,
+    batch_size: int = RECLASSIFY_BATCH_SIZE,
+    on_progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Score every question of every live survey, streaming results to disk. Returns the final status."""
+    state = get_run(run_id)
+    state.update(status="running", processed=0, matched=0, mismatches=0, written=0, error=None)
+    write_status(run_id, state)
+
+    query = (
+        select(Question.id, Question.survey_id, Question.type, Question.title)
+        .join(Survey, Question.survey_id == Survey.id)
+        .where(Survey.deleted_at.is_(None))
+        .order_by(Question.id)
+        .execution_options(yield_per=batch_size)
+    )
+    try:
+        with open(state["results_path"], "w") as out:
+            for partition in db.execute(query).partitions():
+                results = classify_batch([tuple(row) for row in partition])
+                for result in results:
+                    state["matched"] += result["suggested_type"] is not None
+                    state["mismatches"] += result["mismatch"]
+                    if result["mismatch"] or not state["only_mismatches"]:
+                        out.write(json.dumps(result) + "\n")
+                        state["written"] += 1
+                state["processed"] += len(results)
+                write_status(run_id, state)
+                if on_progress:
+                    on_progress({key: state[key] for key in ("processed", "mismatches")})
+    except Exception as exc:
+        state.update(status="failed", error=str(exc))
+        write_status(run_id, state)
+        raise
+
+    state.update(status="completed", finished_at=datetime.now(timezone.utc).isoformat())
+    write_status(run_id, state)
+    return state
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Score every question title with Answer genius.")
+    parser.add_argument("--only-mismatches", action="store_true", help="Only write questions whose type disagrees")
+    parser.add_argument("--batch-size", type=int, default=RECLASSIFY_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from database import ReadSessionLocal
+
+    target = create_run(args.only_mismatches)["run_id"]
+    session = ReadSessionLocal()
+    started = time.perf_counter()
+    try:
+        result = run_reclassify(session, target, args.batch_size)
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Reclassified {result['processed']} question(s) in {elapsed:.1f}s: "
+        f"{result['matched']} matched a rule, {result['mismatches']} mismatch(es). "
+        f"Results: {result['results_path']}"
+    )
@@ -0,0 +1,71 @@
+"""
+Backfill tool for document-mode response storage.
+
+Folds each response's `answers` rows into Response.answers_doc and deletes the rows,
+one batch per transaction, so it can be stopped and re-run at any point:
+
+    python -m services.response_compaction [--survey-id ID] [--batch-size 500]
+"""
+
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from database import bind_survey_shard
+from models.answer import Answer
+from models.response import Response, ANSWER_FIELDS
+
+
+def compact_batch(db: Session, survey_id: str | None = None, batch_size: int = 500) -> int:
+    """Compact up to batch_size row-mode responses. Returns how many were converted."""
+    query = select(Response.id).where(Response.answers_doc.is_(None))
+    if survey_id:
+        query = query.where(Response.survey_id == survey_id)
+    response_ids = db.execute(query.order_by(Response.id).limit(batch_size)).scalars().all()
+    if not response_ids:
+        return 0
+
+    columns = [getattr(Answer, field) for field in ANSWER_FIELDS]
+    docs: dict[str, list[dict]] = defaultdict(list)
+    for row in db.execute(select(Answer.response_id, *columns).where(Answer.response_id.in_(response_ids))):
+        entry = {field: value for field, value in zip(ANSWER_FIELDS, row[1:]) if value is not None}
+        docs[row.response_id].append(entry)
+
+    db.execute(
+        update(Response),
+        [{"id": response_id, "answers_doc": docs.get(response_id, [])} for response_id in response_ids],
+    )
+    db.execute(delete(Answer).where(Answer.response_id.in_(response_ids)))
+    db.commit()
+    return len(response_ids)
+
+
+def compact_responses(db: Session, survey_id: str | None = None, batch_size: int = 500) -> int:
+    """Compact every row-mode response (optionally for one survey). Returns the total converted."""
+    if survey_id:
+        bind_survey_shard(db, survey_id)
+    total = 0
+    while True:
+        converted = compact_batch(db, survey_id, batch_size)
+        if not converted:
+            return total
+        total += converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert answer rows into per-response JSON documents.")
+    parser.add_argument("--survey-id", help="Only compact responses of this survey")
+    parser.add_argument("--batch-size", type=int, default=500, help="Responses per transaction")
+    args = parser.parse_args()
+
+    from database import iter_shard_sessions
+
+    # A single survey lives on one shard; otherwise walk every shard.
+    count = 0
+    for session in iter_shard_sessions():
+        count += compact_responses(session, args.survey_id, args.batch_size)
+        if args.survey_id:
+            break
+    print(f"Compacted {count} response(s).")
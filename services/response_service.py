@@ -2,67 +2,378 @@
 Response service — business logic for survey responses and answers.
 """
 
-from sqlalchemy.orm import Session, joinedload
+import base64
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from typing import Sequence
 
-from models.response import Response
+from models.response import Response, ANSWER_FIELDS
 from models.answer import Answer
+from schemas.answer import AnswerCreate
 from schemas.response import ResponseCreate, SurveySubmitRequest
+from services import archive_service
+
+# "rows": one Answer row per answer (default). "document": the whole answer set is stored
+# as a single JSON document on Response.answers_doc, so a submit is one INSERT.
+RESPONSE_STORAGE_MODE = os.getenv("RESPONSE_STORAGE_MODE", "rows")
+
+
+# How many recent (survey_id, idempotency_key) -> response_id pairs to keep in memory.
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+
+class _RecentKeyCache:
+    """Small thread-safe LRU so client retries skip the idempotency lookup query."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[str, str], value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+_recent_keys = _RecentKeyCache(IDEMPOTENCY_CACHE_SIZE)
+
+
+def encode_answers_doc(answers: list[AnswerCreate]) -> list[dict]:
+    """Compact document form of a response's answers: null fields are omitted."""
+    doc = []
+    for answer_data in answers:
+        entry = {"id": str(uuid.uuid4()), **answer_data.model_dump(exclude_none=True)}
+        doc.append(entry)
+    return doc
+
+
+def _check_answer_refs(db: Session, survey_id: str, answers: list[AnswerCreate]) -> None:
+    """
+    422 unless every answer names a question of this survey and, if it picks an option,
+    one of that question's live options.  Document-mode answers have no foreign keys to do this.
+    """
+    from models.option import Option
+    from models.question import Question
 
+    rows = db.execute(
+        select(Question.id, Option.id)
+        .outerjoin(Option, and_(Option.question_id == Question.id, Option.deleted_at.is_(None)))
+        .where(Question.survey_id == survey_id)
+    ).all()
+    question_ids = {question_id for question_id, _ in rows}
+    option_pairs = {(question_id, option_id) for question_id, option_id in rows if option_id is not None}
+    for answer in answers:
+        if answer.question_id not in question_ids:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown question {answer.question_id}",
+            )
+        if answer.selected_option_id is not None and (answer.question_id, answer.selected_option_id) not in option_pairs:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Option {answer.selected_option_id} is not an option of question {answer.question_id}",
+            )
 
-def submit_response(db: Session, survey_id: str, data: ResponseCreate | SurveySubmitRequest) -> Response:
+
+def drop_document_answers(db: Session, survey_id: str, question_id: str, chunk_size: int = 1000) -> int:
+    """
+    Remove a deleted question's answers from the survey's document-mode responses, as the
+    foreign key cascade does for `answers` rows.  db must be bound to the survey's shard.
+    Returns how many responses were rewritten.
+    """
+    rewritten = 0
+    query = (
+        select(Response.id, Response.answers_doc)
+        .where(Response.survey_id == survey_id, Response.answers_doc.is_not(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in db.execute(query).partitions():
+        updates = [
+            {"id": response_id, "answers_doc": [entry for entry in doc if entry.get("question_id") != question_id]}
+            for response_id, doc in partition
+            if any(entry.get("question_id") == question_id for entry in doc)
+        ]
+        if updates:
+            db.execute(update(Response), updates)
+            rewritten += len(updates)
+    return rewritten
+
+
+def _resolve_idempotency_key(data: ResponseCreate | SurveySubmitRequest, idempotency_key: str | None) -> str | None:
+    """Explicit key wins; otherwise a respondent_id identifies the submission."""
+    if idempotency_key:
+        return idempotency_key
+    if data.respondent_id:
+        return f"respondent:{data.respondent_id}"
+    return None
+
+
+def _find_by_idempotency_key(db: Session, survey_id: str, key: str) -> Response | None:
+    response_id = _recent_keys.get((survey_id, key))
+    if response_id is not None:
+        response = db.get(Response, response_id)
+        if response is not None:
+            return response
+    response = (
+        db.query(Response)
+        .filter(Response.survey_id == survey_id, Response.idempotency_key == key)
+        .first()
+    )
+    if response is not None:
+        _recent_keys.put((survey_id, key), response.id)
+        return response
+    # Archiving moved the row (and its key) out of the hot table
+    return archive_service.archived_response(db, survey_id, key)
+
+
+def _replay_after_conflict(db: Session, survey_id: str, key: str | None, exc: IntegrityError) -> Response:
+    """A concurrent retry with the same key won the race — return its response instead."""
+    db.rollback()
+    existing = _find_by_idempotency_key(db, survey_id, key) if key else None
+    if existing is None:
+        raise exc
+    return existing
+
+
+def submit_response(
+    db: Session,
+    survey_id: str,
+    data: ResponseCreate | SurveySubmitRequest,
+    idempotency_key: str | None = None,
+) -> Response:
     """
     Create a new response and its associated answers.
     This is an atomic operation.  Also bumps survey.updated_at.
+
+    Submissions are idempotent per survey: if a response with the same key
+    (explicit, or derived from respondent_id) already exists, it is returned
+    unchanged instead of writing a duplicate.
     """
+    key = _resolve_idempotency_key(data, idempotency_key)
+    if key:
+        existing = _find_by_idempotency_key(db, survey_id, key)
+        if existing is not None:
+            return existing
+
     response = Response(
         survey_id=survey_id,
         respondent_id=data.respondent_id,
         metadata_=data.metadata_ or {},
+        idempotency_key=key,
     )
+    if RESPONSE_STORAGE_MODE == "document":
+        _check_answer_refs(db, survey_id, data.answers)
+        response.answers_doc = encode_answers_doc(data.answers)
     db.add(response)
-    db.flush()  # Flush to get the response.id
-
-    for answer_data in data.answers:
-        answer = Answer(
-            response_id=response.id,
-            question_id=answer_data.question_id,
-            answer_text=answer_data.answer_text,
-            selected_option_id=answer_data.selected_option_id,
-            value_json=answer_data.value_json,
-        )
-        db.add(answer)
+    try:
+        db.flush()  # Flush to get the response.id
+    except IntegrityError as exc:
+        return _replay_after_conflict(db, survey_id, key, exc)
+
+    if response.answers_doc is None:
+        for answer_data in data.answers:
+            answer = Answer(
+                response_id=response.id,
+                question_id=answer_data.question_id,
+                answer_text=answer_data.answer_text,
+                selected_option_id=answer_data.selected_option_id,
+                value_json=answer_data.value_json,
+            )
+            db.add(answer)
+
+    from services import stats_service
+    stats_service.record_submit(
+        db, survey_id, response.submitted_at, response.respondent_id, [a.model_dump() for a in data.answers]
+    )
 
     # Touch survey.updated_at so collectors dashboard shows correct date
     from models.survey import Survey
-    from datetime import datetime, timezone
     survey = db.query(Survey).filter(Survey.id == survey_id).first()
     if survey:
         survey.updated_at = datetime.now(timezone.utc)
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        return _replay_after_conflict(db, survey_id, key, exc)
+
     db.refresh(response)
+    if key:
+        _recent_keys.put((survey_id, key), response.id)
     return response
 
 
+# Eager-load answers but not each answer's question/option; dashboard payloads only carry ids.
+_ANSWER_ROWS_ONLY = (
+    selectinload(Response.answers).lazyload(Answer.question),
+    selectinload(Response.answers).lazyload(Answer.selected_option),
+)
+
+
 def get_responses(db: Session, survey_id: str) -> Sequence[Response]:
     """
-    Get all responses for a survey, with answers and questions eagerly loaded.
+    Get all responses for a survey, with answers eagerly loaded.
+    Document-mode responses carry their answers in answers_doc (see Response.answer_records),
+    as do archived ones, which are transient objects read from the survey's archive file.
     """
-    return (
+    responses = (
         db.query(Response)
         .filter(Response.survey_id == survey_id)
-        .options(
-            joinedload(Response.answers)
-            .joinedload(Answer.question)
-        )
+        .options(*_ANSWER_ROWS_ONLY)
         .order_by(Response.submitted_at.desc())
         .all()
     )
+    if not archive_service.archived_count(db, survey_id):
+        return responses
+    archived = archive_service.archived_responses(survey_id, {response.id for response in responses})
+    if archived:
+        responses.extend(archived)
+        responses.sort(key=lambda response: archive_service.as_utc(response.submitted_at), reverse=True)
+    return responses
+
+
+def get_response_records(db: Session, survey_id: str) -> list[dict]:
+    """
+    Same data as get_responses, as plain dicts built from two column queries — no ORM
+    objects. Keys follow ResponseResponse, so the fast JSON path can encode them directly.
+    """
+    answer_columns = [getattr(Answer, field) for field in ANSWER_FIELDS]
+    answers_by_response: dict[str, list[dict]] = {}
+    answer_rows = db.execute(
+        select(Answer.response_id, *answer_columns).where(
+            Answer.response_id.in_(select(Response.id).where(Response.survey_id == survey_id))
+        )
+    )
+    for response_id, *values in answer_rows:
+        answers_by_response.setdefault(response_id, []).append(_answer_record(dict(zip(ANSWER_FIELDS, values))))
+
+    records = []
+    response_rows = db.execute(
+        select(Response.id, Response.respondent_id, Response.metadata_, Response.submitted_at, Response.answers_doc)
+        .where(Response.survey_id == survey_id)
+        .order_by(Response.submitted_at.desc())
+    )
+    for row in response_rows:
+        if row.answers_doc is not None:
+            answers = [_answer_record(entry) for entry in row.answers_doc]
+        else:
+            answers = answers_by_response.get(row.id, [])
+        records.append({
+            "respondent_id": row.respondent_id,
+            "metadata_": row.metadata_,
+            "id": row.id,
+            "submitted_at": row.submitted_at,
+            "answers": answers,
+        })
+    if not archive_service.archived_count(db, survey_id):
+        return records
+    archived = archive_service.archived_records(survey_id, {record["id"] for record in records})
+    if archived:
+        records.extend({**record, "answers": [_answer_record(a) for a in record["answers"]]} for record in archived)
+        records.sort(key=lambda record: archive_service.as_utc(record["submitted_at"]), reverse=True)
+    return records
+
+
+def _answer_record(values: dict) -> dict:
+    # Key order follows AnswerResponse
+    return {
+        "question_id": values.get("question_id"),
+        "answer_text": values.get("answer_text"),
+        "selected_option_id": values.get("selected_option_id"),
+        "value_json": values.get("value_json"),
+        "id": values.get("id"),
+    }
 
 
 def get_response_count(db: Session, survey_id: str) -> int:
     """
-    Get the total number of responses for a survey.
+    Get the total number of responses for a survey, archived ones included.
     """
-    return db.query(Response).filter(Response.survey_id == survey_id).count()
\ No newline at end of file
+    hot = db.query(Response).filter(Response.survey_id == survey_id).count()
+    return hot + archive_service.archived_count(db, survey_id)
+
+
+# ---------------------------------------------------------------------------
+# Delta sync
+# ---------------------------------------------------------------------------
+
+# Responses newer than this are held back from delta pages. submitted_at is assigned before
+# commit, so a slow transaction can land behind a cursor that was already handed out.
+DELTA_SETTLE_SECONDS = float(os.getenv("DELTA_SETTLE_SECONDS", "2"))
+
+
+def encode_cursor(submitted_at: datetime, response_id: str) -> str:
+    raw = json.dumps([submitted_at.isoformat(), response_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        submitted_at, response_id = json.loads(raw)
+        return datetime.fromisoformat(submitted_at), str(response_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+
+
+def get_responses_since(
+    db: Session,
+    survey_id: str,
+    cursor: str | None = None,
+    limit: int = 500,
+) -> tuple[Sequence[Response], str | None, bool]:
+    """
+    Responses submitted after the cursor, oldest first, at most `limit` of them.
+    Returns (responses, next_cursor, has_more); next_cursor is the input cursor if nothing is new.
+    """
+    settled_before = datetime.now(timezone.utc) - timedelta(seconds=DELTA_SETTLE_SECONDS)
+    query = (
+        db.query(Response)
+        .filter(Response.survey_id == survey_id, Response.submitted_at <= settled_before)
+        .options(*_ANSWER_ROWS_ONLY)
+    )
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        after_submitted_at, after_id = after
+        query = query.filter(
+            or_(
+                Response.submitted_at > after_submitted_at,
+                and_(Response.submitted_at == after_submitted_at, Response.id > after_id),
+            )
+        )
+    rows = query.order_by(Response.submitted_at, Response.id).limit(limit + 1).all()
+    # Archived responses are older than the archive cutoff, so this is empty once a client is past it
+    archived = (
+        archive_service.archived_responses(survey_id, {row.id for row in rows}, after, limit + 1)
+        if archive_service.archived_count(db, survey_id) else []
+    )
+    if archived:
+        rows = sorted(rows + archived, key=lambda r: (archive_service.as_utc(r.submitted_at), r.id))[:limit + 1]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor(rows[-1].submitted_at, rows[-1].id)
+    return rows, cursor, has_more
@@ -0,0 +1,116 @@
+"""
+Fast JSON path for large read endpoints.
+
+Builds plain dicts straight from ORM rows (or already-plain rows) and encodes them with
+orjson when it is installed, skipping the per-object pydantic validation that
+`response_model` + `from_attributes` would do.  Output matches the pydantic schemas
+field for field; set FAST_JSON_VALIDATE=1 (tests, debugging) to validate every payload
+against its schema before it is sent, or FAST_JSON=0 to fall back to the pydantic path.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterable
+
+from fastapi import Response as HTTPResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "1") == "1"
+FAST_JSON_VALIDATE = os.getenv("FAST_JSON_VALIDATE") == "1"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Same rendering as pydantic: ISO 8601 with "Z" for UTC
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+        except TypeError:
+            pass  # e.g. an integer beyond 64 bits in stored JSON; the stdlib encoder handles it
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_response(payload: Any, model: type[BaseModel] | None = None, status_code: int = 200) -> HTTPResponse:
+    """Encode an already-plain payload; validate it against `model` only when FAST_JSON_VALIDATE is on."""
+    if FAST_JSON_VALIDATE and model is not None:
+        model.model_validate(payload)
+    return HTTPResponse(content=dumps(payload), status_code=status_code, media_type="application/json")
+
+
+# ---------------------------------------------------------------------------
+# Row → dict converters (key order mirrors the pydantic schemas)
+# ---------------------------------------------------------------------------
+
+def option_dict(option) -> dict:
+    return {
+        "id": option.id,
+        "question_id": option.question_id,
+        "label": option.label,
+        "value": option.value,
+        "order_index": option.order_index,
+    }
+
+
+def question_dict(question) -> dict:
+    return {
+        "id": question.id,
+        "survey_id": question.survey_id,
+        "type": question.type,
+        "title": question.title,
+        "description": question.description,
+        "required": question.required,
+        "order_index": question.order_index,
+        "options": [option_dict(option) for option in question.options],
+    }
+
+
+def survey_dict(survey) -> dict:
+    return {
+        "id": survey.id,
+        "title": survey.title,
+        "description": survey.description,
+        "share_token": survey.share_token,
+        "metadata_": survey.metadata_,
+        "created_at": survey.created_at,
+        "updated_at": survey.updated_at,
+        "questions": [question_dict(question) for question in survey.questions],
+    }
+
+
+def response_dict(response) -> dict:
+    """ORM Response → dict. Plain records (response_service.get_response_records) pass through."""
+    if isinstance(response, dict):
+        return response
+    answers = [
+        {
+            "question_id": record["question_id"],
+            "answer_text": record["answer_text"],
+            "selected_option_id": record["selected_option_id"],
+            "value_json": record["value_json"],
+            "id": record["id"],
+        }
+        for record in response.answer_records()
+    ]
+    return {
+        "respondent_id": response.respondent_id,
+        "metadata_": response.metadata_,
+        "id": response.id,
+        "submitted_at": response.submitted_at,
+        "answers": answers,
+    }
+
+
+def response_list_dict(survey_id: str, responses: Iterable) -> dict:
+    items = [response_dict(response) for response in responses]
+    return {"survey_id": survey_id, "total": len(items), "responses": items}
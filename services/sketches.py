@@ -0,0 +1,160 @@
+"""
+Mergeable streaming sketches with compact binary encodings.
+
+- TDigest: approximate quantiles of a numeric stream (rating medians, percentiles).
+- HyperLogLog: approximate distinct counts (unique respondents), ~1.6% standard error at p=12.
+
+Both merge losslessly with sketches of the same shape, so per-bucket sketches can be
+combined at query time over any range of buckets.
+"""
+
+import hashlib
+import math
+import struct
+import zlib
+
+# ---------------------------------------------------------------------------
+# t-digest (merging variant, k1 scale function)
+# ---------------------------------------------------------------------------
+
+_TDIGEST_HEADER = struct.Struct("<BHdddI")  # version, compression, count, min, max, centroids
+_CENTROID = struct.Struct("<dd")  # mean, weight
+
+
+class TDigest:
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: list[tuple[float, float]] = []
+        self._buffer: list[tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((float(value), float(weight)))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k_to_q(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _q_to_k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in items)
+        merged: list[tuple[float, float]] = []
+        mean, weight = items[0]
+        weight_before = 0.0
+        q_limit = self._k_to_q(self._q_to_k(0.0) + 1)
+        for next_mean, next_weight in items[1:]:
+            if (weight_before + weight + next_weight) / total <= q_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                weight_before += weight
+                q_limit = self._k_to_q(self._q_to_k(min(1.0, weight_before / total)) + 1)
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float | None:
+        """Approximate q-quantile (0 <= q <= 1), or None if the digest is empty."""
+        self._compress()
+        if not self._centroids:
+            return None
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+        target = q * self.count
+        # Interpolate between centroid centres, pinning the ends to the exact min/max.
+        prev_position, prev_value = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self._centroids:
+            position = cumulative + weight / 2
+            if target <= position:
+                span = position - prev_position
+                fraction = (target - prev_position) / span if span > 0 else 0.0
+                return prev_value + (mean - prev_value) * fraction
+            prev_position, prev_value = position, mean
+            cumulative += weight
+        span = self.count - prev_position
+        fraction = (target - prev_position) / span if span > 0 else 1.0
+        return prev_value + (self.max - prev_value) * min(1.0, fraction)
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        header = _TDIGEST_HEADER.pack(1, self.compression, self.count, self.min, self.max, len(self._centroids))
+        return header + b"".join(_CENTROID.pack(mean, weight) for mean, weight in self._centroids)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        _, compression, count, low, high, size = _TDIGEST_HEADER.unpack_from(data)
+        digest = cls(compression)
+        digest.count, digest.min, digest.max = count, low, high
+        offset = _TDIGEST_HEADER.size
+        digest._centroids = [
+            _CENTROID.unpack_from(data, offset + i * _CENTROID.size) for i in range(size)
+        ]
+        return digest
+
+
+# ---------------------------------------------------------------------------
+# HyperLogLog
+# ---------------------------------------------------------------------------
+
+class HyperLogLog:
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        registers = bytes(self.registers)
+        harmonic = sum(registers.count(rank) * 2.0 ** -rank for rank in range(66 - self.precision))
+        estimate = alpha * m * m / harmonic
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # small-range (linear counting) correction
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        # Registers are mostly zero for small surveys; zlib keeps those tiny.
+        return zlib.compress(bytes([self.precision]) + bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        raw = zlib.decompress(data)
+        sketch = cls(raw[0])
+        sketch.registers = bytearray(raw[1:])
+        return sketch
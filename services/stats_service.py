@@ -0,0 +1,321 @@
+"""
+Stats service — rating quantiles and unique-respondent counts from streaming sketches.
+
+Responses are summarized in per-day sketches (a t-digest per star_rating/slider question,
+a HyperLogLog of respondent_ids per survey).  A submit only appends a SurveySketchDelta
+row — no lookups, no row locks shared with other submits; the periodic "sketch_merge"
+job (services.job_service) folds deltas into the sketches.  Queries merge the day
+buckets in range plus the survey's not-yet-merged deltas, so they never scan answers
+and never lag behind submits.
+
+Responses stored before sketches existed can be folded in with
+`python -m services.stats_service SURVEY_ID` (rebuilds that survey's sketches).
+"""
+
+import os
+from datetime import date, datetime
+from typing import Callable, Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from database import bind_survey_shard, iter_shard_sessions
+from models.answer import Answer
+from models.question import Question
+from models.response import Response
+from models.sketch import SurveySketch, SurveySketchDelta
+from services.sketches import HyperLogLog, TDigest
+
+RATING_QUESTION_TYPES = ("star_rating", "slider")
+
+SKETCH_MERGE_INTERVAL_SECONDS = float(os.getenv("SKETCH_MERGE_INTERVAL_SECONDS", "30"))
+SKETCH_MERGE_BATCH_SIZE = int(os.getenv("SKETCH_MERGE_BATCH_SIZE", "5000"))
+
+_SKETCH_TYPES = {"tdigest": TDigest, "hll": HyperLogLog}
+
+
+def _bucket(submitted_at: datetime) -> str:
+    return submitted_at.isoformat()[:10]  # YYYY-MM-DD; isoformat is much cheaper than strftime
+
+
+def numeric_value(answer: dict) -> float | None:
+    """Rating value of an answer: a number in value_json (bare or {"value": n}) or numeric answer_text."""
+    value = answer.get("value_json")
+    if isinstance(value, dict):
+        value = value.get("value")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = answer.get("answer_text")
+    if text:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+    return None
+
+
+def _merge_into(db: Session, survey_id: str, question_id: str, kind: str, bucket: str, sketch) -> None:
+    """Merge an in-memory sketch into its stored bucket row (creating the row if needed)."""
+    key = (
+        SurveySketch.survey_id == survey_id,
+        SurveySketch.question_id == question_id,
+        SurveySketch.kind == kind,
+        SurveySketch.bucket == bucket,
+    )
+    row = db.execute(select(SurveySketch).where(*key).with_for_update()).scalar_one_or_none()
+    if row is None:
+        try:
+            with db.begin_nested():
+                db.add(SurveySketch(
+                    survey_id=survey_id,
+                    question_id=question_id,
+                    kind=kind,
+                    bucket=bucket,
+                    data=sketch.to_bytes(),
+                ))
+            return
+        except IntegrityError:
+            # Another transaction created the bucket first; merge into theirs.
+            row = db.execute(select(SurveySketch).where(*key).with_for_update()).scalar_one()
+    stored = _SKETCH_TYPES[kind].from_bytes(row.data)
+    stored.merge(sketch)
+    row.data = stored.to_bytes()
+
+
+def _rating_question_ids(db: Session, survey_id: str) -> set[str]:
+    return set(
+        db.execute(
+            select(Question.id).where(Question.survey_id == survey_id, Question.type.in_(RATING_QUESTION_TYPES))
+        ).scalars()
+    )
+
+
+class _SketchBatch:
+    """In-memory sketches per (question_id, bucket), built up before one merge into the stored rows."""
+
+    def __init__(self, rating_question_ids: set[str]):
+        self.rating_question_ids = rating_question_ids
+        self.digests: dict[tuple[str, str], TDigest] = {}
+        self.respondents: dict[str, HyperLogLog] = {}
+
+    def add(self, bucket: str, respondent_id: str | None, ratings: Iterable[tuple[str, float]]) -> None:
+        if respondent_id:
+            self.respondents.setdefault(bucket, HyperLogLog()).add(respondent_id)
+        for question_id, value in ratings:
+            if question_id in self.rating_question_ids:
+                self.digests.setdefault((question_id, bucket), TDigest()).add(value)
+
+    def add_answers(self, submitted_at: datetime, respondent_id: str | None, answers: Iterable[dict]) -> None:
+        """add() for a response's answer dicts; only rating questions' answers are parsed."""
+        self.add(_bucket(submitted_at), respondent_id, _ratings(answers, self.rating_question_ids))
+
+    def merge_into(self, db: Session, survey_id: str) -> None:
+        for (question_id, bucket), digest in self.digests.items():
+            _merge_into(db, survey_id, question_id, "tdigest", bucket, digest)
+        for bucket, hll in self.respondents.items():
+            _merge_into(db, survey_id, "", "hll", bucket, hll)
+
+
+def _ratings(answers: Iterable[dict], question_ids: set[str] | None = None) -> list[tuple[str, float]]:
+    """(question_id, value) of every numeric answer, or only of question_ids' answers if given."""
+    ratings = []
+    for answer in answers:
+        question_id = answer.get("question_id")
+        if not question_id or (question_ids is not None and question_id not in question_ids):
+            continue
+        value = numeric_value(answer)
+        if value is not None:
+            ratings.append((question_id, value))
+    return ratings
+
+
+def record_submit(
+    db: Session,
+    survey_id: str,
+    submitted_at: datetime,
+    respondent_id: str | None,
+    answers: Iterable[dict],
+) -> None:
+    """
+    Queue one submitted response for the sketches: a single INSERT in the caller's
+    transaction, without touching the shared sketch rows.
+    """
+    ratings = _ratings(answers)
+    if not respondent_id and not ratings:
+        return
+    db.add(SurveySketchDelta(
+        survey_id=survey_id,
+        bucket=_bucket(submitted_at),
+        respondent_id=respondent_id,
+        ratings=[list(pair) for pair in ratings],
+    ))
+
+
+def record_responses(db: Session, survey_id: str, responses: Iterable[tuple[datetime, str | None, Iterable[dict]]]) -> None:
+    """
+    Fold (submitted_at, respondent_id, answers) triples straight into the survey's sketches.
+    For batch writers (imports); submits use record_submit.
+    Answers are dicts with AnswerCreate keys. Does not commit — runs in the caller's transaction.
+    """
+    batch = _SketchBatch(_rating_question_ids(db, survey_id))
+    for submitted_at, respondent_id, answers in responses:
+        batch.add_answers(submitted_at, respondent_id, answers)
+    batch.merge_into(db, survey_id)
+
+
+def merge_deltas(db: Session, batch_size: int = SKETCH_MERGE_BATCH_SIZE) -> int:
+    """
+    Fold up to batch_size pending deltas (of the session's shard) into the sketches and
+    delete them, in one transaction. Returns how many were merged.
+    """
+    rows = db.execute(
+        select(SurveySketchDelta).order_by(SurveySketchDelta.id).limit(batch_size)
+    ).scalars().all()
+    if not rows:
+        return 0
+    ids = [row.id for row in rows]
+    # Claim the rows first: a concurrent merger that took some of them makes this one back off.
+    claimed = db.execute(delete(SurveySketchDelta).where(SurveySketchDelta.id.in_(ids))).rowcount
+    if claimed != len(ids):
+        db.rollback()
+        return 0
+    by_survey: dict[str, list[SurveySketchDelta]] = {}
+    for row in rows:
+        by_survey.setdefault(row.survey_id, []).append(row)
+    for survey_id, deltas in by_survey.items():
+        batch = _SketchBatch(_rating_question_ids(db, survey_id))
+        for delta in deltas:
+            batch.add(delta.bucket, delta.respondent_id, delta.ratings)
+        batch.merge_into(db, survey_id)
+    db.commit()
+    return len(ids)
+
+
+def merge_all_deltas(on_progress: Callable[[dict], None] | None = None) -> int:
+    """Merge every pending delta on every shard. Returns how many were merged."""
+    merged = 0
+    for db in iter_shard_sessions():
+        while count := merge_deltas(db):
+            merged += count
+            if on_progress:
+                on_progress({"merged_deltas": merged})
+    return merged
+
+
+def _merged(db: Session, survey_id: str, question_id: str, kind: str, since: date | None, until: date | None):
+    query = select(SurveySketch.data).where(
+        SurveySketch.survey_id == survey_id,
+        SurveySketch.question_id == question_id,
+        SurveySketch.kind == kind,
+    )
+    pending = select(SurveySketchDelta.respondent_id, SurveySketchDelta.ratings).where(
+        SurveySketchDelta.survey_id == survey_id
+    )
+    if since:
+        query = query.where(SurveySketch.bucket >= since.isoformat())
+        pending = pending.where(SurveySketchDelta.bucket >= since.isoformat())
+    if until:
+        query = query.where(SurveySketch.bucket <= until.isoformat())
+        pending = pending.where(SurveySketchDelta.bucket <= until.isoformat())
+    sketch_type = _SKETCH_TYPES[kind]
+    merged = sketch_type()
+    for data in db.execute(query).scalars():
+        merged.merge(sketch_type.from_bytes(data))
+
+    # Submits not folded in by the merge job yet
+    rated = kind == "tdigest" and question_id in _rating_question_ids(db, survey_id)
+    for respondent_id, ratings in db.execute(pending):
+        if kind == "hll" and respondent_id:
+            merged.add(respondent_id)
+        elif rated:
+            for rated_question_id, value in ratings:
+                if rated_question_id == question_id:
+                    merged.add(value)
+    return merged
+
+
+def rating_quantiles(
+    db: Session,
+    survey_id: str,
+    question_id: str,
+    quantiles: list[float],
+    since: date | None = None,
+    until: date | None = None,
+) -> dict:
+    digest = _merged(db, survey_id, question_id, "tdigest", since, until)
+    empty = digest.count == 0
+    return {
+        "survey_id": survey_id,
+        "question_id": question_id,
+        "count": int(digest.count),
+        "min": None if empty else digest.min,
+        "max": None if empty else digest.max,
+        "quantiles": {str(q): digest.quantile(q) for q in quantiles},
+    }
+
+
+def unique_respondents(db: Session, survey_id: str, since: date | None = None, until: date | None = None) -> dict:
+    hll = _merged(db, survey_id, "", "hll", since, until)
+    return {"survey_id": survey_id, "unique_respondents": hll.count()}
+
+
+def rebuild_sketches(db: Session, survey_id: str, batch_size: int = 1000) -> int:
+    """
+    Recompute a survey's sketches from its stored responses, archived ones included.
+    Returns the number of responses read.
+
+    The survey's pending deltas are listed in the same snapshot as the responses, and only
+    those are dropped: a submit landing mid-rebuild keeps its delta and is counted once.
+    """
+    bind_survey_shard(db, survey_id)
+    if db.get_bind(Response).dialect.name == "postgresql":
+        # Read committed would let responses committed after the delta listing into the scan
+        db.connection(bind_arguments={"mapper": Response}, execution_options={"isolation_level": "REPEATABLE READ"})
+    fenced = db.execute(
+        select(SurveySketchDelta.id).where(SurveySketchDelta.survey_id == survey_id)
+    ).scalars().all()
+
+    batch = _SketchBatch(_rating_question_ids(db, survey_id))
+    query = (
+        select(Response)
+        .where(Response.survey_id == survey_id)
+        .order_by(Response.submitted_at, Response.id)
+        .options(selectinload(Response.answers).lazyload(Answer.question))
+        .options(selectinload(Response.answers).lazyload(Answer.selected_option))
+        .execution_options(yield_per=batch_size)
+    )
+    hot_ids = set()
+    for partition in db.execute(query).scalars().partitions():
+        for response in partition:
+            batch.add_answers(response.submitted_at, response.respondent_id, response.answer_records())
+            hot_ids.add(response.id)
+
+    from services import archive_service
+    archived = archive_service.archived_records(survey_id, hot_ids)
+    for record in archived:
+        batch.add_answers(record["submitted_at"], record["respondent_id"], record["answers"])
+
+    db.execute(delete(SurveySketch).where(SurveySketch.survey_id == survey_id))
+    for start in range(0, len(fenced), batch_size):
+        db.execute(delete(SurveySketchDelta).where(SurveySketchDelta.id.in_(fenced[start:start + batch_size])))
+    batch.merge_into(db, survey_id)
+    db.commit()
+    return len(hot_ids) + len(archived)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild a survey's rating/respondent sketches from stored responses.")
+    parser.add_argument("survey_id")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = rebuild_sketches(session, args.survey_id)
+    finally:
+        session.close()
+    print(f"Rebuilt sketches from {count} response(s).")
@@ -0,0 +1,270 @@
+"""
+Static survey bundles — hosted survey payloads pre-rendered to disk.
+
+With SURVEY_BUNDLE_DIR set, every change to a shared survey publishes its SurveyResponse
+JSON as content-addressed files (plain, gzip and, when the `brotli` package is installed,
+brotli) plus a per-token pointer:
+
+    SURVEY_BUNDLE_DIR/bundles/<digest>.json[.gz|.br]
+    SURVEY_BUNDLE_DIR/tokens/<share_token>          -> "<digest> <version>"
+
+The version is the survey's updated_at (in microseconds), which every structure edit bumps
+while holding the survey row: a publisher that lost a race to a newer edit never swaps the
+pointer back to its older bundle.
+
+GET /s/{share_token} then serves the precompressed file straight from disk, with the
+digest as ETag, and never queries the database.  A token without a pointer falls back
+to the database (and is published on the way when read from the primary).  Rebuild everything and drop unreferenced
+bundles with `python -m services.survey_bundles`.
+
+Edits publish to the directory of the instance that made them, so every instance should
+share one SURVEY_BUNDLE_DIR.  Instances with a disk of their own set
+SURVEY_BUNDLE_REVALIDATE_SECONDS: a pointer older than that is checked against the
+survey's version (one indexed lookup) before it is served, and republished when stale.
+"""
+
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from services import serialization
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional; gzip only without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SURVEY_BUNDLE_DIR = os.getenv("SURVEY_BUNDLE_DIR")
+BUNDLES_ENABLED = bool(SURVEY_BUNDLE_DIR)
+# 0 trusts pointers as long as they exist (one shared SURVEY_BUNDLE_DIR).
+SURVEY_BUNDLE_REVALIDATE_SECONDS = float(os.getenv("SURVEY_BUNDLE_REVALIDATE_SECONDS", "0"))
+
+# Unreferenced bundles younger than this are kept by prune_bundles, so responses
+# already streaming an old version can finish.
+BUNDLE_PRUNE_AGE_SECONDS = 3600
+
+# Content-Encoding -> file suffix, in order of preference.
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _bundles_dir() -> str:
+    return os.path.join(SURVEY_BUNDLE_DIR, "bundles")
+
+
+def _pointer_path(share_token: str) -> str | None:
+    # Tokens are token_urlsafe strings; anything else cannot name a pointer file.
+    if not share_token or not share_token.replace("-", "").replace("_", "").isalnum():
+        return None
+    return os.path.join(SURVEY_BUNDLE_DIR, "tokens", share_token)
+
+
+def _tokens_dir() -> str:
+    return os.path.join(SURVEY_BUNDLE_DIR, "tokens")
+
+
+def _read_pointer(path: str) -> tuple[str, int] | None:
+    """(digest, version) a pointer file names, or None if there is none."""
+    try:
+        with open(path) as f:
+            parts = f.read().split()
+    except FileNotFoundError:
+        return None
+    if not parts:
+        return None
+    return parts[0], int(parts[1]) if len(parts) > 1 else 0
+
+
+def bundle_version(updated_at: datetime) -> int:
+    """A survey's bundle version: its updated_at in microseconds since the epoch."""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)  # SQLite hands back naive UTC
+    return (updated_at - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+
+
+@contextlib.contextmanager
+def _pointer_lock():
+    # Serializes compare-and-swap of pointers between publishers on this host
+    os.makedirs(_tokens_dir(), exist_ok=True)
+    with open(os.path.join(_tokens_dir(), ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # A temp file of its own per write: concurrent publishers (threads or processes) never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        os.fchmod(fd, 0o644)  # mkstemp creates 0600; bundles may be served by a separate web server
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+
+def publish_survey(survey) -> str | None:
+    """
+    Write the survey's hosted payload and point its share token at it. Returns the digest,
+    or None when nothing was published (disabled, failed, or a newer version is already live).
+    """
+    if not BUNDLES_ENABLED or not survey.share_token:
+        return None
+    pointer = _pointer_path(survey.share_token)
+    if pointer is None:
+        return None
+    try:
+        version = bundle_version(survey.updated_at)
+        body = serialization.dumps(serialization.survey_dict(survey))
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        base = os.path.join(_bundles_dir(), f"{digest}.json")
+        if not os.path.exists(base):
+            os.makedirs(_bundles_dir(), exist_ok=True)
+            # Compressed variants first: the plain file marks a complete bundle.
+            _write_atomic(base + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(base + ".br", brotli.compress(body, quality=11))
+            _write_atomic(base, body)
+        with _pointer_lock():
+            live = _read_pointer(pointer)
+            if live is not None and live[1] > version:
+                logger.info("Survey %s: version %s is already live, not publishing %s", survey.id, live[1], version)
+                return None
+            _write_atomic(pointer, f"{digest} {version}".encode())
+        return digest
+    except OSError:
+        # Never leave a stale bundle live: without a pointer the endpoint reads the database.
+        logger.exception("Publishing bundle for survey %s failed", survey.id)
+        unpublish(survey.share_token)
+        return None
+
+
+def unpublish(share_token: str | None) -> None:
+    """Remove a token's pointer (survey deleted or unshared); its bundle is pruned later."""
+    if not BUNDLES_ENABLED or not share_token:
+        return
+    pointer = _pointer_path(share_token)
+    if pointer is None:
+        return
+    try:
+        os.remove(pointer)
+    except FileNotFoundError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Serving
+# ---------------------------------------------------------------------------
+
+def find_bundle(share_token: str, accept_encoding: str = "") -> tuple[str, str, str | None] | None:
+    """
+    (path, digest, content_encoding) of the best published variant for the client,
+    or None if the token has no bundle.
+    """
+    if not BUNDLES_ENABLED:
+        return None
+    pointer = _pointer_path(share_token)
+    if pointer is None:
+        return None
+    live = _read_pointer(pointer)
+    if live is None:
+        return None
+    digest = live[0]
+    base = os.path.join(_bundles_dir(), f"{digest}.json")
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for encoding, suffix in _ENCODINGS:
+        if encoding in accepted and os.path.exists(base + suffix):
+            return base + suffix, digest, encoding
+    if os.path.exists(base):
+        return base, digest, None
+    return None
+
+
+def needs_revalidation(share_token: str) -> bool:
+    """True when SURVEY_BUNDLE_REVALIDATE_SECONDS is set and the token's pointer was last checked longer ago."""
+    if not BUNDLES_ENABLED or SURVEY_BUNDLE_REVALIDATE_SECONDS <= 0:
+        return False
+    pointer = _pointer_path(share_token)
+    try:
+        return time.time() - os.stat(pointer).st_mtime > SURVEY_BUNDLE_REVALIDATE_SECONDS
+    except (FileNotFoundError, TypeError):
+        return False
+
+
+def revalidate(share_token: str, updated_at: datetime) -> bool:
+    """
+    Whether the token's live bundle is at least as new as the survey's updated_at. A current
+    pointer is touched, so it is not checked again for SURVEY_BUNDLE_REVALIDATE_SECONDS.
+    """
+    pointer = _pointer_path(share_token)
+    live = _read_pointer(pointer) if pointer else None
+    if live is None or live[1] < bundle_version(updated_at):
+        return False
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(pointer)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+def prune_bundles(max_age_seconds: float = BUNDLE_PRUNE_AGE_SECONDS) -> int:
+    """Delete bundle files no pointer references (and older than max_age_seconds). Returns files removed."""
+    if not BUNDLES_ENABLED:
+        return 0
+    tokens_dir = _tokens_dir()
+    live = set()
+    if os.path.isdir(tokens_dir):
+        for name in os.listdir(tokens_dir):
+            if name.startswith("."):
+                continue  # the lock file, or a pointer being written
+            pointer = _read_pointer(os.path.join(tokens_dir, name))
+            if pointer is not None:
+                live.add(pointer[0])
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    if os.path.isdir(_bundles_dir()):
+        for entry in os.scandir(_bundles_dir()):
+            if entry.name.split(".")[0] not in live and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+    return removed
+
+
+def publish_all(db) -> int:
+    """Publish every shared, live survey. Returns how many were published."""
+    from models.survey import Survey
+
+    surveys = db.query(Survey).filter(Survey.share_token.is_not(None), Survey.deleted_at.is_(None)).all()
+    return sum(publish_survey(survey) is not None for survey in surveys)
+
+
+if __name__ == "__main__":
+    if not BUNDLES_ENABLED:
+        raise SystemExit("Set SURVEY_BUNDLE_DIR to publish survey bundles.")
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        published = publish_all(session)
+    finally:
+        session.close()
+    print(f"Published {published} survey bundle(s); pruned {prune_bundles()} stale file(s).")
@@ -1,19 +1,34 @@
 """
 Survey service — all business logic for survey CRUD, questions, options, and sharing.
+
+Questions and options are ordered by sparse integer sort keys (order_index, then id):
+new rows are appended ORDER_GAP past the last one and a move writes the midpoint of its
+new neighbours, so reordering touches a single row.  When a gap gets tight the parent is
+renumbered back to even spacing (in the background, or inline if no room is left).
 """
 
 import os
 import secrets
+from datetime import datetime, timezone
 from typing import Sequence
 
+from sqlalchemy import and_, delete, func, or_, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from database import bind_survey_shard
 from models.survey import Survey
 from models.question import Question
 from models.option import Option
 from schemas.survey import SurveyCreate, SurveyUpdate
+from schemas.option import OptionCreate
 from schemas.question import QuestionCreate, QuestionUpdate
+from services import survey_bundles
+
+# Spacing between sort keys of consecutive questions/options.
+ORDER_GAP = 1024
+# A move that leaves less room than this next to the moved row asks for a background renumber.
+ORDER_MIN_GAP = 4
 
 # Frontend base URL for share links. Set FRONTEND_URL in production (e.g. https://yourapp.vercel.app).
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000").rstrip("/")
@@ -40,11 +55,15 @@ def create_survey(db: Session, data: SurveyCreate) -> Survey:
 
 
 def list_surveys(db: Session) -> Sequence[Survey]:
-    return db.query(Survey).order_by(Survey.created_at.desc()).all()
+    return db.query(Survey).filter(Survey.deleted_at.is_(None)).order_by(Survey.created_at.desc()).all()
 
 
-def get_survey(db: Session, survey_id: str) -> Survey:
-    survey = db.query(Survey).filter(Survey.id == survey_id).first()
+def get_survey(db: Session, survey_id: str, for_update: bool = False) -> Survey:
+    query = db.query(Survey).filter(Survey.id == survey_id, Survey.deleted_at.is_(None))
+    if for_update:
+        # Serializes structure edits (appends, moves, renumbers) of one survey
+        query = query.with_for_update()
+    survey = query.first()
     if not survey:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
     return survey
@@ -59,13 +78,23 @@ def update_survey(db: Session, survey_id: str, data: SurveyUpdate) -> Survey:
         setattr(survey, key, value)
     db.commit()
     db.refresh(survey)
+    survey_bundles.publish_survey(survey)
     return survey
 
 
 def delete_survey(db: Session, survey_id: str) -> None:
-    survey = get_survey(db, survey_id)
-    db.delete(survey)
-    db.commit()
+    """
+    Hide the survey immediately. Its rows are removed afterwards in chunks by
+    deletion_service.purge_survey — never in this request's transaction.
+    Deleting a survey that is already hidden is a no-op, so a retried DELETE can resubmit its purge.
+    """
+    survey = db.query(Survey).filter(Survey.id == survey_id).first()
+    if not survey:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
+    if survey.deleted_at is None:
+        survey.deleted_at = datetime.now(timezone.utc)
+        db.commit()
+    survey_bundles.unpublish(survey.share_token)
 
 
 # ---------------------------------------------------------------------------
@@ -79,17 +108,38 @@ def generate_share_token(db: Session, survey_id: str) -> tuple[str, str]:
         survey.share_token = secrets.token_urlsafe(16)
         db.commit()
         db.refresh(survey)
+        survey_bundles.publish_survey(survey)
     share_url = _share_url(survey.share_token)
     return survey.share_token, share_url
 
 
 def get_survey_by_token(db: Session, share_token: str) -> Survey:
-    survey = db.query(Survey).filter(Survey.share_token == share_token).first()
+    survey = db.query(Survey).filter(Survey.share_token == share_token, Survey.deleted_at.is_(None)).first()
     if not survey:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
     return survey
 
 
+def get_survey_version_by_token(db: Session, share_token: str) -> datetime:
+    """updated_at of a live survey by share token: the version its hosted bundle must be at."""
+    updated_at = db.execute(
+        select(Survey.updated_at).where(Survey.share_token == share_token, Survey.deleted_at.is_(None))
+    ).scalar_one_or_none()
+    if updated_at is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
+    return updated_at
+
+
+def get_survey_id_by_token(db: Session, share_token: str) -> str:
+    """Id of a live survey by share token, without loading its questions (for hot respondent paths)."""
+    survey_id = db.execute(
+        select(Survey.id).where(Survey.share_token == share_token, Survey.deleted_at.is_(None))
+    ).scalar_one_or_none()
+    if survey_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Survey not found")
+    return survey_id
+
+
 def generate_collector_link(db: Session, survey_id: str) -> dict:
     """Generate a web link collector for a survey. Reuses existing token if present."""
     survey = get_survey(db, survey_id)
@@ -98,9 +148,10 @@ def generate_collector_link(db: Session, survey_id: str) -> dict:
     survey.collector_type = "web_link"
     db.commit()
     db.refresh(survey)
+    survey_bundles.publish_survey(survey)
 
     from models.response import Response
-    count = db.query(Response).filter(Response.survey_id == survey_id).count()
+    count = db.query(Response).filter(Response.survey_id == survey_id).count() + (survey.archived_responses or 0)
 
     return {
         "collector_name": "Web Link 1",
@@ -116,7 +167,7 @@ def get_collectors(db: Session, survey_id: str) -> dict:
     survey = get_survey(db, survey_id)
 
     from models.response import Response
-    count = db.query(Response).filter(Response.survey_id == survey_id).count()
+    count = db.query(Response).filter(Response.survey_id == survey_id).count() + (survey.archived_responses or 0)
 
     collectors = []
     if survey.share_token:
@@ -138,20 +189,30 @@ def get_collectors(db: Session, survey_id: str) -> dict:
 # Question CRUD
 # ---------------------------------------------------------------------------
 
+def _lock_for_edit(db: Session, survey_id: str) -> Survey:
+    """
+    Hold the survey row for a structure edit and bump its updated_at, the version its hosted
+    bundle is published under; edits of one survey thus commit (and publish) in version order.
+    """
+    survey = get_survey(db, survey_id, for_update=True)
+    survey.updated_at = datetime.now(timezone.utc)
+    return survey
+
+
+def _republish(db: Session, survey_id: str) -> None:
+    """Re-render the survey's hosted bundle after one of its questions changed."""
+    if survey_bundles.BUNDLES_ENABLED:
+        survey_bundles.publish_survey(get_survey(db, survey_id))
+
+
 def add_question(db: Session, survey_id: str, data: QuestionCreate) -> Question:
-    # Verify survey exists
-    get_survey(db, survey_id)
+    # Verify survey exists (and hold it so concurrent appends get distinct positions)
+    _lock_for_edit(db, survey_id)
 
-    # Auto-assign order_index if not provided
+    # Auto-assign: ORDER_GAP past the last question, computed inside the INSERT
     order_index = data.order_index
     if order_index is None:
-        max_order = (
-            db.query(Question.order_index)
-            .filter(Question.survey_id == survey_id)
-            .order_by(Question.order_index.desc())
-            .first()
-        )
-        order_index = (max_order[0] + 1) if max_order else 0
+        order_index = _append_position(Question.order_index, Question.survey_id == survey_id)
 
     question = Question(
         survey_id=survey_id,
@@ -170,12 +231,13 @@ def add_question(db: Session, survey_id: str, data: QuestionCreate) -> Question:
             question_id=question.id,
             label=opt_data.label,
             value=opt_data.value or opt_data.label,
-            order_index=opt_data.order_index if opt_data.order_index is not None else idx,
+            order_index=opt_data.order_index if opt_data.order_index is not None else (idx + 1) * ORDER_GAP,
         )
         db.add(option)
 
     db.commit()
     db.refresh(question)
+    _republish(db, survey_id)
     return question
 
 
@@ -188,36 +250,206 @@ def get_question(db: Session, question_id: str) -> Question:
 
 def update_question(db: Session, question_id: str, data: QuestionUpdate) -> Question:
     question = get_question(db, question_id)
+    _lock_for_edit(db, question.survey_id)
     update_data = data.model_dump(exclude_unset=True)
 
-    # Handle options replacement separately — use the original Pydantic objects
-    has_new_options = "options" in update_data
-    new_options_pydantic = data.options  # list[OptionCreate] or None
+    # Handle options separately — use the original Pydantic objects
+    new_options = data.options  # list[OptionCreate] or None
     update_data.pop("options", None)
 
     for key, value in update_data.items():
         setattr(question, key, value)
 
-    # If options are provided, replace all existing ones
-    if has_new_options and new_options_pydantic is not None:
-        # Delete existing options
-        db.query(Option).filter(Option.question_id == question_id).delete()
-        # Add new options
-        for idx, opt_data in enumerate(new_options_pydantic):
-            option = Option(
-                question_id=question_id,
-                label=opt_data.label,
-                value=opt_data.value or opt_data.label,
-                order_index=opt_data.order_index if opt_data.order_index is not None else idx,
-            )
-            db.add(option)
+    if new_options is not None:
+        _reconcile_options(db, question, new_options)
 
     db.commit()
     db.refresh(question)
+    _republish(db, question.survey_id)
     return question
 
 
+def _reconcile_options(db: Session, question: Question, new_options: list[OptionCreate]) -> None:
+    """
+    Make the question's options match new_options, editing rows in place instead of
+    recreating them.  An existing row is reused only for the option it already is: the one
+    named by an explicit id, else one with the same label, else one with the same value.
+    Everything else gets a new row, so a past answer never ends up pointing at a different
+    option.  Unmatched rows are soft-deleted (deleted_at): hidden from the question and its
+    form, but still there for the answers that picked them, whether in `answers`, answer
+    documents or the archive.  Rows whose label, value and position are unchanged are not written.
+    """
+    existing = {option.id: option for option in question.options}
+    kept: list[Option | None] = [existing.pop(opt.id, None) if opt.id else None for opt in new_options]
+    for key in (lambda o: o.label.strip(), lambda o: (o.value or o.label).strip()):
+        for i, opt_data in enumerate(new_options):
+            if kept[i] is None:
+                match = next((o for o in existing.values() if key(o) == key(opt_data)), None)
+                if match is not None:
+                    kept[i] = existing.pop(match.id)
+
+    positions = [
+        opt.order_index if opt.order_index is not None else (idx + 1) * ORDER_GAP
+        for idx, opt in enumerate(new_options)
+    ]
+    removed_at = datetime.now(timezone.utc)
+    for option in existing.values():
+        option.deleted_at = removed_at
+
+    for option, opt_data, position in zip(kept, new_options, positions):
+        if option is None:
+            option = Option(question_id=question.id)
+            db.add(option)
+        option.label = opt_data.label
+        option.value = opt_data.value or opt_data.label
+        option.order_index = position
+
+
 def delete_question(db: Session, question_id: str) -> None:
+    from services import response_service
+
     question = get_question(db, question_id)
+    survey_id = question.survey_id
+    _lock_for_edit(db, survey_id)
+    # `answers` rows go with the question by cascade; document-mode answers are pruned here
+    response_service.drop_document_answers(bind_survey_shard(db, survey_id), survey_id, question_id)
+    # Live options go by ORM cascade, soft-deleted ones (outside question.options) here
+    db.execute(delete(Option).where(Option.question_id == question_id, Option.deleted_at.is_not(None)))
     db.delete(question)
     db.commit()
+    _republish(db, survey_id)
+
+
+# ---------------------------------------------------------------------------
+# Ordering
+# ---------------------------------------------------------------------------
+
+def _append_position(order_column, parent_filter):
+    """SQL expression for the sort key after the parent's last child (index-backed MAX)."""
+    return (
+        select(func.coalesce(func.max(order_column), 0) + ORDER_GAP)
+        .where(parent_filter)
+        .scalar_subquery()
+    )
+
+
+def _slot(db: Session, model, parent_filter, moving, after) -> tuple[int | None, bool]:
+    """
+    Sort key for `moving` placed right after `after` (first when None), ignoring `moving`'s
+    current spot.  Returns (position, tight); position is None when the neighbours have no
+    room left, tight when the remaining gap is below ORDER_MIN_GAP.
+    """
+    siblings = select(model.order_index).where(parent_filter, model.id != moving.id)
+    if after is None:
+        low = 0  # new keys stay positive; legacy rows at 0 get renumbered on the first move to the top
+    else:
+        low = after.order_index
+        siblings = siblings.where(
+            or_(
+                model.order_index > after.order_index,
+                and_(model.order_index == after.order_index, model.id > after.id),
+            )
+        )
+    high = db.execute(siblings.order_by(model.order_index, model.id).limit(1)).scalar()
+    if high is None:
+        return low + ORDER_GAP, False
+    if high - low < 2:
+        return None, True
+    position = (low + high) // 2
+    return position, min(position - low, high - position) < ORDER_MIN_GAP
+
+
+def _respace(rows: list) -> None:
+    """Evenly re-space rows (already in display order); unchanged keys are not written."""
+    for idx, row in enumerate(rows):
+        position = (idx + 1) * ORDER_GAP
+        if row.order_index != position:
+            row.order_index = position
+
+
+def _ordered_questions(db: Session, survey_id: str) -> list[Question]:
+    return (
+        db.query(Question)
+        .filter(Question.survey_id == survey_id)
+        .order_by(Question.order_index, Question.id)
+        .all()
+    )
+
+
+def _ordered_options(db: Session, question_id: str) -> list[Option]:
+    return (
+        db.query(Option)
+        .filter(Option.question_id == question_id, Option.deleted_at.is_(None))
+        .order_by(Option.order_index, Option.id)
+        .all()
+    )
+
+
+def move_question(db: Session, question_id: str, after_id: str | None) -> tuple[Question, bool]:
+    """
+    Move a question right after `after_id` (or to the top). Writes only the moved row unless
+    its new neighbours have no room, in which case the survey's questions are renumbered first.
+    Returns (question, renumber_soon); the caller schedules renumber_survey when it is set.
+    """
+    question = get_question(db, question_id)
+    survey_id = question.survey_id
+    _lock_for_edit(db, survey_id)
+    after = None
+    if after_id:
+        after = get_question(db, after_id)
+        if after.id == question.id or after.survey_id != survey_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="after_id must be another question of the same survey")
+
+    parent = Question.survey_id == survey_id
+    position, tight = _slot(db, Question, parent, question, after)
+    if position is None:
+        _respace(_ordered_questions(db, survey_id))
+        db.flush()
+        position, tight = _slot(db, Question, parent, question, after)
+    question.order_index = position
+    db.commit()
+    db.refresh(question)
+    _republish(db, survey_id)
+    return question, tight
+
+
+def get_option(db: Session, option_id: str) -> Option:
+    option = db.query(Option).filter(Option.id == option_id, Option.deleted_at.is_(None)).first()
+    if not option:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Option not found")
+    return option
+
+
+def move_option(db: Session, option_id: str, after_id: str | None) -> tuple[Option, bool]:
+    """Move an option right after `after_id` (or to the top) within its question. Same contract as move_question."""
+    option = get_option(db, option_id)
+    question = get_question(db, option.question_id)
+    _lock_for_edit(db, question.survey_id)
+    after = None
+    if after_id:
+        after = get_option(db, after_id)
+        if after.id == option.id or after.question_id != option.question_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="after_id must be another option of the same question")
+
+    parent = and_(Option.question_id == question.id, Option.deleted_at.is_(None))
+    position, tight = _slot(db, Option, parent, option, after)
+    if position is None:
+        _respace(_ordered_options(db, question.id))
+        db.flush()
+        position, tight = _slot(db, Option, parent, option, after)
+    option.order_index = position
+    db.commit()
+    db.refresh(option)
+    _republish(db, question.survey_id)
+    return option, tight
+
+
+def renumber_survey(db: Session, survey_id: str) -> None:
+    """Re-space a survey's questions and each question's options to ORDER_GAP steps, keeping their order."""
+    _lock_for_edit(db, survey_id)
+    questions = _ordered_questions(db, survey_id)
+    _respace(questions)
+    for question in questions:
+        _respace(_ordered_options(db, question.id))
+    db.commit()
+    _republish(db, survey_id)  # order_index is part of the hosted payload
@@ -0,0 +1,80 @@
+"""
+Shared fixtures: one app on a throwaway SQLite database, with every data directory
+(archives, imports, bundles, reclassify runs) under a temp dir.
+
+Settings are read at import time, so they are set here before any app module is imported.
+Submit and autosave rate limits are off; tests/test_rate_limit.py exercises the buckets directly.
+"""
+
+import os
+import tempfile
+import time
+
+_TMP = tempfile.mkdtemp(prefix="survey-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP}/surveys.db",
+    "AUTO_MIGRATE": "1",
+    "ARCHIVE_DIR": os.path.join(_TMP, "archive"),
+    "IMPORT_DIR": os.path.join(_TMP, "imports"),
+    "RECLASSIFY_DIR": os.path.join(_TMP, "reclassify"),
+    "SURVEY_BUNDLE_DIR": os.path.join(_TMP, "bundles"),
+    "DELTA_SETTLE_SECONDS": "0",
+    "FAST_JSON_VALIDATE": "1",
+    "SKETCH_MERGE_INTERVAL_SECONDS": "0",
+    "DRAFT_GC_INTERVAL_SECONDS": "0",
+    "SUBMIT_RATE_PER_TOKEN": "0",
+    "SUBMIT_RATE_PER_IP": "0",
+    "AUTOSAVE_RATE_PER_DRAFT": "0",
+    "AUTOSAVE_RATE_PER_IP": "0",
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_survey(client):
+    """Create a shared survey; returns (survey payload, share token)."""
+
+    def make(title: str = "Survey", questions: list[dict] = ()):
+        survey = client.post("/api/surveys", json={"title": title}).json()
+        for question in questions:
+            client.post(f"/api/surveys/{survey['id']}/questions", json=question).raise_for_status()
+        token = client.post(f"/api/surveys/{survey['id']}/share").json()["share_token"]
+        return client.get(f"/api/surveys/{survey['id']}").json(), token
+
+    return make
+
+
+@pytest.fixture
+def wait_job(client):
+    """Poll a job until it leaves pending/running; returns its final payload."""
+
+    def wait(job_id: str, timeout: float = 10) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] not in ("pending", "running") or time.monotonic() > deadline:
+                return job
+            time.sleep(0.02)
+
+    return wait
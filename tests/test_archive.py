@@ -0,0 +1,182 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from models.response import ArchivedResponseKey
+from services import archive_service
+
+TEXT_QUESTION = {"title": "Comments", "type": "text"}
+
+
+def _submit(client, survey, token, count):
+    question_id = survey["questions"][0]["id"]
+    return [
+        client.post(f"/s/{token}/submit", json={"answers": [{"question_id": question_id, "answer_text": str(i)}]})
+        .json()["id"]
+        for i in range(count)
+    ]
+
+
+def _listing(client, survey_id):
+    listing = client.get(f"/api/surveys/{survey_id}/responses").json()
+    return sorted(
+        (response["id"], [a["answer_text"] for a in response["answers"]]) for response in listing["responses"]
+    ), listing["total"]
+
+
+def _count(client, survey_id):
+    return client.get(f"/api/surveys/{survey_id}/responses/count").json()["count"]
+
+
+def _delta_ids(client, survey_id, limit=2):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/api/surveys/{survey_id}/responses/delta", params=params).json()
+        seen += [response["id"] for response in page["responses"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return seen
+
+
+def test_archived_responses_stay_readable_and_restore(client, make_survey, wait_job):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 4)
+    before_archive = _listing(client, survey["id"])
+    cutoff = datetime.now(timezone.utc).isoformat()
+
+    job = client.post(f"/api/surveys/{survey['id']}/archive", json={"before": cutoff}).json()
+    assert wait_job(job["id"])["status"] == "completed"
+
+    status = client.get(f"/api/surveys/{survey['id']}/archive").json()
+    assert status["archived_responses"] == 4
+    assert status["archive_bytes"] > 0
+    assert status["archived_before"] is not None
+    assert _listing(client, survey["id"]) == before_archive
+    assert _count(client, survey["id"]) == 4
+
+    job = client.post(f"/api/surveys/{survey['id']}/archive/restore").json()
+    assert wait_job(job["id"])["status"] == "completed"
+
+    status = client.get(f"/api/surveys/{survey['id']}/archive").json()
+    assert (status["archived_responses"], status["archive_bytes"], status["archived_before"]) == (0, 0, None)
+    assert _listing(client, survey["id"]) == before_archive
+
+
+def test_only_responses_before_the_cutoff_are_archived(client, make_survey, wait_job):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 2)
+    cutoff = datetime.now(timezone.utc).isoformat()
+    _submit(client, survey, token, 1)
+
+    job = client.post(f"/api/surveys/{survey['id']}/archive", json={"before": cutoff}).json()
+    wait_job(job["id"])
+
+    assert client.get(f"/api/surveys/{survey['id']}/archive").json()["archived_responses"] == 2
+    assert _count(client, survey["id"]) == 3
+
+
+def test_count_is_constant_while_chunks_move(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 5)
+    counts = []
+
+    def progress(_):
+        counts.append(_count(client, survey["id"]))
+
+    archived = archive_service.archive_survey(
+        db, survey["id"], datetime.now(timezone.utc), chunk_size=2, on_progress=progress
+    )
+    restored = archive_service.restore_survey(db, survey["id"], chunk_size=2, on_progress=progress)
+
+    assert archived == restored == 5
+    assert counts == [5] * 6
+
+
+def test_delta_sync_spans_archive_and_hot_rows_once(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    ids = _submit(client, survey, token, 3)
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+    ids += _submit(client, survey, token, 2)
+
+    assert _delta_ids(client, survey["id"]) == ids
+
+
+def test_archiving_again_keeps_earlier_archive(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 2)
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+    _submit(client, survey, token, 2)
+
+    assert archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc)) == 2
+    assert client.get(f"/api/surveys/{survey['id']}/archive").json()["archived_responses"] == 4
+    assert _count(client, survey["id"]) == 4
+
+
+def test_archiving_again_appends_a_segment_and_leaves_earlier_ones_alone(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 2)
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+    (first,) = os.listdir(archive_service.archive_path(survey["id"]))
+    first_path = os.path.join(archive_service.archive_path(survey["id"]), first)
+    first_stat = os.stat(first_path)
+    _submit(client, survey, token, 1)
+
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+
+    assert len(os.listdir(archive_service.archive_path(survey["id"]))) == 2
+    assert (os.stat(first_path).st_mtime_ns, os.stat(first_path).st_size) == (first_stat.st_mtime_ns, first_stat.st_size)
+    assert len(_listing(client, survey["id"])[0]) == 3
+
+
+def test_resubmitting_an_archived_response_replays_it(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    answers = [{"question_id": survey["questions"][0]["id"], "answer_text": "once"}]
+    original = client.post(f"/s/{token}/submit", json={"respondent_id": "r-1", "answers": answers}).json()
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+
+    retry = client.post(f"/s/{token}/submit", json={"respondent_id": "r-1", "answers": answers})
+
+    assert retry.json()["id"] == original["id"]
+    assert [a["answer_text"] for a in retry.json()["answers"]] == ["once"]
+    assert _count(client, survey["id"]) == 1
+    assert archive_service.restore_survey(db, survey["id"]) == 1
+    assert _count(client, survey["id"]) == 1
+
+
+def test_restore_drops_a_key_a_hot_response_took_meanwhile(client, make_survey, db):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    answers = [{"question_id": survey["questions"][0]["id"], "answer_text": "x"}]
+    client.post(f"/s/{token}/submit", json={"respondent_id": "r-1", "answers": answers}).raise_for_status()
+    archive_service.archive_survey(db, survey["id"], datetime.now(timezone.utc))
+    # As left by archiving before keys were kept: the retry became a second response
+    db.execute(delete(ArchivedResponseKey).where(ArchivedResponseKey.survey_id == survey["id"]))
+    db.commit()
+    duplicate = client.post(f"/s/{token}/submit", json={"respondent_id": "r-1", "answers": answers}).json()
+
+    assert archive_service.restore_survey(db, survey["id"]) == 1
+
+    assert _count(client, survey["id"]) == 2
+    retry = client.post(f"/s/{token}/submit", json={"respondent_id": "r-1", "answers": answers})
+    assert retry.json()["id"] == duplicate["id"]
+
+
+def test_readers_skip_the_files_while_nothing_is_archived(client, make_survey, monkeypatch):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    _submit(client, survey, token, 2)
+
+    def unexpected_read(survey_id):
+        raise AssertionError("archive read")
+
+    monkeypatch.setattr(archive_service, "_read_indexed", unexpected_read)
+
+    assert _listing(client, survey["id"])[1] == 2
+    assert len(_delta_ids(client, survey["id"])) == 2
+
+
+def test_future_cutoff_is_rejected(client, make_survey):
+    survey, _ = make_survey()
+    future = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+    assert client.post(f"/api/surveys/{survey['id']}/archive", json={"before": future}).status_code == 422
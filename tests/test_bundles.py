@@ -0,0 +1,152 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+import database
+from models.survey import Survey
+from services import survey_bundles, survey_service
+
+
+def _pointer(token):
+    return os.path.join(survey_bundles.SURVEY_BUNDLE_DIR, "tokens", token)
+
+
+def _live_digest(token):
+    return open(_pointer(token)).read().split()[0]
+
+
+def test_shared_survey_is_served_from_its_bundle(client, make_survey):
+    survey, token = make_survey(questions=[{"title": "Name", "type": "text"}])
+
+    response = client.get(f"/s/{token}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].strip('"') == _live_digest(token)
+    assert response.json() == client.get(f"/api/surveys/{survey['id']}").json()
+
+
+def test_brotli_variant_is_served_when_accepted(client, make_survey):
+    brotli = pytest.importorskip("brotli")
+    _, token = make_survey(questions=[{"title": "Name", "type": "text"}])
+    path = os.path.join(survey_bundles._bundles_dir(), f"{_live_digest(token)}.json")
+
+    response = client.get(f"/s/{token}", headers={"Accept-Encoding": "br, gzip"})
+
+    assert response.headers["content-encoding"] == "br"
+    with open(path + ".br", "rb") as compressed, open(path, "rb") as plain:
+        assert brotli.decompress(compressed.read()) == plain.read()
+
+
+def test_unchanged_bundle_answers_304(client, make_survey):
+    _, token = make_survey()
+    etag = client.get(f"/s/{token}").headers["etag"]
+
+    assert client.get(f"/s/{token}", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_edits_republish_and_delete_unpublishes(client, make_survey):
+    survey, token = make_survey()
+    etag = client.get(f"/s/{token}").headers["etag"]
+
+    client.post(f"/api/surveys/{survey['id']}/questions", json={"title": "New", "type": "text"})
+    edited = client.get(f"/s/{token}")
+
+    assert edited.headers["etag"] != etag
+    assert [q["title"] for q in edited.json()["questions"]] == ["New"]
+    client.delete(f"/api/surveys/{survey['id']}")
+    assert not os.path.exists(_pointer(token))
+    assert client.get(f"/s/{token}").status_code == 404
+
+
+def test_a_late_publish_of_an_older_version_keeps_the_newer_bundle(client, make_survey, db):
+    survey, token = make_survey()
+    older = survey_service.get_survey(db, survey["id"])
+    assert older.questions == []
+
+    client.post(f"/api/surveys/{survey['id']}/questions", json={"title": "New", "type": "text"})
+    newer = _live_digest(token)
+
+    assert survey_bundles.publish_survey(older) is None
+    assert _live_digest(token) == newer
+
+
+def test_renumbering_republishes(client, make_survey, db):
+    survey, token = make_survey(questions=[{"title": "A", "type": "text"}, {"title": "B", "type": "text"}])
+    a, b = survey["questions"]
+    client.post(f"/api/questions/{b['id']}/move", json={"after_id": None}).raise_for_status()
+    assert [q["order_index"] for q in client.get(f"/s/{token}").json()["questions"]] == [512, 1024]
+
+    survey_service.renumber_survey(db, survey["id"])
+
+    assert [q["order_index"] for q in client.get(f"/s/{token}").json()["questions"]] == [1024, 2048]
+
+
+def test_stale_pointer_is_revalidated_and_republished(client, make_survey, db, monkeypatch):
+    survey, token = make_survey()
+    client.get(f"/s/{token}").raise_for_status()
+    # Another instance renamed the survey; this instance's bundle directory never heard of it
+    db.execute(
+        update(Survey).where(Survey.id == survey["id"]).values(title="Elsewhere", updated_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+    assert client.get(f"/s/{token}").json()["title"] != "Elsewhere"
+
+    monkeypatch.setattr(survey_bundles, "SURVEY_BUNDLE_REVALIDATE_SECONDS", 60)
+    os.utime(_pointer(token), (0, 0))
+
+    assert client.get(f"/s/{token}").json()["title"] == "Elsewhere"
+    assert client.get(f"/s/{token}").json()["title"] == "Elsewhere"
+    assert os.stat(_pointer(token)).st_mtime > 60
+
+
+def test_missing_bundle_is_published_from_the_primary(client, make_survey):
+    _, token = make_survey()
+    os.remove(_pointer(token))
+
+    assert client.get(f"/s/{token}").status_code == 200
+    assert os.path.exists(_pointer(token))
+
+
+def test_missing_bundle_is_not_published_from_a_replica(client, make_survey, monkeypatch):
+    _, token = make_survey()
+    os.remove(_pointer(token))
+    replica = create_engine(database.engine.url)  # same data, but not the primary engine
+    monkeypatch.setattr(database, "read_engine", replica)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica))
+    client.cookies.clear()
+
+    assert client.get(f"/s/{token}").status_code == 200
+    assert not os.path.exists(_pointer(token))
+    replica.dispose()
+
+
+def test_concurrent_writes_never_tear_a_file(tmp_path):
+    path = str(tmp_path / "bundle.json")
+    payloads = [bytes([65 + i]) * 200_000 for i in range(8)]
+    threads = [threading.Thread(target=survey_bundles._write_atomic, args=(path, data)) for data in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["bundle.json"]
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+
+def test_prune_drops_only_unreferenced_bundles(client, make_survey):
+    _, token = make_survey()
+    live = _live_digest(token)
+    orphan = os.path.join(survey_bundles._bundles_dir(), "0" * 32 + ".json")
+    open(orphan, "wb").close()
+
+    survey_bundles.prune_bundles(max_age_seconds=-1)
+
+    assert not os.path.exists(orphan)
+    assert os.path.exists(os.path.join(survey_bundles._bundles_dir(), f"{live}.json"))
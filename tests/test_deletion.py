@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+
+from models.question import Question
+from models.response import Response
+from models.survey import Survey
+from services import deletion_service
+
+QUESTIONS = [{"title": "Pick", "type": "single_choice", "options": [{"label": "A"}, {"label": "B"}]}]
+
+
+def _answered_survey(client, make_survey, responses=5):
+    survey, token = make_survey(questions=QUESTIONS)
+    question = survey["questions"][0]
+    for _ in range(responses):
+        client.post(f"/s/{token}/submit", json={
+            "answers": [{"question_id": question["id"], "selected_option_id": question["options"][0]["id"]}],
+        })
+    return survey, token
+
+
+def _rows(db, model, survey_id):
+    db.expire_all()
+    return db.execute(select(func.count()).select_from(model).where(model.survey_id == survey_id)).scalar()
+
+
+def _soft_delete(db, survey_id):
+    db.execute(update(Survey).where(Survey.id == survey_id).values(deleted_at=datetime.now(timezone.utc)))
+    db.commit()
+
+
+def test_delete_hides_at_once_and_purges_in_the_background(client, make_survey, db, wait_job):
+    survey, token = _answered_survey(client, make_survey)
+
+    deletion = client.delete(f"/api/surveys/{survey['id']}")
+
+    assert deletion.status_code == 202
+    assert client.get(f"/api/surveys/{survey['id']}").status_code == 404
+    assert client.get(f"/s/{token}").status_code == 404
+    assert wait_job(deletion.json()["job_id"])["status"] == "completed"
+    assert client.get(f"/api/surveys/{survey['id']}/deletion").json()["status"] == "deleted"
+    assert _rows(db, Response, survey["id"]) == _rows(db, Question, survey["id"]) == 0
+
+
+def test_purge_runs_in_chunks(client, make_survey, db):
+    survey, _ = _answered_survey(client, make_survey)
+    _soft_delete(db, survey["id"])
+    progress = []
+
+    removed = deletion_service.purge_survey(db, survey["id"], chunk_size=2, on_progress=progress.append)
+
+    assert removed == 5
+    assert [step["removed_responses"] for step in progress] == [2, 4, 5]
+    assert db.get(Survey, survey["id"]) is None
+
+
+def test_purge_leaves_a_live_survey_alone(client, make_survey, db):
+    survey, _ = _answered_survey(client, make_survey)
+
+    assert deletion_service.purge_survey(db, survey["id"]) == 0
+
+    assert _rows(db, Response, survey["id"]) == 5
+    assert client.get(f"/api/surveys/{survey['id']}").status_code == 200
+
+
+def test_purge_pending_finishes_half_purged_surveys(client, make_survey, db):
+    survey, _ = _answered_survey(client, make_survey)
+    _soft_delete(db, survey["id"])
+
+    assert deletion_service.purge_pending(db) >= 1
+
+    assert db.get(Survey, survey["id"]) is None
+    assert _rows(db, Response, survey["id"]) == 0
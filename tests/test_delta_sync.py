@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+from models.response import Response
+from services import response_service
+
+
+def _sync(client, survey_id, cursor=None, limit=2):
+    """Page through the delta endpoint; returns (ids seen, final cursor)."""
+    seen = []
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/api/surveys/{survey_id}/responses/delta", params=params).json()
+        seen += [response["id"] for response in page["responses"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return seen, cursor
+
+
+def test_pages_cover_every_response_once_in_order(client, make_survey):
+    survey, token = make_survey()
+    ids = [client.post(f"/s/{token}/submit", json={"answers": []}).json()["id"] for _ in range(5)]
+
+    seen, _ = _sync(client, survey["id"])
+
+    assert seen == ids
+
+
+def test_cursor_picks_up_only_new_responses(client, make_survey):
+    survey, token = make_survey()
+    client.post(f"/s/{token}/submit", json={"answers": []})
+    _, cursor = _sync(client, survey["id"])
+
+    assert _sync(client, survey["id"], cursor) == ([], cursor)
+    new_id = client.post(f"/s/{token}/submit", json={"answers": []}).json()["id"]
+    assert _sync(client, survey["id"], cursor)[0] == [new_id]
+
+
+def test_responses_sharing_a_timestamp_are_not_skipped(client, make_survey, db):
+    survey, _ = make_survey()
+    same_time = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    db.add_all(Response(survey_id=survey["id"], submitted_at=same_time, metadata_={}) for _ in range(5))
+    db.commit()
+
+    seen, _ = _sync(client, survey["id"], limit=2)
+
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_unsettled_responses_wait_for_the_next_poll(client, make_survey, monkeypatch):
+    survey, token = make_survey()
+    monkeypatch.setattr(response_service, "DELTA_SETTLE_SECONDS", 3600)
+    client.post(f"/s/{token}/submit", json={"answers": []})
+
+    assert _sync(client, survey["id"]) == ([], None)
+
+
+def test_invalid_cursor_is_rejected(client, make_survey):
+    survey, _ = make_survey()
+
+    response = client.get(f"/api/surveys/{survey['id']}/responses/delta", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
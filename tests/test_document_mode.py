@@ -0,0 +1,114 @@
+from sqlalchemy import func, select
+
+from models.answer import Answer
+from models.response import Response
+from services import response_service
+from services.response_compaction import compact_responses
+
+QUESTIONS = [
+    {"title": "Name", "type": "text"},
+    {"title": "Color", "type": "single_choice", "options": [{"label": "Red"}, {"label": "Blue"}]},
+]
+
+
+def _answers(survey):
+    text_question, choice_question = survey["questions"]
+    return [
+        {"question_id": text_question["id"], "answer_text": "Ada"},
+        {"question_id": choice_question["id"], "selected_option_id": choice_question["options"][1]["id"]},
+    ]
+
+
+def _listed_answers(client, survey):
+    responses = client.get(f"/api/surveys/{survey['id']}/responses").json()["responses"]
+    return [
+        sorted((a["question_id"], a["answer_text"], a["selected_option_id"]) for a in response["answers"])
+        for response in responses
+    ]
+
+
+def _answer_rows(db, survey):
+    return db.execute(
+        select(func.count()).select_from(Answer).join(Response).where(Response.survey_id == survey["id"])
+    ).scalar()
+
+
+def test_document_mode_stores_one_row_per_response(client, make_survey, db, monkeypatch):
+    monkeypatch.setattr(response_service, "RESPONSE_STORAGE_MODE", "document")
+    survey, token = make_survey(questions=QUESTIONS)
+
+    submitted = client.post(f"/s/{token}/submit", json={"answers": _answers(survey)}).json()
+
+    assert _answer_rows(db, survey) == 0
+    doc = db.get(Response, submitted["id"]).answers_doc
+    assert [entry["question_id"] for entry in doc] == [q["id"] for q in survey["questions"]]
+    assert all(value is not None for entry in doc for value in entry.values())  # nulls are left out
+    assert len(submitted["answers"]) == 2
+
+
+def test_both_modes_read_back_the_same(client, make_survey, monkeypatch):
+    rows_survey, rows_token = make_survey(questions=QUESTIONS)
+    client.post(f"/s/{rows_token}/submit", json={"answers": _answers(rows_survey)})
+    monkeypatch.setattr(response_service, "RESPONSE_STORAGE_MODE", "document")
+    doc_survey, doc_token = make_survey(questions=QUESTIONS)
+    client.post(f"/s/{doc_token}/submit", json={"answers": _answers(doc_survey)})
+
+    def normalized(survey):
+        ids = {q["id"]: i for i, q in enumerate(survey["questions"])}
+        options = {o["id"]: o["label"] for q in survey["questions"] for o in q["options"]}
+        return [
+            sorted((ids[q], text, options.get(option)) for q, text, option in answers)
+            for answers in _listed_answers(client, survey)
+        ]
+
+    assert normalized(rows_survey) == normalized(doc_survey)
+
+
+def test_document_mode_rejects_ids_outside_the_survey(client, make_survey, monkeypatch):
+    monkeypatch.setattr(response_service, "RESPONSE_STORAGE_MODE", "document")
+    survey, token = make_survey(questions=QUESTIONS)
+    other, _ = make_survey(questions=QUESTIONS)
+    text_question, choice_question = survey["questions"]
+    foreign_option = other["questions"][1]["options"][0]["id"]
+
+    unknown = client.post(f"/s/{token}/submit", json={"answers": [{"question_id": "nope", "answer_text": "x"}]})
+    wrong_option = client.post(f"/s/{token}/submit", json={"answers": [
+        {"question_id": choice_question["id"], "selected_option_id": foreign_option},
+    ]})
+    option_of_other_question = client.post(f"/s/{token}/submit", json={"answers": [
+        {"question_id": text_question["id"], "selected_option_id": choice_question["options"][0]["id"]},
+    ]})
+
+    client.put(f"/api/questions/{choice_question['id']}", json={"options": [{"label": "Red"}]}).raise_for_status()
+    removed_option = client.post(f"/s/{token}/submit", json={"answers": [
+        {"question_id": choice_question["id"], "selected_option_id": choice_question["options"][1]["id"]},
+    ]})
+
+    assert unknown.status_code == wrong_option.status_code == option_of_other_question.status_code == 422
+    assert removed_option.status_code == 422
+    assert client.get(f"/api/surveys/{survey['id']}/responses/count").json()["count"] == 0
+
+
+def test_deleting_a_question_drops_its_document_answers(client, make_survey, db, monkeypatch):
+    monkeypatch.setattr(response_service, "RESPONSE_STORAGE_MODE", "document")
+    survey, token = make_survey(questions=QUESTIONS)
+    submitted = client.post(f"/s/{token}/submit", json={"answers": _answers(survey)}).json()
+    text_question, choice_question = survey["questions"]
+
+    client.delete(f"/api/questions/{choice_question['id']}").raise_for_status()
+
+    assert [entry["question_id"] for entry in db.get(Response, submitted["id"]).answers_doc] == [text_question["id"]]
+    assert [(q, text) for q, text, _ in _listed_answers(client, survey)[0]] == [(text_question["id"], "Ada")]
+
+
+def test_compaction_folds_rows_into_documents(client, make_survey, db):
+    survey, token = make_survey(questions=QUESTIONS)
+    for _ in range(3):
+        client.post(f"/s/{token}/submit", json={"answers": _answers(survey)})
+    before = _listed_answers(client, survey)
+
+    assert compact_responses(db, survey["id"], batch_size=2) == 3
+
+    assert _answer_rows(db, survey) == 0
+    assert _listed_answers(client, survey) == before
+    assert compact_responses(db, survey["id"]) == 0
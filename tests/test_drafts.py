@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from models.draft import Draft, DraftEvent
+from services import draft_service, rate_limit
+from services.rate_limit import InMemoryBackend
+
+QUESTIONS = [{"title": "Name", "type": "text"}, {"title": "Comments", "type": "text"}]
+
+
+def _start(client, make_survey):
+    survey, token = make_survey(questions=QUESTIONS)
+    draft = client.post(f"/s/{token}/drafts", json={"respondent_id": "r-1"}).json()
+    return survey, token, draft["resume_token"]
+
+
+def _patch(client, token, resume_token, **body):
+    return client.patch(f"/s/{token}/drafts/{resume_token}", json=body)
+
+
+def _texts(draft):
+    return {answer["question_id"]: answer["answer_text"] for answer in draft["answers"]}
+
+
+def test_autosaves_fold_into_the_current_answers(client, make_survey):
+    survey, token, resume_token = _start(client, make_survey)
+    name, comments = (q["id"] for q in survey["questions"])
+
+    assert _patch(client, token, resume_token, seq=1, answers=[
+        {"question_id": name, "answer_text": "Ada"},
+        {"question_id": comments, "answer_text": "first"},
+    ]).status_code == 204
+    _patch(client, token, resume_token, seq=2, answers=[{"question_id": comments, "answer_text": "second"}])
+
+    draft = client.get(f"/s/{token}/drafts/{resume_token}").json()
+    assert _texts(draft) == {name: "Ada", comments: "second"}
+    assert draft["finalized_at"] is None
+
+
+def test_later_seq_wins_over_a_late_arrival_and_cleared_removes(client, make_survey):
+    survey, token, resume_token = _start(client, make_survey)
+    name, comments = (q["id"] for q in survey["questions"])
+
+    _patch(client, token, resume_token, seq=5, answers=[{"question_id": name, "answer_text": "new"}])
+    _patch(client, token, resume_token, seq=4, answers=[{"question_id": name, "answer_text": "stale"}])
+    _patch(client, token, resume_token, seq=6, answers=[{"question_id": comments, "answer_text": "x"}])
+    _patch(client, token, resume_token, seq=7, cleared=[comments])
+
+    assert _texts(client.get(f"/s/{token}/drafts/{resume_token}").json()) == {name: "new"}
+
+
+def test_finalize_is_idempotent_and_closes_the_draft(client, make_survey):
+    survey, token, resume_token = _start(client, make_survey)
+    name = survey["questions"][0]["id"]
+    _patch(client, token, resume_token, seq=1, answers=[{"question_id": name, "answer_text": "Ada"}])
+
+    first = client.post(f"/s/{token}/drafts/{resume_token}/finalize")
+    retry = client.post(f"/s/{token}/drafts/{resume_token}/finalize")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert first.json()["respondent_id"] == "r-1"
+    assert [a["answer_text"] for a in first.json()["answers"]] == ["Ada"]
+    assert client.get(f"/api/surveys/{survey['id']}/responses/count").json()["count"] == 1
+
+    draft = client.get(f"/s/{token}/drafts/{resume_token}").json()
+    assert draft["response_id"] == first.json()["id"]
+    assert draft["finalized_at"] is not None
+    late = _patch(client, token, resume_token, answers=[{"question_id": name, "answer_text": "late"}])
+    assert late.status_code == 409
+
+
+def test_unknown_draft_is_404(client, make_survey):
+    _, token = make_survey(questions=QUESTIONS)
+
+    assert client.get(f"/s/{token}/drafts/nope").status_code == 404
+    assert _patch(client, token, "nope", answers=[]).status_code == 404
+    assert client.post(f"/s/{token}/drafts/nope/finalize").status_code == 404
+
+
+def test_draft_of_another_survey_is_404(client, make_survey):
+    _, _, resume_token = _start(client, make_survey)
+    _, other_token = make_survey(questions=QUESTIONS)
+
+    assert client.get(f"/s/{other_token}/drafts/{resume_token}").status_code == 404
+
+
+def test_autosaves_have_their_own_rate_limit(client, make_survey, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_backend", InMemoryBackend())
+    monkeypatch.setattr(rate_limit, "AUTOSAVE_RATE_PER_DRAFT", 0.01)
+    monkeypatch.setattr(rate_limit, "AUTOSAVE_BURST_PER_DRAFT", 2)
+    survey, token, resume_token = _start(client, make_survey)
+    name = survey["questions"][0]["id"]
+
+    codes = [
+        _patch(client, token, resume_token, answers=[{"question_id": name, "answer_text": str(i)}]).status_code
+        for i in range(3)
+    ]
+
+    assert codes == [204, 204, 429]
+    # Another draft has its own bucket
+    other = client.post(f"/s/{token}/drafts", json={}).json()["resume_token"]
+    assert _patch(client, token, other, answers=[]).status_code == 204
+
+
+def test_garbage_collection_removes_only_inactive_drafts(client, make_survey, db):
+    survey, token, stale = _start(client, make_survey)
+    fresh = client.post(f"/s/{token}/drafts", json={}).json()["resume_token"]
+    _patch(client, token, stale, answers=[{"question_id": survey["questions"][0]["id"], "answer_text": "x"}])
+    long_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    stale_id = db.execute(select(Draft.id).where(Draft.resume_token == stale)).scalar_one()
+    db.execute(update(Draft).where(Draft.id == stale_id).values(created_at=long_ago))
+    db.execute(update(DraftEvent).where(DraftEvent.draft_id == stale_id).values(created_at=long_ago))
+    db.commit()
+
+    assert draft_service.collect_garbage(ttl_hours=24) >= 1
+
+    assert client.get(f"/s/{token}/drafts/{stale}").status_code == 404
+    assert client.get(f"/s/{token}/drafts/{fresh}").status_code == 200
+    assert db.execute(select(DraftEvent.id).where(DraftEvent.draft_id == stale_id)).first() is None
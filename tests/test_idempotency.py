@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+TEXT_QUESTION = {"title": "Comments", "type": "text"}
+
+
+def _answers(survey, text="hello"):
+    return [{"question_id": survey["questions"][0]["id"], "answer_text": text}]
+
+
+def _count(client, survey):
+    return client.get(f"/api/surveys/{survey['id']}/responses/count").json()["count"]
+
+
+def test_retry_with_same_key_returns_original_response(client, make_survey):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post(f"/s/{token}/submit", json={"answers": _answers(survey)}, headers=headers)
+    retry = client.post(f"/s/{token}/submit", json={"answers": _answers(survey, "changed")}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.json()["answers"][0]["answer_text"] == "hello"
+    assert _count(client, survey) == 1
+
+
+def test_respondent_id_is_the_default_key(client, make_survey):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+    body = {"respondent_id": "r-1", "answers": _answers(survey)}
+
+    ids = {client.post(f"/s/{token}/submit", json=body).json()["id"] for _ in range(3)}
+
+    assert len(ids) == 1
+    assert _count(client, survey) == 1
+
+
+def test_distinct_keys_and_anonymous_submits_are_kept(client, make_survey):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+
+    client.post(f"/s/{token}/submit", json={"answers": _answers(survey)}, headers={"Idempotency-Key": "a"})
+    client.post(f"/s/{token}/submit", json={"answers": _answers(survey)}, headers={"Idempotency-Key": "b"})
+    client.post(f"/s/{token}/submit", json={"answers": _answers(survey)})
+    client.post(f"/s/{token}/submit", json={"answers": _answers(survey)})
+
+    assert _count(client, survey) == 4
+
+
+def test_keys_are_scoped_per_survey(client, make_survey):
+    first, first_token = make_survey(questions=[TEXT_QUESTION])
+    second, second_token = make_survey(questions=[TEXT_QUESTION])
+    headers = {"Idempotency-Key": "shared"}
+
+    a = client.post(f"/s/{first_token}/submit", json={"answers": _answers(first)}, headers=headers).json()
+    b = client.post(f"/s/{second_token}/submit", json={"answers": _answers(second)}, headers=headers).json()
+
+    assert a["id"] != b["id"]
+
+
+def test_concurrent_retries_store_one_response(client, make_survey):
+    survey, token = make_survey(questions=[TEXT_QUESTION])
+
+    def submit(_):
+        return client.post(
+            f"/s/{token}/submit", json={"answers": _answers(survey)}, headers={"Idempotency-Key": "race"}
+        )
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(submit, range(8)))
+
+    assert {result.status_code for result in results} == {201}
+    assert len({result.json()["id"] for result in results}) == 1
+    assert _count(client, survey) == 1
@@ -0,0 +1,112 @@
+import json
+import os
+
+from services import import_service
+
+QUESTIONS = [
+    {"title": "Name", "type": "text"},
+    {"title": "Color", "type": "checkboxes", "options": [{"label": "Red"}, {"label": "Blue"}]},
+]
+
+
+def _start(client, survey, body: bytes, fmt="csv"):
+    return client.post(f"/api/surveys/{survey['id']}/imports", params={"format": fmt}, content=body)
+
+
+def _responses(client, survey):
+    return client.get(f"/api/surveys/{survey['id']}/responses").json()["responses"]
+
+
+def test_csv_import_loads_valid_rows_and_reports_the_rest(client, make_survey, wait_job):
+    survey, _ = make_survey(questions=QUESTIONS)
+    csv = (
+        "respondent_id,submitted_at,Name,Color\n"
+        "r1,2023-03-01T10:00:00Z,Ada,Red|Blue\n"
+        "r2,2023-03-02T10:00:00Z,Bob,Green\n"
+        "r3,not-a-date,Cy,Red\n"
+    )
+
+    started = _start(client, survey, csv.encode())
+    job = wait_job(started.json()["job_id"])
+
+    assert started.status_code == 202
+    assert job["status"] == "completed"
+    status = client.get(f"/api/surveys/{survey['id']}/imports/{started.json()['import_id']}").json()
+    assert (status["imported"], status["rejected"]) == (1, 2)
+    with open(status["errors_path"]) as report:
+        assert [json.loads(line)["line"] for line in report] == [3, 4]
+    (response,) = _responses(client, survey)
+    assert response["respondent_id"] == "r1"
+    assert response["submitted_at"].startswith("2023-03-01T10:00:00")
+    options = {o["id"]: o["label"] for o in survey["questions"][1]["options"]}
+    assert sorted(options[a["selected_option_id"]] for a in response["answers"] if a["selected_option_id"]) == ["Blue", "Red"]
+
+
+def test_ndjson_import_accepts_question_ids(client, make_survey, wait_job):
+    survey, _ = make_survey(questions=QUESTIONS)
+    name_id = survey["questions"][0]["id"]
+    rows = [
+        {"respondent_id": f"n{i}", "submitted_at": "2023-03-01T10:00:00Z", "answers": {name_id: f"person {i}", "Color": ["Red"]}}
+        for i in range(3)
+    ]
+
+    job = wait_job(_start(client, survey, "\n".join(map(json.dumps, rows)).encode(), "ndjson").json()["job_id"])
+
+    assert job["result"]["imported"] == 3
+    assert sorted(r["respondent_id"] for r in _responses(client, survey)) == ["n0", "n1", "n2"]
+
+
+def test_rerunning_an_import_resumes_after_its_checkpoint(client, make_survey, db, tmp_path):
+    survey, _ = make_survey(questions=QUESTIONS)
+    source = tmp_path / "rows.csv"
+    source.write_text("submitted_at,Name\n" + "".join(f"2023-03-01,p{i}\n" for i in range(5)))
+    import_id = import_service.create_import(survey["id"], str(source), "csv")["import_id"]
+
+    first = import_service.run_import(db, import_id, batch_size=2)
+    again = import_service.run_import(db, import_id, batch_size=2)
+
+    assert first["imported"] == again["imported"] == 5
+    assert len(_responses(client, survey)) == 5
+
+
+def test_rows_without_a_past_submitted_at_are_rejected(client, make_survey, wait_job):
+    survey, _ = make_survey(questions=QUESTIONS)
+    csv = "submitted_at,Name\n2023-03-01T10:00:00Z,Ada\n,Bob\n2999-01-01T00:00:00Z,Cy\n"
+
+    started = _start(client, survey, csv.encode())
+    wait_job(started.json()["job_id"])
+
+    status = client.get(f"/api/surveys/{survey['id']}/imports/{started.json()['import_id']}").json()
+    assert (status["imported"], status["rejected"]) == (1, 2)
+    with open(status["errors_path"]) as report:
+        errors = [json.loads(line)["error"] for line in report]
+    assert errors == ["Missing submitted_at", "submitted_at is in the future: '2999-01-01T00:00:00Z'"]
+
+
+def test_oversized_upload_is_rejected_and_cleaned_up(client, make_survey, monkeypatch):
+    survey, _ = make_survey(questions=QUESTIONS)
+    monkeypatch.setattr(import_service, "IMPORT_MAX_BYTES", 16)
+    before = set(os.listdir(import_service.IMPORT_DIR)) if os.path.isdir(import_service.IMPORT_DIR) else set()
+
+    response = _start(client, survey, b"Name\n" + b"x" * 64)
+
+    assert response.status_code == 413
+    assert set(os.listdir(import_service.IMPORT_DIR)) == before
+
+
+def test_unsupported_format_is_rejected(client, make_survey):
+    survey, _ = make_survey()
+
+    assert _start(client, survey, b"{}", "xml").status_code == 422
+
+
+def test_integers_beyond_64_bits_round_trip(client, make_survey):
+    survey, token = make_survey(questions=QUESTIONS)
+    big = 2**70
+
+    submitted = client.post(f"/s/{token}/submit", json={
+        "answers": [{"question_id": survey["questions"][0]["id"], "value_json": {"n": big}}],
+    })
+
+    assert submitted.status_code == 201
+    assert _responses(client, survey)[0]["answers"][0]["value_json"] == {"n": big}
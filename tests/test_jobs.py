@@ -0,0 +1,225 @@
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from models.job import Job
+from services import job_service
+
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def job_type():
+    """
+    Register a throwaway job type: job_type(handler, limit=1, session=None) -> its name.
+    Types stay registered: the runner may still dispatch a cancelled, queued job after the test.
+    """
+
+    def register(handler, limit: int = 1, session: str | None = None) -> str:
+        name = f"test_job_{next(_names)}"
+        job_service.JOB_TYPES[name] = (handler, limit, session)
+        return name
+
+    return register
+
+
+def _status(db, job_id):
+    db.expire_all()
+    return db.get(Job, job_id).status
+
+
+def _wait_status(db, job_id, wanted, timeout=5):
+    deadline = time.monotonic() + timeout
+    while _status(db, job_id) != wanted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _status(db, job_id)
+
+
+def test_job_runs_and_records_its_result(client, db, job_type, wait_job):
+    name = job_type(lambda job, value: {"double": value * 2})
+
+    job = job_service.submit(db, name, {"value": 21})
+
+    finished = wait_job(job.id)
+    assert finished["status"] == "completed"
+    assert finished["result"] == {"double": 42}
+    assert finished["finished_at"] is not None
+
+
+def test_handlers_get_the_session_they_ask_for(client, db, job_type, wait_job):
+    seen = {}
+
+    def handler(job, work_db=None):
+        seen["db"] = work_db
+        return {}
+
+    wait_job(job_service.submit(db, job_type(handler, session=None), {}).id)
+    assert seen["db"] is None
+    wait_job(job_service.submit(db, job_type(handler, session="primary"), {}).id)
+    assert seen["db"] is not None
+
+
+def test_failures_are_recorded(client, db, job_type, wait_job):
+    def handler(job):
+        raise RuntimeError("boom")
+
+    finished = wait_job(job_service.submit(db, job_type(handler), {}).id)
+
+    assert (finished["status"], finished["error"]) == ("failed", "boom")
+
+
+def test_dedupe_key_returns_the_active_job(client, db, job_type, wait_job):
+    release = threading.Event()
+    name = job_type(lambda job: release.wait(5) and {})
+
+    first = job_service.submit(db, name, {}, dedupe_key="same")
+    second = job_service.submit(db, name, {}, dedupe_key="same")
+    release.set()
+
+    assert second.id == first.id
+    wait_job(first.id)
+    assert job_service.submit(db, name, {}, dedupe_key="same").id != first.id
+
+
+def test_concurrency_limit_queues_extra_jobs(client, db, job_type, wait_job):
+    release = threading.Event()
+    name = job_type(lambda job: release.wait(5) and {}, limit=1)
+
+    first = job_service.submit(db, name, {})
+    second = job_service.submit(db, name, {})
+
+    assert _wait_status(db, first.id, "running") == "running"
+    time.sleep(0.1)
+    assert _status(db, second.id) == "pending"
+    release.set()
+    assert wait_job(second.id)["status"] == "completed"
+
+
+def test_cancel_pending_and_running_jobs(client, db, job_type, wait_job):
+    started = threading.Event()
+
+    def handler(job):
+        started.set()
+        while True:
+            job.progress({"step": 1})
+            time.sleep(0.01)
+
+    name = job_type(handler, limit=1)
+    running = job_service.submit(db, name, {})
+    queued = job_service.submit(db, name, {})
+    assert started.wait(5)
+
+    assert client.post(f"/api/jobs/{queued.id}/cancel").json()["status"] == "cancelled"
+    client.post(f"/api/jobs/{running.id}/cancel").raise_for_status()
+
+    assert wait_job(running.id)["status"] == "cancelled"
+    assert client.post(f"/api/jobs/{running.id}/cancel").status_code == 409
+
+
+def test_survey_purges_cannot_be_cancelled(client, db):
+    job = Job(type="survey_purge", params={"survey_id": "none"}, status="running")
+    db.add(job)
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        job_service.cancel_job(db, job.id)
+
+    assert exc.value.status_code == 409
+    db.delete(job)
+    db.commit()
+
+
+def test_repeated_delete_resubmits_the_purge(client, make_survey, db, wait_job):
+    from models.survey import Survey
+
+    survey, _ = make_survey()
+    db.get(Survey, survey["id"]).deleted_at = datetime.now(timezone.utc)  # left half-purged
+    db.commit()
+
+    deletion = client.delete(f"/api/surveys/{survey['id']}")
+
+    assert deletion.status_code == 202
+    assert wait_job(deletion.json()["job_id"])["status"] == "completed"
+    assert client.get(f"/api/surveys/{survey['id']}/deletion").json()["status"] == "deleted"
+
+
+def test_heartbeat_keeps_a_quiet_job_fresh(client, db, job_type, monkeypatch, wait_job):
+    monkeypatch.setattr(job_service, "JOB_HEARTBEAT_SECONDS", 0.05)
+    name = job_type(lambda job: time.sleep(0.4) or {})
+
+    job = job_service.submit(db, name, {})
+    assert _wait_status(db, job.id, "running") == "running"
+    db.expire_all()
+    first_beat = db.get(Job, job.id).updated_at
+    time.sleep(0.2)
+    db.expire_all()
+
+    assert db.get(Job, job.id).updated_at > first_beat
+    assert wait_job(job.id)["status"] == "completed"
+
+
+def test_start_requeues_stale_jobs(client, db, job_type, wait_job):
+    name = job_type(lambda job: {"ran": True})
+    long_ago = datetime.now(timezone.utc) - timedelta(seconds=job_service.JOB_STALE_SECONDS + 60)
+    stale = Job(type=name, params={}, status="running", updated_at=long_ago)
+    cancelled = Job(type=name, params={}, status="running", updated_at=long_ago, cancel_requested=True)
+    db.add_all([stale, cancelled])
+    db.commit()
+
+    job_service.start()
+
+    assert wait_job(stale.id)["result"] == {"ran": True}
+    assert _status(db, cancelled.id) == "cancelled"
+
+
+def test_sweep_requeues_jobs_orphaned_while_the_process_kept_running(client, db, job_type, wait_job):
+    name = job_type(lambda job: {"ran": True})
+    long_ago = datetime.now(timezone.utc) - timedelta(seconds=job_service.JOB_STALE_SECONDS + 60)
+    orphaned = Job(type=name, params={}, status="running", updated_at=long_ago)
+    alive = Job(type=name, params={}, status="running", updated_at=datetime.now(timezone.utc))
+    db.add_all([orphaned, alive])
+    db.commit()
+
+    assert job_service.sweep_stale_jobs() == 1
+
+    assert wait_job(orphaned.id)["result"] == {"ran": True}
+    assert _status(db, alive.id) == "running"
+
+
+def test_only_one_active_job_per_dedupe_key(client, db, job_type):
+    name = job_type(lambda job: {})
+    db.add_all([Job(type=name, params={}, status="running", dedupe_key="racy") for _ in range(2)])
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    db.add_all([Job(type=name, params={}, status=status, dedupe_key="done") for status in ("completed", "failed")])
+    db.commit()
+
+
+def test_submit_returns_the_job_that_won_an_insert_race(client, db, job_type, monkeypatch):
+    release = threading.Event()
+    name = job_type(lambda job: release.wait(5) and {})
+    winner = job_service.submit(db, name, {}, dedupe_key="raced")
+    misses = iter([None])
+    real_execute = db.execute
+
+    def execute(statement, *args, **kwargs):
+        # The loser's lookup runs before the winner commits: its first check sees nothing
+        result = real_execute(statement, *args, **kwargs)
+        if getattr(statement, "is_select", False) and next(misses, True) is None:
+            return real_execute(select(Job).where(Job.id == "none"))
+        return result
+
+    monkeypatch.setattr(db, "execute", execute)
+    loser = job_service.submit(db, name, {}, dedupe_key="raced")
+    release.set()
+
+    assert loser.id == winner.id
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import Column, Integer, create_engine, inspect
+
+import models  # noqa: F401 — registers every table on Base.metadata
+from database import SHARDED_TABLES, Base
+import migrations
+from migrations import (
+    LATEST_SHARD_VERSION,
+    LATEST_VERSION,
+    MIGRATIONS,
+    SHARD_MIGRATIONS,
+    current_version,
+    migrate,
+)
+
+
+def _columns(engine) -> dict[str, set[str]]:
+    inspector = inspect(engine)
+    return {name: {column["name"] for column in inspector.get_columns(name)} for name in inspector.get_table_names()}
+
+
+def test_fresh_database_matches_the_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+
+    assert migrate(engine) == [number for number, _, _ in MIGRATIONS]
+    columns = _columns(engine)
+    for table in Base.metadata.sorted_tables:
+        assert {column.name for column in table.columns} <= columns[table.name], table.name
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+
+
+def test_migrate_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/again.db")
+    migrate(engine)
+
+    assert migrate(engine) == []
+
+
+def test_baseline_does_not_follow_the_current_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/baseline.db")
+
+    migrate(engine, MIGRATIONS[:1])
+
+    columns = _columns(engine)
+    assert "idempotency_key" not in columns["responses"]
+    assert "deleted_at" not in columns["surveys"]
+    assert "jobs" not in columns
+    # ...and the later steps bring it up to date
+    assert migrate(engine) == [number for number, _, _ in MIGRATIONS[1:]]
+    assert "idempotency_key" in _columns(engine)["responses"]
+
+
+def test_steps_do_not_follow_later_model_changes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/frozen.db")
+    jobs = Base.metadata.tables["jobs"]
+    column = Column("added_later", Integer)
+    jobs.append_column(column)
+    try:
+        migrate(engine)
+    finally:
+        jobs._columns.remove(column)
+
+    assert "added_later" not in _columns(engine)["jobs"]
+
+
+def test_startup_check_names_the_unmigrated_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/behind.db")
+    migrate(engine, MIGRATIONS[:3])
+    monkeypatch.setattr(migrations, "engine", engine)
+    monkeypatch.setattr(migrations, "shard_engines", [])
+
+    with pytest.raises(RuntimeError, match=f"version 3, this code needs {LATEST_VERSION}"):
+        migrations.check_schema()
+    migrate(engine)
+    migrations.check_schema()
+
+
+def test_upgrades_a_database_from_the_old_create_all(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    # Old deployments had every current table already, but no schema_version
+    Base.metadata.create_all(engine)
+
+    migrate(engine)
+
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+
+
+def test_shard_migrations_create_only_sharded_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/shard.db")
+
+    migrate(engine, SHARD_MIGRATIONS)
+
+    assert set(_columns(engine)) == {*SHARDED_TABLES, "schema_version"}
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_SHARD_VERSION
+
+
+def test_importing_the_app_touches_no_database(tmp_path):
+    path = tmp_path / "never.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}", "AUTO_MIGRATE": "1"}
+
+    subprocess.run([sys.executable, "-c", "import main, database"], check=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert not path.exists()
@@ -0,0 +1,126 @@
+from models.option import Option
+from services.survey_service import ORDER_GAP
+
+
+def _survey_with_questions(make_survey, count=4):
+    return make_survey(questions=[{"title": f"Q{i}", "type": "text"} for i in range(count)])
+
+
+def _questions(client, survey_id):
+    return client.get(f"/api/surveys/{survey_id}").json()["questions"]
+
+
+def test_questions_are_appended_with_sparse_keys(client, make_survey):
+    survey, _ = _survey_with_questions(make_survey)
+
+    assert [q["order_index"] for q in survey["questions"]] == [ORDER_GAP * i for i in range(1, 5)]
+
+
+def test_move_rewrites_only_the_moved_question(client, make_survey):
+    survey, _ = _survey_with_questions(make_survey)
+    q0, q1, q2, q3 = survey["questions"]
+
+    client.post(f"/api/questions/{q3['id']}/move", json={"after_id": q0["id"]}).raise_for_status()
+    client.post(f"/api/questions/{q1['id']}/move", json={"after_id": None}).raise_for_status()
+
+    after = _questions(client, survey["id"])
+    assert [q["title"] for q in after] == ["Q1", "Q0", "Q3", "Q2"]
+    keys = {q["id"]: q["order_index"] for q in after}
+    assert (keys[q0["id"]], keys[q2["id"]]) == (q0["order_index"], q2["order_index"])
+
+
+def test_repeated_moves_into_one_gap_keep_the_order(client, make_survey, wait_job):
+    survey, _ = _survey_with_questions(make_survey, count=3)
+    first, _, _ = survey["questions"]
+    expected = [q["title"] for q in survey["questions"]]
+
+    # Keep moving the current last question right after the first one; the gap halves each time
+    for _ in range(15):
+        last = _questions(client, survey["id"])[-1]
+        client.post(f"/api/questions/{last['id']}/move", json={"after_id": first["id"]}).raise_for_status()
+        expected.insert(1, expected.pop())
+        # SQLite ignores FOR UPDATE, so let a background renumber finish before the next move
+        for job in client.get("/api/jobs", params={"type": "survey_renumber", "status": "pending"}).json():
+            wait_job(job["id"])
+        for job in client.get("/api/jobs", params={"type": "survey_renumber", "status": "running"}).json():
+            wait_job(job["id"])
+
+    after = _questions(client, survey["id"])
+    assert [q["title"] for q in after] == expected
+    assert len({q["order_index"] for q in after}) == len(after)
+
+
+def test_move_option_within_its_question(client, make_survey):
+    survey, _ = make_survey(questions=[
+        {"title": "Pick", "type": "single_choice", "options": [{"label": "A"}, {"label": "B"}, {"label": "C"}]},
+    ])
+    _, _, c = survey["questions"][0]["options"]
+
+    client.post(f"/api/options/{c['id']}/move", json={"after_id": None}).raise_for_status()
+
+    options = _questions(client, survey["id"])[0]["options"]
+    assert [o["label"] for o in options] == ["C", "A", "B"]
+
+
+# ---------------------------------------------------------------------------
+# Editing a question's option list
+# ---------------------------------------------------------------------------
+
+def _choice_survey(client, make_survey):
+    survey, token = make_survey(questions=[
+        {"title": "Pick", "type": "single_choice", "options": [{"label": "A"}, {"label": "B", "value": "b"}, {"label": "C"}]},
+    ])
+    question = survey["questions"][0]
+    return question, token, {o["label"]: o["id"] for o in question["options"]}
+
+
+def _put_options(client, question, options):
+    response = client.put(f"/api/questions/{question['id']}", json={"options": options})
+    response.raise_for_status()
+    return response.json()["options"]
+
+
+def test_options_are_matched_by_label_value_or_id(client, make_survey):
+    question, _, ids = _choice_survey(client, make_survey)
+
+    options = _put_options(client, question, [
+        {"label": "C"},
+        {"label": "Bee", "value": "b"},
+        {"id": ids["A"], "label": "Aye"},
+    ])
+
+    assert [(o["label"], o["id"]) for o in options] == [("C", ids["C"]), ("Bee", ids["B"]), ("Aye", ids["A"])]
+
+
+def test_unmatched_options_get_new_rows_and_unused_ones_are_deleted(client, make_survey):
+    question, _, ids = _choice_survey(client, make_survey)
+
+    options = _put_options(client, question, [{"label": "X"}, {"label": "Y"}])
+
+    assert [o["label"] for o in options] == ["X", "Y"]
+    assert not {o["id"] for o in options} & set(ids.values())
+
+
+def test_removed_options_are_hidden_but_kept_for_past_answers(client, make_survey, db):
+    question, token, ids = _choice_survey(client, make_survey)
+    client.post(f"/s/{token}/submit", json={
+        "answers": [{"question_id": question["id"], "selected_option_id": ids["B"]}],
+    }).raise_for_status()
+
+    options = _put_options(client, question, [{"label": "A"}, {"label": "C"}])
+
+    assert [o["label"] for o in options] == ["A", "C"]
+    assert [o["label"] for o in client.get(f"/s/{token}").json()["questions"][0]["options"]] == ["A", "C"]
+    assert db.get(Option, ids["B"]).deleted_at is not None
+    (response,) = client.get(f"/api/surveys/{question['survey_id']}/responses").json()["responses"]
+    assert response["answers"][0]["selected_option_id"] == ids["B"]
+
+
+def test_deleting_a_question_removes_its_hidden_options(client, make_survey, db):
+    question, _, ids = _choice_survey(client, make_survey)
+    _put_options(client, question, [{"label": "A"}])
+
+    client.delete(f"/api/questions/{question['id']}").raise_for_status()
+
+    db.expire_all()
+    assert db.get(Option, ids["B"]) is None
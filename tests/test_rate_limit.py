@@ -0,0 +1,97 @@
+import ipaddress
+import threading
+
+import pytest
+from fastapi import Request
+
+from services import rate_limit
+from services.rate_limit import InMemoryBackend
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = InMemoryBackend()
+    monkeypatch.setattr(rate_limit, "_backend", backend)
+    return backend
+
+
+def test_bucket_allows_burst_then_asks_to_wait():
+    backend = InMemoryBackend()
+    bucket = [("k", 1.0, 3.0)]
+
+    assert [backend.take(bucket) for _ in range(3)] == [0, 0, 0]
+    assert backend.take(bucket) == pytest.approx(1.0, abs=0.05)
+
+
+def test_rejected_request_takes_from_no_bucket():
+    backend = InMemoryBackend()
+    survey, client_ip = ("token", 0.001, 5.0), ("ip", 0.001, 1.0)
+
+    assert backend.take([survey, client_ip]) == 0
+    for _ in range(3):
+        assert backend.take([survey, client_ip]) > 0  # the IP bucket is empty
+    # The survey bucket was only charged for the admitted request
+    assert [backend.take([survey]) for _ in range(4)] == [0, 0, 0, 0]
+    assert backend.take([survey]) > 0
+
+
+def test_least_recently_used_keys_are_dropped():
+    backend = InMemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.take([(key, 1.0, 1.0)])
+
+    assert backend.take([("a", 1.0, 1.0)]) == 0  # forgotten, so it starts full again
+    assert backend.take([("c", 1.0, 1.0)]) > 0
+
+
+def test_submit_gets_429_with_retry_after(client, make_survey, backend, monkeypatch):
+    monkeypatch.setattr(rate_limit, "SUBMIT_RATE_PER_TOKEN", 0.01)
+    monkeypatch.setattr(rate_limit, "SUBMIT_BURST_PER_TOKEN", 2)
+    _, token = make_survey()
+
+    codes = [client.post(f"/s/{token}/submit", json={"answers": []}).status_code for _ in range(3)]
+    rejected = client.post(f"/s/{token}/submit", json={"answers": []})
+
+    assert codes == [201, 201, 429]
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+
+def test_per_ip_limit_is_shared_across_surveys(client, make_survey, backend, monkeypatch):
+    monkeypatch.setattr(rate_limit, "SUBMIT_RATE_PER_IP", 0.01)
+    monkeypatch.setattr(rate_limit, "SUBMIT_BURST_PER_IP", 1)
+    _, first = make_survey()
+    _, second = make_survey()
+
+    assert client.post(f"/s/{first}/submit", json={"answers": []}).status_code == 201
+    assert client.post(f"/s/{second}/submit", json={"answers": []}).status_code == 429
+
+
+def test_in_flight_cap_rejects_when_full(client, make_survey, backend, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_in_flight", threading.BoundedSemaphore(1))
+    _, token = make_survey()
+    rate_limit._in_flight.acquire()
+    try:
+        assert client.post(f"/s/{token}/submit", json={"answers": []}).status_code == 429
+    finally:
+        rate_limit._in_flight.release()
+    assert client.post(f"/s/{token}/submit", json={"answers": []}).status_code == 201
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_forwarded_for_is_only_trusted_from_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+
+    assert rate_limit.client_ip(_request("10.0.0.5", "203.0.113.7, 10.0.0.9")) == "203.0.113.7"
+    # A client cannot pick its own bucket by prepending addresses
+    assert rate_limit.client_ip(_request("10.0.0.5", "1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+    assert rate_limit.client_ip(_request("198.51.100.1", "203.0.113.7")) == "198.51.100.1"
+    assert rate_limit.client_ip(_request("10.0.0.5")) == "10.0.0.5"
+
+
+def test_backends_must_implement_take():
+    with pytest.raises(TypeError):
+        rate_limit.RateLimitBackend()
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database
+from migrations import migrate
+
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """An empty, migrated second database standing in for a replica that has not caught up."""
+    engine = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    migrate(engine)
+    monkeypatch.setattr(database, "read_engine", engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    client.cookies.clear()
+    yield engine
+    client.cookies.clear()
+    engine.dispose()
+
+
+def test_reads_go_to_the_replica(client, replica):
+    survey = client.post("/api/surveys", json={"title": "Routed"}).json()
+
+    assert client.get(f"/api/surveys/{survey['id']}").status_code == 404
+
+
+def test_writes_pin_the_client_to_the_primary(client, replica):
+    created = client.post("/api/surveys", json={"title": "Pinned"})
+    pin = created.cookies.get(database.PRIMARY_PIN_COOKIE)
+
+    assert float(pin) > time.time()
+    response = client.get(
+        f"/api/surveys/{created.json()['id']}", cookies={database.PRIMARY_PIN_COOKIE: pin}
+    )
+    assert response.status_code == 200
+
+
+def test_expired_or_bad_pin_reads_the_replica(client, replica):
+    survey = client.post("/api/surveys", json={"title": "Expired"}).json()
+
+    for value in (str(time.time() - 1), "garbage"):
+        response = client.get(f"/api/surveys/{survey['id']}", cookies={database.PRIMARY_PIN_COOKIE: value})
+        assert response.status_code == 404
+
+
+def test_pin_cookie_is_sent_cross_site(client, replica):
+    header = client.post("/api/surveys", json={"title": "Cookie"}).headers["set-cookie"].lower()
+
+    assert "samesite=none" in header
+    assert "secure" in header
+    assert "httponly" in header
+
+
+def test_no_pin_without_a_replica(client):
+    assert database.read_engine is database.engine
+    assert database.PRIMARY_PIN_COOKIE not in client.post("/api/surveys", json={"title": "Plain"}).cookies
+
+
+def test_polling_endpoints_read_without_pinning(client, make_survey, request):
+    survey, token = make_survey()
+    job = client.post(f"/api/surveys/{survey['id']}/stats/rebuild").json()
+    draft = client.post(f"/s/{token}/drafts", json={}).json()
+    request.getfixturevalue("replica")
+    polls = [
+        f"/api/jobs/{job['id']}",
+        f"/api/surveys/{survey['id']}/deletion",
+        f"/s/{token}/drafts/{draft['resume_token']}",
+    ]
+
+    for path in polls:
+        response = client.get(path)
+        assert database.PRIMARY_PIN_COOKIE not in response.headers.get("set-cookie", ""), path
+    # Served by the (empty) replica
+    assert client.get(polls[0]).status_code == 404
+    assert client.get(polls[1]).json()["status"] == "deleted"
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from services.predict_answer_type import COMPILED_RULES, predict_answer_type, score_answer_types
+
+TITLES = [
+    "What is your name?",
+    "Which of these do you use? Select all that apply",
+    "Pick one color",
+    "Your age",
+    "Age group of respondents",
+    "How satisfied are you?",
+    "",
+    "please select",
+    "all of them",
+]
+
+
+def _matching_types(title: str) -> set[str]:
+    return {answer_type for answer_type, patterns in COMPILED_RULES if any(p.search(title.strip()) for p in patterns)}
+
+
+def test_batch_scores_match_scoring_each_title_alone():
+    ranked = score_answer_types(TITLES)
+
+    for title, scores in zip(TITLES, ranked):
+        assert {answer_type for answer_type, _ in scores} == _matching_types(title), title
+        if scores:
+            assert sum(score for _, score in scores) == pytest.approx(1, abs=1e-3)
+
+
+def test_single_match_agrees_with_predict_answer_type():
+    for title, scores in zip(TITLES, score_answer_types(TITLES)):
+        if len(scores) == 1:
+            assert scores[0][0] == predict_answer_type(title)
+
+
+def test_patterns_never_match_across_titles():
+    # "select" ends one title and "all" starts the next; "$" must anchor at each title's end
+    assert score_answer_types(["please select", "all of them", "Your age", "x"])[:2] == [[], []]
+    assert score_answer_types(["Your age", "x"])[0] == [("Single text box", 1.0)]
+
+
+def test_reclassify_job_reports_mismatches(client, make_survey, wait_job):
+    survey, _ = make_survey(questions=[
+        {"title": "What is your name?", "type": "multiple_choice"},
+        {"title": "Pick one color", "type": "multiple_choice"},
+    ])
+    mismatched, matching = (q["id"] for q in survey["questions"])
+
+    started = client.post("/api/questions/reclassify", json={"only_mismatches": True}).json()
+    job = wait_job(started["job_id"])
+    state = client.get(f"/api/questions/reclassify/{started['run_id']}").json()
+
+    assert job["status"] == "completed"
+    assert state["status"] == "completed"
+    with open(state["results_path"]) as results:
+        by_id = {row["question_id"]: row for row in map(json.loads, results)}
+    assert by_id[mismatched]["suggested_type"] == "text"
+    assert by_id[mismatched]["mismatch"] is True
+    assert matching not in by_id
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from services import serialization
+
+QUESTIONS = [
+    {"title": "Name", "type": "text"},
+    {"title": "Color", "type": "single_choice", "options": [{"label": "Red"}, {"label": "Blue", "value": "b"}]},
+    {"title": "Rate", "type": "star_rating"},
+]
+
+
+@pytest.fixture
+def answered_survey(client, make_survey):
+    survey, token = make_survey(questions=QUESTIONS)
+    text_question, choice_question, rating_question = survey["questions"]
+    for i in range(3):
+        client.post(f"/s/{token}/submit", json={
+            "respondent_id": f"r{i}",
+            "metadata_": {"source": "test", "n": i},
+            "answers": [
+                {"question_id": text_question["id"], "answer_text": f"hi {i}"},
+                {"question_id": choice_question["id"], "selected_option_id": choice_question["options"][0]["id"]},
+                {"question_id": rating_question["id"], "value_json": {"v": i + 1}, "answer_text": str(i + 1)},
+            ],
+        })
+    return survey
+
+
+@pytest.mark.parametrize("path", ["/api/surveys/{id}", "/api/surveys/{id}/responses", "/api/surveys/{id}/responses/delta"])
+def test_fast_path_matches_the_pydantic_path(client, answered_survey, monkeypatch, path):
+    url = path.format(id=answered_survey["id"])
+
+    fast = client.get(url)
+    monkeypatch.setattr(serialization, "FAST_JSON", False)
+    slow = client.get(url)
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.json() == slow.json()
+
+
+def test_dumps_renders_utc_datetimes_like_pydantic():
+    payload = {"at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "naive": datetime(2024, 1, 2)}
+
+    assert json.loads(serialization.dumps(payload)) == {"at": "2024-01-02T03:04:05Z", "naive": "2024-01-02T00:00:00"}
+
+
+def test_dumps_falls_back_for_integers_beyond_64_bits():
+    assert json.loads(serialization.dumps({"n": 2**70})) == {"n": 2**70}
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import database
+from migrations import SHARD_MIGRATIONS, migrate
+from models.response import Response
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    engines = [create_engine(f"sqlite:///{tmp_path}/shard{i}.db") for i in range(2)]
+    for engine in engines:
+        migrate(engine, SHARD_MIGRATIONS)
+    monkeypatch.setattr(database, "shard_engines", engines)
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def _responses_on(engine, survey_id) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(Response.__table__).where(Response.survey_id == survey_id)
+        ).scalar()
+
+
+def test_shard_index_is_stable_and_in_range(shards):
+    assert database.shard_index("survey-a") == database.shard_index("survey-a")
+    assert {database.shard_index(f"survey-{i}") for i in range(50)} == {0, 1}
+
+
+def test_responses_live_on_the_survey_shard(client, make_survey, shards):
+    survey, token = make_survey(questions=[{"title": "Name", "type": "text"}])
+    answers = [{"question_id": survey["questions"][0]["id"], "answer_text": "Ada"}]
+    for _ in range(3):
+        client.post(f"/s/{token}/submit", json={"answers": answers}).raise_for_status()
+
+    home = database.shard_index(survey["id"])
+    assert _responses_on(shards[home], survey["id"]) == 3
+    assert _responses_on(shards[1 - home], survey["id"]) == 0
+    assert _responses_on(database.engine, survey["id"]) == 0
+    assert client.get(f"/api/surveys/{survey['id']}/responses/count").json()["count"] == 3
+    listed = client.get(f"/api/surveys/{survey['id']}/responses").json()["responses"]
+    assert [r["answers"][0]["answer_text"] for r in listed] == ["Ada"] * 3
+
+
+def test_iter_shard_sessions_visits_every_shard(shards):
+    bound = []
+    for session in database.iter_shard_sessions():
+        bound.append(session.get_bind(Response))
+
+    assert bound == shards
+
+
+def test_purge_clears_the_shard(client, make_survey, shards, wait_job):
+    survey, token = make_survey()
+    client.post(f"/s/{token}/submit", json={"answers": []})
+
+    wait_job(client.delete(f"/api/surveys/{survey['id']}").json()["job_id"])
+
+    assert _responses_on(shards[database.shard_index(survey["id"])], survey["id"]) == 0
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+from sqlalchemy import func, select
+
+from models.sketch import SurveySketchDelta
+from services import archive_service, stats_service
+from services.sketches import HyperLogLog, TDigest
+
+RATING = {"title": "Rate", "type": "star_rating"}
+
+
+def test_tdigest_quantiles_are_close():
+    values = list(range(1, 10001))
+    random.Random(1).shuffle(values)
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+
+    assert digest.quantile(0.5) == pytest.approx(5000, rel=0.02)
+    assert digest.quantile(0.99) == pytest.approx(9900, rel=0.01)
+    assert (digest.min, digest.max) == (1, 10000)
+
+
+def test_tdigest_merge_and_round_trip():
+    left, right = TDigest(), TDigest()
+    for value in range(500):
+        left.add(value)
+        right.add(value + 500)
+
+    left.merge(TDigest.from_bytes(right.to_bytes()))
+
+    assert left.count == 1000
+    assert left.quantile(0.5) == pytest.approx(500, rel=0.03)
+
+
+def test_hyperloglog_counts_distinct_values():
+    hll = HyperLogLog()
+    for i in range(20000):
+        hll.add(f"user-{i % 10000}")
+
+    assert hll.count() == pytest.approx(10000, rel=0.05)
+    assert HyperLogLog.from_bytes(hll.to_bytes()).count() == hll.count()
+
+
+def _stats(client, survey):
+    question_id = survey["questions"][0]["id"]
+    quantiles = client.get(f"/api/surveys/{survey['id']}/questions/{question_id}/quantiles", params={"q": [0.5]}).json()
+    unique = client.get(f"/api/surveys/{survey['id']}/respondents/unique").json()
+    return quantiles, unique["unique_respondents"]
+
+
+def _pending(db, survey):
+    return db.execute(
+        select(func.count()).select_from(SurveySketchDelta).where(SurveySketchDelta.survey_id == survey["id"])
+    ).scalar()
+
+
+@pytest.fixture
+def rated_survey(client, make_survey):
+    survey, token = make_survey(questions=[RATING])
+    question_id = survey["questions"][0]["id"]
+    for i in range(20):
+        client.post(f"/s/{token}/submit", json={
+            "respondent_id": f"r{i % 10}-{i}",
+            "answers": [{"question_id": question_id, "value_json": {"value": i % 5 + 1}}],
+        })
+    return survey
+
+
+def test_submits_queue_deltas_that_stats_already_count(client, rated_survey, db):
+    quantiles, unique = _stats(client, rated_survey)
+
+    assert _pending(db, rated_survey) == 20
+    assert quantiles["count"] == 20
+    assert (quantiles["min"], quantiles["max"]) == (1, 5)
+    assert unique == 20
+
+
+def test_merging_deltas_keeps_the_stats(client, rated_survey, db):
+    before = _stats(client, rated_survey)
+
+    assert stats_service.merge_all_deltas() >= 20
+
+    assert _pending(db, rated_survey) == 0
+    assert _stats(client, rated_survey) == before
+
+
+def test_rebuild_reproduces_the_stats(client, rated_survey, db, wait_job):
+    before = _stats(client, rated_survey)
+
+    job = wait_job(client.post(f"/api/surveys/{rated_survey['id']}/stats/rebuild").json()["id"])
+
+    assert job["status"] == "completed"
+    assert job["result"]["responses"] == 20
+    assert _pending(db, rated_survey) == 0
+    assert _stats(client, rated_survey) == before
+
+
+def test_submit_during_a_rebuild_is_counted_once(client, make_survey, db, monkeypatch):
+    survey, token = make_survey(questions=[RATING])
+    question_id = survey["questions"][0]["id"]
+
+    def submit(rating):
+        client.post(f"/s/{token}/submit", json={
+            "answers": [{"question_id": question_id, "value_json": {"value": rating}}],
+        }).raise_for_status()
+
+    for rating in (1, 2, 3):
+        submit(rating)
+    archived_records = archive_service.archived_records
+
+    def submit_mid_rebuild(*args, **kwargs):
+        submit(5)  # after the response scan, before the rebuild writes
+        return archived_records(*args, **kwargs)
+
+    monkeypatch.setattr(archive_service, "archived_records", submit_mid_rebuild)
+    assert stats_service.rebuild_sketches(db, survey["id"]) == 3
+
+    assert _pending(db, survey) == 1
+    quantiles, _ = _stats(client, survey)
+    assert (quantiles["count"], quantiles["max"]) == (4, 5)
+    stats_service.merge_all_deltas()
+    assert _stats(client, survey)[0]["count"] == 4